@@ -1,8 +1,11 @@
 # analyzer/advanced_analysis.py
-import pandas as pd
-from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import re
+import numpy as np
+
+from .market_basket import MarketBasket, cross_selling_opportunity
+from .seasonality import BasketFrame, SeasonMatcher, stable_season
+from .time_buckets import parse_timestamps
 
 class AdvancedPatternAnalyzer:
     def __init__(self):
@@ -12,63 +15,26 @@ class AdvancedPatternAnalyzer:
             'spring': ['gardening', 'flowers', 'seeds', 'cleaning', 'allergy', 'raincoat', 'umbrella', 'plant'],
             'fall': ['pumpkin', 'sweater', 'candle', 'jacket', 'boots', 'hot drink', 'spice', 'harvest']
         }
+        self.season_matcher = SeasonMatcher(self.seasonal_keywords)
     
-    def detect_product_seasonality(self, events: List[dict]) -> Dict[str, Any]:
-        """Detect seasonal patterns from real transaction data"""
-        seasonal_data = {
-            'winter': {'products': {}, 'total_revenue': 0, 'transaction_count': 0},
-            'spring': {'products': {}, 'total_revenue': 0, 'transaction_count': 0},
-            'summer': {'products': {}, 'total_revenue': 0, 'transaction_count': 0},
-            'fall': {'products': {}, 'total_revenue': 0, 'transaction_count': 0}
-        }
-        
-        monthly_data = {}
-        
-        for event in events:
-            if event.get("event_type") == "sale":
-                payload = event.get("payload", {})
-                products = payload.get("items", [])
-                amount = payload.get("amount", 0)
-                timestamp = event.get("ts", "")
-                season = payload.get("season", "").lower()
-                
-                if not isinstance(products, list):
-                    products = [products]
-                
-                # Extract month for trend analysis
-                month = self._extract_month(timestamp)
-                if month:
-                    if month not in monthly_data:
-                        monthly_data[month] = {'revenue': 0, 'transactions': 0}
-                    monthly_data[month]['revenue'] += amount
-                    monthly_data[month]['transactions'] += 1
-                
-                for product in products:
-                    product_str = str(product).lower()
-                    
-                    # Determine season for this product
-                    detected_season = self._predict_season_for_product(product_str, season)
-                    
-                    if detected_season in seasonal_data:
-                        if product not in seasonal_data[detected_season]['products']:
-                            seasonal_data[detected_season]['products'][product] = {
-                                'revenue': 0,
-                                'transactions': 0,
-                                'monthly_trend': {}
-                            }
-                        
-                        seasonal_data[detected_season]['products'][product]['revenue'] += amount / len(products)
-                        seasonal_data[detected_season]['products'][product]['transactions'] += 1
-                        seasonal_data[detected_season]['total_revenue'] += amount / len(products)
-                        seasonal_data[detected_season]['transaction_count'] += 1
-                        
-                        # Track monthly trend
-                        if month:
-                            if month not in seasonal_data[detected_season]['products'][product]['monthly_trend']:
-                                seasonal_data[detected_season]['products'][product]['monthly_trend'][month] = 0
-                            seasonal_data[detected_season]['products'][product]['monthly_trend'][month] += amount / len(products)
-        
-        return self._generate_seasonal_insights(seasonal_data, monthly_data)
+    def detect_product_seasonality(self, events: List[dict], frame: Optional[BasketFrame] = None) -> Dict[str, Any]:
+        """Detect seasonal patterns from real transaction data (pass `frame` to reuse exploded baskets)"""
+        frame = frame if frame is not None else BasketFrame.from_events(events)
+        seasonal_data = {season: {'products': {}} for season in ('winter', 'spring', 'summer', 'fall')}
+
+        # Season per product, unless the event states one
+        names, season_codes = frame.item_seasons(lambda product: self._predict_season_for_product(str(product).lower(), ""))
+        rows = np.flatnonzero(np.isin(season_codes, [i for i, name in enumerate(names) if name in seasonal_data]))
+
+        # Extract month for trend analysis
+        ts_months = frame.times.month_names("")
+        months, month_codes = frame.month_codes(ts_months, skip_empty=True)
+
+        # Only the top 2 products of each season are reported
+        for code, products in frame.product_trends(season_codes, month_codes, months, top=2, rows=rows).items():
+            seasonal_data[names[code]]['products'] = products
+
+        return self._generate_seasonal_insights(seasonal_data, frame.monthly_totals(ts_months))
     
     def _predict_season_for_product(self, product: str, actual_season: str) -> str:
         """Predict the most likely season for a product"""
@@ -77,33 +43,16 @@ class AdvancedPatternAnalyzer:
             return actual_season
         
         # Otherwise predict based on product name keywords
-        product_lower = product.lower()
-        for season, keywords in self.seasonal_keywords.items():
-            if any(keyword in product_lower for keyword in keywords):
-                return season
+        season = self.season_matcher.match(product.lower())
+        if season is not None:
+            return season
         
-        # Fallback: distribute evenly or use other logic
-        seasons = ['winter', 'spring', 'summer', 'fall']
-        return seasons[hash(product) % len(seasons)]  # Simple hash-based distribution
+        # Fallback: distribute evenly, the same way in every worker
+        return stable_season(product)
     
     def _extract_month(self, timestamp: str) -> str:
         """Extract month name from timestamp"""
-        try:
-            if isinstance(timestamp, str):
-                # Handle different timestamp formats
-                if 'T' in timestamp:
-                    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                else:
-                    dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
-                return dt.strftime("%B")  # Full month name
-        except:
-            try:
-                # Try other common formats
-                dt = datetime.strptime(timestamp, '%Y-%m-%d')
-                return dt.strftime("%B")
-            except:
-                pass
-        return ""
+        return parse_timestamps([timestamp]).month_names("")[0]
     
     def _generate_seasonal_insights(self, seasonal_data: Dict, monthly_data: Dict) -> Dict[str, Any]:
         """Generate insights from analyzed seasonal data"""
@@ -181,32 +130,15 @@ class AdvancedPatternAnalyzer:
 
 
 class SemanticSearchEngine:
-    def find_cross_selling_opportunities(self, events: List[dict]) -> List[Dict[str, Any]]:
-        """Find product bundling opportunities from real data"""
-        product_pairs = {}
-        
-        for event in events:
-            if event.get("event_type") == "sale":
-                products = event.get("payload", {}).get("items", [])
-                if isinstance(products, list) and len(products) >= 2:
-                    # Track all product pairs in this transaction
-                    for i in range(len(products)):
-                        for j in range(i + 1, len(products)):
-                            pair = tuple(sorted([str(products[i]), str(products[j])]))
-                            if pair not in product_pairs:
-                                product_pairs[pair] = 0
-                            product_pairs[pair] += 1
-        
-        # Convert to recommendations
-        opportunities = []
-        for (product1, product2), count in sorted(product_pairs.items(), 
-                                                key=lambda x: x[1], reverse=True)[:10]:
-            if count >= 2:  # Minimum co-occurrence threshold
-                opportunities.append({
-                    "product_a": product1,
-                    "product_b": product2,
-                    "co_occurrence_count": count,
-                    "recommendation": f"Bundle {product1} with {product2} - purchased together {count} times"
-                })
-        
-        return opportunities
\ No newline at end of file
+    def find_cross_selling_opportunities(self, events: List[dict], min_count: int = 2, min_support: float = 0.0,
+                                         min_confidence: float = 0.0, min_lift: float = 0.0,
+                                         top_n: int = 10) -> List[Dict[str, Any]]:
+        """
+        Product bundling opportunities: pairs bought together in at least
+        min_count baskets, with support, confidence and lift from the
+        basket x product matrix (each pair counted once per basket)
+        """
+        pairs = MarketBasket.from_events(events).pairs(min_count=min_count, min_support=min_support,
+                                                       min_confidence=min_confidence, min_lift=min_lift,
+                                                       top_n=top_n)
+        return [cross_selling_opportunity(pair) for pair in pairs]
@@ -0,0 +1,116 @@
+# analyzer/analysis_pool.py
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional
+
+from .advanced_analysis import AdvancedPatternAnalyzer
+from .enhanced_llm_analysis import AdvancedPatternAnalyzer as EnhancedPatternAnalyzer
+from .market_basket import MarketBasket
+from .seasonality import BasketFrame
+
+# Analyzers of this process; a worker keeps their season memos across batches
+_analyzers: Dict[str, Any] = {}
+
+
+def analyze_frame(frame: BasketFrame, cross_selling: bool) -> Dict[str, Any]:
+    """Both seasonality analyses of a batch, plus its own cross-selling pairs when asked for"""
+    if not _analyzers:
+        _analyzers.update(advanced=AdvancedPatternAnalyzer(), enhanced=EnhancedPatternAnalyzer())
+    result = {
+        "seasonal_insights": _analyzers["advanced"].detect_product_seasonality([], frame),
+        "enhanced_insights": _analyzers["enhanced"].detect_product_seasonality([], frame),
+    }
+    if cross_selling:
+        result["cross_selling_pairs"] = MarketBasket.from_frame(frame).pairs(min_count=2, top_n=10)
+    return result
+
+
+def _warm_worker():
+    """Import the analyzers and build them before the first batch needs them"""
+    analyze_frame(BasketFrame.from_events([]), False)
+
+
+class AnalysisPool:
+    """
+    Runs the CPU-bound part of /analyze in worker processes, so the event
+    loop keeps serving /health, search and chat while a large batch is
+    analyzed. Batches are sent as a BasketFrame (numpy columns and distinct
+    values) rather than event dicts, which keeps pickling cheap.
+
+    At most max_pending batches are queued or running; run() returns None
+    for any batch beyond that instead of letting the backlog grow. With no
+    workers, batches run on a thread of the default executor.
+    """
+
+    def __init__(self, workers: int, max_pending: int = 8):
+        self.workers = max(0, workers)
+        self.max_pending = max(1, max_pending)
+        self._pool = self._new_pool()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failures = 0
+        self.replacements = 0
+        self.busy_ms = 0.0
+
+    def _new_pool(self) -> Optional[ProcessPoolExecutor]:
+        # Spawned rather than forked, so workers never inherit the server's threads or locks
+        if self.workers == 0:
+            return None
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def run(self, frame: BasketFrame, cross_selling: bool) -> Optional[Dict[str, Any]]:
+        """analyze_frame off the event loop, or None if max_pending batches are already in"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return None
+        self.pending += 1
+        start = time.perf_counter()
+        pool = self._pool
+        try:
+            result = await asyncio.get_event_loop().run_in_executor(pool, analyze_frame, frame, cross_selling)
+            self.completed += 1
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory): later batches get a fresh pool, started now rather than by them.
+            # Every batch in flight on the broken pool fails; only the first one replaces it
+            self.failures += 1
+            if self._pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+                self.warm()
+                self.replacements += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.pending -= 1
+            self.busy_ms += (time.perf_counter() - start) * 1000
+
+    def warm(self):
+        """Start the workers in the background; does not wait for them"""
+        if self._pool is not None:
+            for _ in range(self.workers):
+                self._pool.submit(_warm_worker)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        runs = self.completed + self.failures
+        return {
+            "workers": self.workers,
+            "mode": "processes" if self.workers else "thread",
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failures": self.failures,
+            "pool_replacements": self.replacements,
+            "avg_ms": round(self.busy_ms / runs, 1) if runs else 0.0,
+        }
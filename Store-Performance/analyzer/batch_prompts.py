@@ -0,0 +1,106 @@
+# analyzer/batch_prompts.py
+import json
+from typing import List, Dict, Any, Optional
+
+# Rough chars-per-token ratio for llama-style tokenizers; only used for budgeting
+CHARS_PER_TOKEN = 4
+# Completion tokens reserved per event for INSIGHT/ANALYSIS/TAGS
+RESPONSE_TOKENS_PER_EVENT = 120
+
+BATCH_INSTRUCTIONS = """
+Analyze each retail transaction below and provide business insights for every one of them.
+
+Return ONLY a JSON object of the form:
+{"results": [{"index": <transaction index>, "insight": "<key insight>", "analysis": "<detailed analysis>", "tags": ["tag1", "tag2", "tag3"]}]}
+
+Include exactly one result per transaction, using the same index.
+
+TRANSACTIONS:
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def compact_event(index: int, features: dict) -> str:
+    """One-line JSON description of a transaction, same fields as the per-event prompt"""
+    return json.dumps({
+        "index": index,
+        "store": features.get("store_id"),
+        "customer": features.get("customer_category"),
+        "amount": round(float(features.get("amount", 0) or 0), 2),
+        "payment": features.get("payment_method"),
+        "items": features.get("items", []),
+        "season": features.get("season"),
+        "store_type": features.get("store_type"),
+        "promotion": features.get("promotion"),
+        "discount": features.get("discount_applied"),
+    }, default=str)
+
+
+def chunk_by_token_budget(features_list: List[dict], token_budget: int, max_events: int) -> List[List[int]]:
+    """
+    Group event positions so each batch prompt plus its expected response
+    stays within token_budget. An event that alone exceeds the budget still
+    gets a batch of its own.
+    """
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    used = estimate_tokens(BATCH_INSTRUCTIONS)
+
+    for pos, features in enumerate(features_list):
+        cost = estimate_tokens(compact_event(pos, features)) + RESPONSE_TOKENS_PER_EVENT
+        if current and (used + cost > token_budget or len(current) >= max_events):
+            chunks.append(current)
+            current = []
+            used = estimate_tokens(BATCH_INSTRUCTIONS)
+        current.append(pos)
+        used += cost
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_batch_prompt(features_list: List[dict]) -> str:
+    lines = [compact_event(i, f) for i, f in enumerate(features_list)]
+    return BATCH_INSTRUCTIONS + "\n".join(lines)
+
+
+def parse_batch_response(content: str, count: int) -> List[Optional[Dict[str, Any]]]:
+    """
+    Parse the batched JSON reply into per-event results. Positions that are
+    missing or malformed come back as None so the caller can retry them on
+    the per-event path.
+    """
+    parsed: List[Optional[Dict[str, Any]]] = [None] * count
+    try:
+        data = json.loads(content)
+    except (ValueError, TypeError):
+        return parsed
+
+    results = data.get("results", []) if isinstance(data, dict) else data
+    if not isinstance(results, list):
+        return parsed
+
+    for item in results:
+        if not isinstance(item, dict):
+            continue
+        idx = item.get("index")
+        insight = str(item.get("insight", "")).strip()
+        if not isinstance(idx, int) or not 0 <= idx < count or not insight:
+            continue
+
+        tags = item.get("tags", [])
+        if isinstance(tags, str):
+            tags = tags.split(",")
+        tags = [str(t).strip() for t in tags if str(t).strip()] or ["ai_analysis", "business_insight"]
+
+        parsed[idx] = {
+            "text": insight,
+            "explanation": str(item.get("analysis", "")).strip()
+                           or "Detailed analysis of customer purchasing behavior and opportunities.",
+            "tags": tags,
+        }
+    return parsed
@@ -0,0 +1,212 @@
+# analyzer/bm25_index.py
+import copy
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+
+class _Segment:
+    """Posting lists of a contiguous range of docs: a CSC matrix of their term counts plus each doc's length"""
+    __slots__ = ("offset", "postings", "doc_len")
+
+    def __init__(self, offset: int, postings, doc_len: np.ndarray):
+        self.offset = offset        # global id of the segment's first doc
+        self.postings = postings    # CSC (segment docs x terms), sorted row indices
+        self.doc_len = doc_len      # float32 term count of each doc
+
+    @classmethod
+    def build(cls, offset: int, term_counts) -> "_Segment":
+        postings = term_counts.tocsc()
+        postings.sort_indices()
+        return cls(offset, postings, np.asarray(term_counts.sum(axis=1), dtype=np.float32).ravel())
+
+    @property
+    def n_docs(self) -> int:
+        return self.postings.shape[0]
+
+    def merged(self, later: "_Segment") -> "_Segment":
+        from scipy import sparse
+        postings = sparse.vstack([self.postings, later.postings], format="csc")
+        postings.sort_indices()
+        return _Segment(self.offset, postings, np.concatenate([self.doc_len, later.doc_len]))
+
+
+class BM25Index:
+    """
+    Inverted index over hashed term ids: for each term a posting list of doc
+    ids (ascending) with the term's count in each doc. Top-k uses
+    term-at-a-time max-score: once the remaining terms' upper bounds can no
+    longer lift an unseen doc into the top-k, only docs already in the
+    candidate set are looked up, so a query costs roughly the length of the
+    posting lists it touches rather than the size of the corpus.
+
+    appended() adds docs without touching the existing posting lists: new
+    docs go into a segment of their own, and the last two segments are
+    merged while the earlier one is less than twice the size of the later,
+    so there are O(log n) segments and each posting is copied O(log n)
+    times. IDF, average length and the per-term bounds come from corpus-wide
+    counts kept alongside, and BM25 contributions are computed when a
+    posting list is read, so scores match an index built in one go.
+    """
+
+    def __init__(self, term_counts, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        n_terms = term_counts.shape[1]
+        self.segments: List[_Segment] = []
+        self.n_docs = 0
+        self.total_len = 0
+        self.doc_freq = np.zeros(n_terms, dtype=np.int64)
+        # Largest count and shortest doc per term, for the max-score upper bounds
+        self.max_tf = np.zeros(n_terms, dtype=np.float32)
+        self.min_len = np.full(n_terms, np.inf, dtype=np.float32)
+
+        self.queries = 0
+        self.postings_in_query_terms = 0  # what exhaustive scoring would read
+        self.postings_scored = 0
+        self.merges = 0
+        self._add(term_counts.tocsr())
+
+    def appended(self, term_counts) -> "BM25Index":
+        """A new index with the CSR rows of new docs added after the existing ones; this one is unchanged"""
+        index = copy.copy(self)
+        index.segments = list(self.segments)
+        index.doc_freq, index.max_tf, index.min_len = self.doc_freq.copy(), self.max_tf.copy(), self.min_len.copy()
+        index._add(term_counts)
+        return index
+
+    def _add(self, term_counts):
+        if term_counts.shape[0] == 0:
+            return
+        segment = _Segment.build(self.n_docs, term_counts)
+        postings = segment.postings
+        counts = np.diff(postings.indptr)
+        nonempty = np.flatnonzero(counts)
+        if len(nonempty):
+            starts = postings.indptr[:-1][nonempty]
+            self.max_tf[nonempty] = np.maximum(self.max_tf[nonempty],
+                                               np.maximum.reduceat(postings.data.astype(np.float32), starts))
+            self.min_len[nonempty] = np.minimum(self.min_len[nonempty],
+                                                np.minimum.reduceat(segment.doc_len[postings.indices], starts))
+        self.doc_freq += counts
+        self.n_docs += segment.n_docs
+        self.total_len += int(segment.doc_len.sum(dtype=np.float64))
+
+        self.segments.append(segment)
+        while len(self.segments) > 1 and self.segments[-2].n_docs < 2 * self.segments[-1].n_docs:
+            later = self.segments.pop()
+            self.segments[-1] = self.segments[-1].merged(later)
+            self.merges += 1
+
+    @property
+    def avg_len(self) -> float:
+        return self.total_len / self.n_docs if self.n_docs else 0.0
+
+    def _idf(self, terms: np.ndarray) -> np.ndarray:
+        # Lucene's non-negative BM25 IDF
+        doc_freq = self.doc_freq[terms]
+        return np.log1p((self.n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+    def _impact(self, idf, tf: np.ndarray, doc_len: np.ndarray) -> np.ndarray:
+        norm = self.k1 * (1 - self.b + self.b * doc_len / max(self.avg_len, 1e-9))
+        return idf * tf * (self.k1 + 1) / (tf + norm)
+
+    def _max_impact(self, terms: np.ndarray) -> np.ndarray:
+        """Upper bound of each term's contribution: its largest count in its shortest doc"""
+        bound = np.zeros(len(terms), dtype=np.float32)
+        present = self.doc_freq[terms] > 0
+        terms = terms[present]
+        bound[present] = self._impact(self._idf(terms), self.max_tf[terms], self.min_len[terms])
+        return bound
+
+    def _postings(self, term: int, idf: Optional[np.float32] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Doc ids containing the term, ascending, and their BM25 contributions when idf is given"""
+        ids, impacts = [], []
+        for segment in self.segments:
+            postings = segment.postings
+            start, end = postings.indptr[term], postings.indptr[term + 1]
+            if start == end:
+                continue
+            local = postings.indices[start:end]
+            ids.append(local.astype(np.int32) + np.int32(segment.offset))
+            if idf is not None:
+                impacts.append(self._impact(idf, postings.data[start:end].astype(np.float32), segment.doc_len[local]))
+        if not ids:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32) if idf is not None else None
+        if len(ids) == 1:
+            return ids[0], impacts[0] if idf is not None else None
+        return np.concatenate(ids), np.concatenate(impacts) if idf is not None else None
+
+    @staticmethod
+    def _kth_score(scores: np.ndarray, k: int) -> float:
+        if len(scores) < k:
+            return 0.0
+        return float(np.partition(scores, len(scores) - k)[len(scores) - k])
+
+    def top_k(self, term_ids: np.ndarray, k: int, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Doc ids and BM25 scores of the k best matches, best first; `allowed` is a boolean doc mask"""
+        terms = np.unique(term_ids)
+        max_impact = self._max_impact(terms)
+        terms, max_impact = terms[max_impact > 0], max_impact[max_impact > 0]
+        if len(terms) == 0 or k <= 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        # Highest-impact terms first; remaining[i] bounds what terms i.. can add
+        order = np.argsort(-max_impact, kind="stable")
+        terms, max_impact = terms[order], max_impact[order]
+        remaining = np.concatenate([np.cumsum(max_impact[::-1])[::-1], [0.0]])
+        idf = self._idf(terms)
+
+        cand_ids = np.empty(0, dtype=np.int32)
+        cand_scores = np.empty(0, dtype=np.float32)
+        threshold = 0.0
+        self.queries += 1
+
+        for i, term in enumerate(terms):
+            ids, impacts = self._postings(term, idf[i])
+            self.postings_in_query_terms += len(ids)
+            if allowed is not None:
+                keep = allowed[ids]
+                ids, impacts = ids[keep], impacts[keep]
+                if len(ids) == 0:
+                    continue
+
+            if remaining[i] > threshold or len(cand_ids) < k:
+                # An unseen doc could still make the top-k: merge the whole list
+                merged, inverse = np.unique(np.concatenate([cand_ids, ids]), return_inverse=True)
+                cand_scores = np.bincount(inverse, weights=np.concatenate([cand_scores, impacts]),
+                                          minlength=len(merged)).astype(np.float32)
+                cand_ids = merged.astype(np.int32)
+                self.postings_scored += len(ids)
+            else:
+                # Only existing candidates can still win: look them up in this list
+                pos = np.searchsorted(ids, cand_ids)
+                pos_clipped = np.minimum(pos, len(ids) - 1)
+                hit = (pos < len(ids)) & (ids[pos_clipped] == cand_ids)
+                cand_scores[hit] += impacts[pos_clipped[hit]]
+                self.postings_scored += int(hit.sum())
+
+            threshold = self._kth_score(cand_scores, k)
+            # Drop candidates that can no longer reach the current k-th score
+            keep = cand_scores + remaining[i + 1] >= threshold
+            cand_ids, cand_scores = cand_ids[keep], cand_scores[keep]
+
+        top = np.argsort(-cand_scores, kind="stable")[:k]
+        return cand_ids[top], cand_scores[top]
+
+    def matching_docs(self, term_ids: np.ndarray, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+        """Boolean mask of docs containing any of the terms (and passing `allowed`)"""
+        hits = np.zeros(self.n_docs, dtype=bool)
+        for term in np.unique(term_ids):
+            hits[self._postings(term)[0]] = True
+        return hits & allowed if allowed is not None else hits
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": self.n_docs,
+            "postings": int(sum(s.postings.nnz for s in self.segments)),
+            "segments": len(self.segments),
+            "segment_merges": self.merges,
+            "queries": self.queries,
+            "avg_postings_in_query_terms": round(self.postings_in_query_terms / self.queries, 1) if self.queries else 0.0,
+            "avg_postings_scored": round(self.postings_scored / self.queries, 1) if self.queries else 0.0,
+        }
@@ -1,8 +1,9 @@
 # analyzer/enhanced_llm_analysis.py
-import pandas as pd
-from datetime import datetime
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from .seasonality import BasketFrame, SeasonMatcher
+from .time_buckets import parse_timestamps
 
 class AdvancedPatternAnalyzer:
     def __init__(self):
@@ -12,52 +13,22 @@ class AdvancedPatternAnalyzer:
             'spring': ['gardening', 'cleaning', 'allergy', 'flowers'],
             'fall': ['pumpkin', 'sweater', 'hot drink', 'candle']
         }
+        self.season_matcher = SeasonMatcher(self.seasonal_patterns)
     
-    def detect_product_seasonality(self, events: List[dict]) -> Dict[str, Any]:
-        """Advanced seasonality detection with product categorization"""
-        seasonal_insights = {}
-        
-        for event in events:
-            if event.get("event_type") == "sale":
-                payload = event.get("payload", {})
-                products = payload.get("items", [])
-                season = payload.get("season", "").lower()
-                amount = payload.get("amount", 0)
-                timestamp = event.get("ts", "")
-                
-                if not isinstance(products, list):
-                    products = [products]
-                
-                for product in products:
-                    product_lower = str(product).lower()
-                    
-                    # Detect seasonal patterns
-                    detected_season = self._predict_season(product_lower, season, timestamp)
-                    
-                    if detected_season not in seasonal_insights:
-                        seasonal_insights[detected_season] = {
-                            "products": {},
-                            "total_revenue": 0,
-                            "peak_months": []
-                        }
-                    
-                    if product not in seasonal_insights[detected_season]["products"]:
-                        seasonal_insights[detected_season]["products"][product] = {
-                            "revenue": 0,
-                            "transactions": 0,
-                            "monthly_trend": {}
-                        }
-                    
-                    # Extract month from timestamp for trend analysis
-                    month = self._extract_month(timestamp)
-                    seasonal_insights[detected_season]["products"][product]["revenue"] += amount / len(products)
-                    seasonal_insights[detected_season]["products"][product]["transactions"] += 1
-                    
-                    # Track monthly trends
-                    if month not in seasonal_insights[detected_season]["products"][product]["monthly_trend"]:
-                        seasonal_insights[detected_season]["products"][product]["monthly_trend"][month] = 0
-                    seasonal_insights[detected_season]["products"][product]["monthly_trend"][month] += amount / len(products)
-        
+    def detect_product_seasonality(self, events: List[dict], frame: Optional[BasketFrame] = None) -> Dict[str, Any]:
+        """Advanced seasonality detection with product categorization (pass `frame` to reuse exploded baskets)"""
+        frame = frame if frame is not None else BasketFrame.from_events(events)
+
+        # Detect seasonal patterns: the event's season, else product keywords, else the timestamp
+        names, season_codes = frame.item_seasons(lambda product: self._keyword_season(str(product).lower()),
+                                                 frame.times.seasons())
+
+        # Extract month from timestamp for trend analysis
+        months, month_codes = frame.month_codes(frame.times.month_names("Unknown"), skip_empty=False)
+
+        # Only the top product of each season is reported
+        seasonal_insights = {names[code]: {"products": products}
+                             for code, products in frame.product_trends(season_codes, month_codes, months, top=1).items()}
         return self._generate_seasonal_recommendations(seasonal_insights)
     
     def _predict_season(self, product: str, actual_season: str, timestamp: str) -> str:
@@ -67,40 +38,24 @@ class AdvancedPatternAnalyzer:
             return actual_season
         
         # Otherwise predict based on product name and timestamp
-        for season, keywords in self.seasonal_patterns.items():
-            if any(keyword in product for keyword in keywords):
-                return season
+        season = self._keyword_season(product)
+        if season is not None:
+            return season
         
         # Fallback to timestamp-based season detection
         return self._get_season_from_timestamp(timestamp)
     
+    def _keyword_season(self, product: str) -> Optional[str]:
+        """Season of the first seasonal keyword found in a lowercased product name"""
+        return self.season_matcher.match(product)
+    
     def _extract_month(self, timestamp: str) -> str:
         """Extract month from timestamp"""
-        try:
-            if isinstance(timestamp, str):
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                return dt.strftime("%B")
-        except:
-            pass
-        return "Unknown"
+        return parse_timestamps([timestamp]).month_names("Unknown")[0]
     
     def _get_season_from_timestamp(self, timestamp: str) -> str:
         """Determine season from timestamp"""
-        try:
-            if isinstance(timestamp, str):
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                month = dt.month
-                if month in [12, 1, 2]:
-                    return "winter"
-                elif month in [3, 4, 5]:
-                    return "spring"
-                elif month in [6, 7, 8]:
-                    return "summer"
-                elif month in [9, 10, 11]:
-                    return "fall"
-        except:
-            pass
-        return "unknown"
+        return parse_timestamps([timestamp]).seasons()[0]
     
     def _generate_seasonal_recommendations(self, seasonal_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate actionable seasonal recommendations"""
@@ -0,0 +1,230 @@
+# analyzer/facets.py
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+from .time_buckets import parse_timestamps
+
+CATEGORICAL_FACETS = ("store_id", "season", "customer_category", "payment_method")
+RANGE_FILTERS = ("amount_min", "amount_max", "time_from", "time_to")
+
+# Set bits per byte value, for counting bitmap intersections
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def facet_row(event: dict) -> Dict[str, Any]:
+    """Facet values of one sale event, in the shape FacetIndex.build expects"""
+    payload = event.get("payload", {})
+    return {
+        "store_id": event.get("store_id"),
+        "season": payload.get("season"),
+        "customer_category": payload.get("customer_category"),
+        "payment_method": payload.get("payment_method"),
+        "amount": payload.get("amount", 0),
+        "timestamp": event.get("ts"),
+    }
+
+
+def to_epoch_seconds(values: List[Any]) -> np.ndarray:
+    """
+    ISO timestamps as float seconds since the epoch (NaN where missing or
+    unparseable), parsed like the analytics do: offsets are honoured and
+    timestamps without one are taken as UTC.
+    """
+    return parse_timestamps(values).epoch
+
+
+def _filter_time(value: Any) -> float:
+    seconds = to_epoch_seconds([value])[0]
+    if np.isnan(seconds):
+        raise ValueError(f"Invalid time filter '{value}', expected an ISO date or datetime")
+    return seconds
+
+
+def _amounts(rows: List[Dict[str, Any]]) -> np.ndarray:
+    amounts = np.empty(len(rows), dtype=np.float64)
+    for i, row in enumerate(rows):
+        try:
+            amounts[i] = float(row.get("amount") or 0)
+        except (TypeError, ValueError):
+            amounts[i] = np.nan
+    return amounts
+
+
+class _FacetBuffers:
+    """Facet columns with spare capacity at the end, shared by successive FacetIndex versions"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], rows: int):
+        self.arrays = arrays
+        self.rows = rows    # filled so far; only the newest version writes past it
+
+
+class FacetIndex:
+    """
+    Facet columns for every indexed document: a dictionary code per document
+    for each categorical facet plus amount and timestamp arrays. Each value's
+    packed bitmap is computed once and reused, so a filter is a few bitwise
+    ANDs rather than a walk over metadata dicts. Appends write into spare
+    capacity (doubled when full) and carry the bitmaps over, which are then
+    extended over the new documents only.
+    """
+
+    def __init__(self, codes: Dict[str, np.ndarray], values: Dict[str, List[str]],
+                 amount: np.ndarray, timestamp: np.ndarray, _buffers: Optional[_FacetBuffers] = None,
+                 _lookup: Optional[Dict[str, Dict[str, int]]] = None,
+                 _bitmaps: Optional[Dict[tuple, Tuple[int, np.ndarray]]] = None):
+        self.codes = codes          # facet -> int32 code per document (-1 = missing)
+        self.values = values        # facet -> value for each code
+        self.amount = amount
+        self.timestamp = timestamp  # epoch seconds, NaN when unknown
+        self.n_docs = len(amount)
+        self._buffers = _buffers
+        self._lookup = _lookup or {f: {v.lower(): c for c, v in enumerate(vals)} for f, vals in values.items()}
+        # (documents covered, packed bitmap) per (facet, code)
+        self._bitmaps: Dict[tuple, Tuple[int, np.ndarray]] = _bitmaps or {}
+
+    @classmethod
+    def build(cls, rows: List[Dict[str, Any]]) -> "FacetIndex":
+        return cls.empty().append(rows)
+
+    @classmethod
+    def empty(cls) -> "FacetIndex":
+        return cls({f: np.empty(0, dtype=np.int32) for f in CATEGORICAL_FACETS},
+                   {f: [] for f in CATEGORICAL_FACETS},
+                   np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64))
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        return {**self.codes, "amount": self.amount, "timestamp": self.timestamp}
+
+    def append(self, rows: List[Dict[str, Any]]) -> "FacetIndex":
+        """A new FacetIndex with rows added; existing value codes are kept and this one is unchanged"""
+        n, m = self.n_docs, len(rows)
+        new_columns, values, lookups = {}, {}, {}
+        for facet in CATEGORICAL_FACETS:
+            vals, lookup = self.values[facet], self._lookup[facet]
+            new_codes = np.empty(m, dtype=np.int32)
+            for i, row in enumerate(rows):
+                value = row.get(facet)
+                if value is None or value == "":
+                    new_codes[i] = -1
+                    continue
+                key = str(value).lower()
+                if key not in lookup:
+                    if lookup is self._lookup[facet]:
+                        vals, lookup = list(vals), dict(lookup)
+                    lookup[key] = len(vals)
+                    vals.append(str(value))
+                new_codes[i] = lookup[key]
+            new_columns[facet] = new_codes
+            values[facet], lookups[facet] = vals, lookup
+        new_columns["amount"] = _amounts(rows)
+        new_columns["timestamp"] = to_epoch_seconds([r.get("timestamp") for r in rows])
+
+        buffers = self._buffers
+        if buffers is None or buffers.rows != n or len(buffers.arrays["amount"]) < n + m:
+            # First append (e.g. onto memory-mapped snapshot columns), an older version, or full
+            capacity = max(2 * (n + m), 1024)
+            arrays = {}
+            for name, column in self._columns().items():
+                arrays[name] = np.empty(capacity, dtype=column.dtype)
+                arrays[name][:n] = column
+            buffers = _FacetBuffers(arrays, n)
+        for name, column in new_columns.items():
+            buffers.arrays[name][n:n + m] = column
+        buffers.rows = n + m
+        views = {name: arr[:n + m] for name, arr in buffers.arrays.items()}
+        return FacetIndex({f: views[f] for f in CATEGORICAL_FACETS}, values, views["amount"], views["timestamp"],
+                          buffers, lookups, dict(self._bitmaps))
+
+    def _bitmap(self, facet: str, code: int) -> np.ndarray:
+        key = (facet, code)
+        covered, bitmap = self._bitmaps.get(key, (0, None))
+        if bitmap is None or covered != self.n_docs:
+            # Whole bytes already computed are kept; the rest is packed from the codes
+            start = covered // 8 * 8
+            rest = np.packbits(self.codes[facet][start:] == code)
+            bitmap = rest if bitmap is None else np.concatenate([bitmap[:start // 8], rest])
+            self._bitmaps[key] = (self.n_docs, bitmap)
+        return bitmap
+
+    def mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Boolean mask of documents passing every filter, or None when there are
+        no filters. Categorical filters take a value or a list of values (OR);
+        amount_min/max and time_from/to bound the ranges inclusively.
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v is not None and v != [] and v != ""}
+        if not filters:
+            return None
+        unknown = set(filters) - set(CATEGORICAL_FACETS) - set(RANGE_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown filters {sorted(unknown)}, expected {list(CATEGORICAL_FACETS + RANGE_FILTERS)}")
+
+        packed = np.full((self.n_docs + 7) // 8, 0xFF, dtype=np.uint8)
+        for facet in CATEGORICAL_FACETS:
+            if facet not in filters:
+                continue
+            wanted = filters[facet] if isinstance(filters[facet], (list, tuple, set)) else [filters[facet]]
+            either = np.zeros_like(packed)
+            for value in wanted:
+                code = self._lookup[facet].get(str(value).lower())
+                if code is not None:
+                    either |= self._bitmap(facet, code)
+            packed &= either
+        mask = np.unpackbits(packed, count=self.n_docs).astype(bool)
+
+        if "amount_min" in filters:
+            mask &= self.amount >= float(filters["amount_min"])
+        if "amount_max" in filters:
+            mask &= self.amount <= float(filters["amount_max"])
+        if "time_from" in filters:
+            mask &= self.timestamp >= _filter_time(filters["time_from"])
+        if "time_to" in filters:
+            time_to = _filter_time(filters["time_to"])
+            if len(str(filters["time_to"])) == 10:
+                # A bare date includes the whole day
+                mask &= self.timestamp < time_to + 86400
+            else:
+                mask &= self.timestamp <= time_to
+        return mask
+
+    def counts(self, docs: np.ndarray, top: int = 10) -> Dict[str, Dict[str, int]]:
+        """Per-facet value counts over the given documents (ids or a boolean mask), most frequent first"""
+        return self.top_counts(self.tallies(docs), top)
+
+    def tallies(self, docs: np.ndarray, start: int = 0, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Count per value code of each facet over the given documents: ids, or
+        a boolean mask over rows start:end (start a multiple of 8). Small
+        selections are tallied from their codes; large ones by popcounting
+        each value's bitmap ANDed with the selection's bitmap, which costs the
+        same however many docs match. Tallies of disjoint selections add up.
+        """
+        end = self.n_docs if end is None else end
+        ids = start + np.flatnonzero(docs) if docs.dtype == bool else docs
+        packed = None
+        if len(ids) * 32 > end - start:
+            if docs.dtype != bool:
+                docs = np.zeros(end - start, dtype=bool)
+                docs[ids - start] = True
+            packed = np.packbits(docs)
+
+        result = {}
+        for facet in CATEGORICAL_FACETS:
+            if packed is None:
+                codes = self.codes[facet][ids]
+                result[facet] = np.bincount(codes[codes >= 0], minlength=len(self.values[facet]))
+            else:
+                offset = start // 8
+                result[facet] = np.array([POPCOUNT[self._bitmap(facet, code)[offset:offset + len(packed)] & packed].sum()
+                                          for code in range(len(self.values[facet]))], dtype=np.int64)
+        return result
+
+    def top_counts(self, tallies: Dict[str, np.ndarray], top: int = 10) -> Dict[str, Dict[str, int]]:
+        """The `top` most frequent values per facet; tallies may be shorter than this index's value lists"""
+        result = {}
+        for facet in CATEGORICAL_FACETS:
+            tally = np.zeros(len(self.values[facet]), dtype=np.int64)
+            tally[:len(tallies[facet])] = tallies[facet]
+            order = np.argsort(-tally, kind="stable")[:top]
+            result[facet] = {self.values[facet][c]: int(tally[c]) for c in order if tally[c] > 0}
+        return result
@@ -0,0 +1,399 @@
+# analyzer/index_snapshot.py
+import os
+import sys
+import json
+import time
+import shutil
+from collections.abc import Sequence
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from .facets import FacetIndex, CATEGORICAL_FACETS
+
+SNAPSHOT_FORMAT = 2
+LATEST_FILE = "LATEST"
+
+
+class StringColumn(Sequence):
+    """Strings stored as one UTF-8 byte array plus offsets; decoded on access"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.blob[start:end].tobytes().decode("utf-8")
+
+    def __add__(self, other) -> "ChainedColumn":
+        return ChainedColumn(self, list(other))
+
+
+class MetadataColumns(Sequence):
+    """Search result metadata kept column-wise; rows are rebuilt as dicts on access"""
+
+    def __init__(self, event_id: StringColumn, store_id: StringColumn, amount: np.ndarray,
+                 products: StringColumn, timestamp: StringColumn):
+        self.event_id = event_id
+        self.store_id = store_id
+        self.amount = amount
+        self.products = products
+        self.timestamp = timestamp
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return {
+            "event_id": json.loads(self.event_id[i]),
+            "store_id": json.loads(self.store_id[i]),
+            "amount": float(self.amount[i]),
+            "products": json.loads(self.products[i]),
+            "timestamp": json.loads(self.timestamp[i])
+        }
+
+    def __add__(self, other) -> "ChainedColumn":
+        return ChainedColumn(self, list(other))
+
+
+class ChainedColumn(Sequence):
+    """
+    A column (a snapshot column, or the list of a full build) followed by
+    rows appended in memory since. Later versions extend the same tail list
+    and each keeps its own length, so an append copies nothing.
+    """
+
+    def __init__(self, base: Sequence, tail: list, tail_len: Optional[int] = None):
+        self.base = base
+        self.tail = tail
+        self.tail_len = len(tail) if tail_len is None else tail_len
+
+    def __len__(self) -> int:
+        return len(self.base) + self.tail_len
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        n = len(self.base)
+        return self.base[i] if i < n else self.tail[i - n]
+
+    def __add__(self, other) -> "ChainedColumn":
+        # A version that is not the newest gets a tail of its own
+        tail = self.tail if len(self.tail) == self.tail_len else self.tail[:self.tail_len]
+        tail.extend(other)
+        return ChainedColumn(self.base, tail, len(tail))
+
+
+class _GrowingCSR:
+    """
+    Rows appended to a CSR matrix, in arrays with spare capacity that double
+    when full. Rows are only ever written past the current end, so views of
+    earlier lengths stay valid while later rows are added.
+    """
+
+    def __init__(self, n_cols: int, dtype, index_dtype):
+        self.n_cols = n_cols
+        self.rows = 0
+        self.data = np.empty(0, dtype=dtype)
+        self.indices = np.empty(0, dtype=index_dtype)
+        self.indptr = np.zeros(1, dtype=np.int64)
+
+    @staticmethod
+    def _reserve(arr: np.ndarray, used: int, needed: int) -> np.ndarray:
+        if needed <= len(arr):
+            return arr
+        grown = np.empty(max(needed, 2 * len(arr), 1024), dtype=arr.dtype)
+        grown[:used] = arr[:used]
+        return grown
+
+    def append(self, rows):
+        nnz, m = int(self.indptr[self.rows]), rows.shape[0]
+        self.data = self._reserve(self.data, nnz, nnz + rows.nnz)
+        self.indices = self._reserve(self.indices, nnz, nnz + rows.nnz)
+        self.indptr = self._reserve(self.indptr, self.rows + 1, self.rows + m + 1)
+        self.data[nnz:nnz + rows.nnz] = rows.data
+        self.indices[nnz:nnz + rows.nnz] = rows.indices
+        self.indptr[self.rows + 1:self.rows + m + 1] = rows.indptr[1:] + nnz
+        self.rows += m
+
+    def view(self, n_rows: int):
+        """The first n_rows rows as a CSR matrix sharing these arrays"""
+        from scipy import sparse
+        nnz = int(self.indptr[n_rows])
+        matrix = sparse.csr_matrix((n_rows, self.n_cols), dtype=self.data.dtype)
+        # Assigned rather than passed in: the constructor copies slices of larger arrays
+        matrix.data, matrix.indices, matrix.indptr = self.data[:nnz], self.indices[:nnz], self.indptr[:n_rows + 1]
+        return matrix
+
+
+class ChainedRows:
+    """
+    A CSR matrix (a memory-mapped snapshot matrix, or the matrix of a full
+    build) followed by rows appended since. The base is never written or
+    copied; appended rows go to a growing tail shared by later versions, so
+    an append costs the size of the new rows, not of the index. Supports the
+    operations the search backends use: products, row selection and slicing.
+    """
+
+    def __init__(self, base, tail: Optional[_GrowingCSR] = None, tail_rows: int = 0):
+        self.base = base
+        self._tail = tail
+        self.tail_rows = tail_rows
+
+    @property
+    def shape(self):
+        return (self.base.shape[0] + self.tail_rows, self.base.shape[1])
+
+    @property
+    def dtype(self):
+        return self.base.dtype
+
+    @property
+    def nnz(self) -> int:
+        return self.base.nnz + (int(self._tail.indptr[self.tail_rows]) if self.tail_rows else 0)
+
+    @property
+    def tail(self):
+        """Rows appended since the base, as a CSR matrix"""
+        if self._tail is None:
+            return self.base[:0]
+        return self._tail.view(self.tail_rows)
+
+    def append(self, rows) -> "ChainedRows":
+        """A new version with CSR rows added; this one is unchanged"""
+        tail = self._tail
+        if tail is None or tail.rows != self.tail_rows:
+            # First append, or a version that is not the newest
+            tail = _GrowingCSR(self.shape[1], self.dtype, self.base.indices.dtype)
+            if self.tail_rows:
+                tail.append(self.tail)
+        tail.append(rows)
+        return ChainedRows(self.base, tail, tail.rows)
+
+    def block(self, start: int, end: int):
+        """Rows start:end as a CSR matrix, a view unless the range spans base and tail"""
+        from scipy import sparse
+        from .sharded_search import row_block
+        n = self.base.shape[0]
+        if end <= n:
+            return row_block(self.base, start, end)
+        if start >= n:
+            return row_block(self._tail.view(end - n), start - n, end - n)
+        return sparse.vstack([row_block(self.base, start, n), self._tail.view(end - n)], format="csr")
+
+    def tocsr(self, copy: bool = False):
+        """The whole matrix as one CSR (a full copy once rows were appended)"""
+        from scipy import sparse
+        if not self.tail_rows:
+            return self.base.copy() if copy else self.base
+        return sparse.vstack([self.base, self.tail], format="csr")
+
+    def __getitem__(self, key):
+        from scipy import sparse
+        if isinstance(key, tuple):
+            rows, columns = key
+            return self[rows][:, columns]
+        if isinstance(key, slice):
+            start, end, step = key.indices(self.shape[0])
+            if step == 1:
+                return self.block(start, max(start, end))
+            key = np.arange(start, end, step)
+        rows = np.asarray(key)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        n = self.base.shape[0]
+        in_base = rows < n
+        if in_base.all():
+            return self.base[rows]
+        if not in_base.any():
+            return self.tail[rows - n]
+        picked = sparse.vstack([self.base[rows[in_base]], self.tail[rows[~in_base] - n]], format="csr")
+        if np.all(np.diff(rows) >= 0):
+            return picked
+        # Back to the requested order
+        positions = np.concatenate([np.flatnonzero(in_base), np.flatnonzero(~in_base)])
+        return picked[np.argsort(positions)]
+
+    def __matmul__(self, other):
+        from scipy import sparse
+        if not self.tail_rows:
+            return self.base @ other
+        head, tail = self.base @ other, self.tail @ other
+        if sparse.issparse(head):
+            return sparse.vstack([head, tail], format=head.format)
+        return np.concatenate([head, tail])
+
+
+def _pack_strings(values) -> Dict[str, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return {"blob": np.frombuffer(b"".join(encoded), dtype=np.uint8), "offsets": offsets}
+
+
+def _save_arrays(path: str, prefix: str, arrays: Dict[str, np.ndarray]):
+    for name, arr in arrays.items():
+        np.save(os.path.join(path, f"{prefix}.{name}.npy"), np.ascontiguousarray(arr))
+
+
+def _load_arrays(path: str, prefix: str, names: List[str], mmap: bool) -> List[np.ndarray]:
+    mode = "r" if mmap else None
+    return [np.load(os.path.join(path, f"{prefix}.{name}.npy"), mmap_mode=mode) for name in names]
+
+
+def save_snapshot(root: str, index, n_features: int, extra: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Write one index version to <root>/<name>/ as .npy arrays plus a manifest,
+    then point <root>/LATEST at it. The directory is renamed into place, so a
+    concurrent reader never sees a half-written snapshot.
+    """
+    os.makedirs(root, exist_ok=True)
+    name = f"snapshot-{int(time.time() * 1000)}-v{index.version}"
+    tmp = os.path.join(root, f".{name}.tmp")
+    os.makedirs(tmp)
+
+    for prefix, matrix in (("term_counts", index.term_counts.tocsr()), ("doc_matrix", index.doc_matrix.tocsr())):
+        _save_arrays(tmp, prefix, {"data": matrix.data, "indices": matrix.indices, "indptr": matrix.indptr})
+    _save_arrays(tmp, "doc_freq", {"values": index.doc_freq})
+    _save_arrays(tmp, "idf", {"values": index.idf})
+    _save_arrays(tmp, "documents", _pack_strings(index.documents))
+
+    metadata = index.metadata
+    _save_arrays(tmp, "amount", {"values": np.array([float(m.get("amount") or 0) for m in metadata], dtype=np.float64)})
+    for column in ("event_id", "store_id", "products", "timestamp"):
+        _save_arrays(tmp, column, _pack_strings(json.dumps(m.get(column)) for m in metadata))
+
+    facets = index.facets
+    _save_arrays(tmp, "facets", {**{f"{facet}_codes": facets.codes[facet] for facet in CATEGORICAL_FACETS},
+                                 "amount": facets.amount, "timestamp": facets.timestamp})
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": index.version,
+        "documents": len(index.documents),
+        "n_features": n_features,
+        "docs_at_rebase": index.docs_at_rebase,
+        "facet_values": facets.values,
+        "created_at": time.time(),
+        **(extra or {})
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+    os.replace(tmp, os.path.join(root, name))
+    latest_tmp = os.path.join(root, f".{LATEST_FILE}.{os.getpid()}")
+    with open(latest_tmp, "w") as f:
+        f.write(name)
+    os.replace(latest_tmp, os.path.join(root, LATEST_FILE))
+    return name
+
+
+def prune_snapshots(root: str, keep: int = 2):
+    """Delete all but the newest `keep` snapshots (workers still mapping one keep their pages)"""
+    names = sorted((n for n in os.listdir(root) if n.startswith("snapshot-")),
+                   key=lambda n: int(n.split("-")[1]))
+    for name in names[:-keep] if keep > 0 else names:
+        try:
+            shutil.rmtree(os.path.join(root, name))
+        except OSError as e:
+            # Windows refuses to delete files another process has mapped
+            print(f"⚠️ Could not remove old index snapshot {name}: {e}")
+
+
+def latest_snapshot(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, LATEST_FILE)) as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    return name if os.path.isdir(os.path.join(root, name)) else None
+
+
+def read_manifest(root: str, name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """The manifest of a snapshot (the LATEST one by default) with its name, without mapping any arrays"""
+    name = name or latest_snapshot(root)
+    if name is None:
+        return None
+    with open(os.path.join(root, name, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        print(f"⚠️ Ignoring index snapshot {name}: unsupported format {manifest.get('format')}")
+        return None
+    return dict(manifest, name=name)
+
+
+def load_snapshot(root: str, name: Optional[str] = None, mmap: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Load a snapshot (the LATEST one by default). With mmap the arrays are
+    read-only memory maps, so analyzer workers on one host share the page
+    cache copy of the index instead of each holding their own.
+    """
+    from scipy import sparse
+
+    manifest = read_manifest(root, name)
+    if manifest is None:
+        return None
+    name = manifest.pop("name")
+    path = os.path.join(root, name)
+
+    shape = (manifest["documents"], manifest["n_features"])
+    matrices = {}
+    for prefix in ("term_counts", "doc_matrix"):
+        data, indices, indptr = _load_arrays(path, prefix, ["data", "indices", "indptr"], mmap)
+        matrices[prefix] = sparse.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+
+    def strings(prefix: str) -> StringColumn:
+        return StringColumn(*_load_arrays(path, prefix, ["blob", "offsets"], mmap))
+
+    facet_arrays = _load_arrays(path, "facets", [f"{facet}_codes" for facet in CATEGORICAL_FACETS]
+                                + ["amount", "timestamp"], mmap)
+    facets = FacetIndex(dict(zip(CATEGORICAL_FACETS, facet_arrays)), manifest["facet_values"],
+                        facet_arrays[-2], facet_arrays[-1])
+
+    return {
+        "name": name,
+        "manifest": manifest,
+        "term_counts": matrices["term_counts"],
+        "doc_matrix": matrices["doc_matrix"],
+        "doc_freq": _load_arrays(path, "doc_freq", ["values"], mmap)[0],
+        "idf": _load_arrays(path, "idf", ["values"], mmap)[0],
+        "documents": strings("documents"),
+        "metadata": MetadataColumns(strings("event_id"), strings("store_id"),
+                                    _load_arrays(path, "amount", ["values"], mmap)[0],
+                                    strings("products"), strings("timestamp")),
+        "facets": facets,
+    }
+
+
+def process_memory_mb() -> Dict[str, Optional[float]]:
+    """Resident and shared (file-backed) memory of this process, where the OS exposes it"""
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = (int(x) for x in f.read().split()[:3])
+        page = os.sysconf("SC_PAGE_SIZE")
+        return {"rss_mb": round(resident * page / 1e6, 1), "shared_mb": round(shared * page / 1e6, 1)}
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS; reported in bytes on macOS, kilobytes elsewhere
+        scale = 1e6 if sys.platform == "darwin" else 1e3
+        return {"rss_mb": None, "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)}
+    except ImportError:
+        return {"rss_mb": None}
@@ -0,0 +1,201 @@
+# analyzer/llm_cache.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def feature_signature(features: dict, amount_bucket: float = 10.0) -> str:
+    """
+    Normalized, order-independent key for a transaction profile. Store and
+    customer identity are left out on purpose: two sales with the same
+    profile get the same insight. Amounts are bucketed so $41.10 and $43.90
+    share an entry.
+    """
+    items = features.get("items", [])
+    if not isinstance(items, list):
+        items = [items]
+    amount = float(features.get("amount", 0) or 0)
+
+    profile = {
+        "event_type": str(features.get("event_type", "")).lower(),
+        "store_type": str(features.get("store_type", "")).strip().lower(),
+        "customer_category": str(features.get("customer_category", "")).strip().lower(),
+        "payment_method": str(features.get("payment_method", "")).strip().lower(),
+        "season": str(features.get("season", "")).strip().lower(),
+        "promotion": str(features.get("promotion", "")).strip().lower(),
+        "discount": bool(features.get("discount_applied", False)),
+        "basket": sorted(str(i).strip().lower() for i in items),
+        "amount_bucket": int(amount // amount_bucket) if amount_bucket > 0 else amount,
+    }
+    raw = json.dumps(profile, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class LLMInsightCache:
+    """
+    Two-tier cache of LLM insights: an in-memory LRU in front of a SQLite
+    file that survives restarts. Entries expire after ttl_seconds and both
+    tiers are capped in size (oldest entries are dropped first). Lookups and
+    writes take a whole batch at once (one query, one commit); they block,
+    so async callers run them in an executor.
+    """
+
+    # Signatures per SELECT/DELETE, under SQLite's bound-parameter limit
+    BATCH_PARAMS = 500
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600,
+                 memory_size: int = 2000, disk_size: int = 50000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_trim = 0
+        self._disk_entries = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+
+        self._db = None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS insights ("
+                "signature TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_insights_created ON insights(created_at)")
+            self._db.commit()
+            # Counted once here, then kept up to date by the writes
+            (self._disk_entries,) = self._db.execute("SELECT COUNT(*) FROM insights").fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM cache disk tier unavailable ({path}): {e} - using memory only")
+            self._db = None
+
+    def _expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, signature: str, value: dict, created_at: float):
+        self._memory[signature] = (value, created_at)
+        self._memory.move_to_end(signature)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, signature: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([signature])[0]
+
+    def get_many(self, signatures: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Cached value per signature (None for a miss), the disk tier read with one query per chunk"""
+        found: List[Optional[Dict[str, Any]]] = [None] * len(signatures)
+        with self._lock:
+            on_disk: Dict[str, List[int]] = {}
+            for i, signature in enumerate(signatures):
+                entry = self._memory.get(signature)
+                if entry is not None:
+                    value, created_at = entry
+                    if not self._expired(created_at):
+                        self._memory.move_to_end(signature)
+                        self.memory_hits += 1
+                        self.saved_tokens += value.get("tokens", 0)
+                        found[i] = value
+                        continue
+                    del self._memory[signature]
+                on_disk.setdefault(signature, []).append(i)
+
+            if self._db is not None and on_disk:
+                expired = []
+                wanted = list(on_disk)
+                for start in range(0, len(wanted), self.BATCH_PARAMS):
+                    chunk = wanted[start:start + self.BATCH_PARAMS]
+                    rows = self._db.execute(
+                        f"SELECT signature, value, created_at FROM insights "
+                        f"WHERE signature IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    for signature, raw, created_at in rows:
+                        if self._expired(created_at):
+                            expired.append(signature)
+                            continue
+                        value = json.loads(raw)
+                        self._remember(signature, value, created_at)
+                        for i in on_disk[signature]:
+                            found[i] = value
+                            self.disk_hits += 1
+                            self.saved_tokens += value.get("tokens", 0)
+                if expired:
+                    for start in range(0, len(expired), self.BATCH_PARAMS):
+                        chunk = expired[start:start + self.BATCH_PARAMS]
+                        self._disk_entries -= self._db.execute(
+                            f"DELETE FROM insights WHERE signature IN ({','.join('?' * len(chunk))})", chunk
+                        ).rowcount
+                    self._db.commit()
+
+            self.misses += sum(1 for value in found if value is None)
+        return found
+
+    def put(self, signature: str, value: Dict[str, Any]):
+        self.put_many([(signature, value)])
+
+    def put_many(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        """Store (signature, value) pairs, committed to disk together"""
+        if not entries:
+            return
+        created_at = time.time()
+        with self._lock:
+            for signature, value in entries:
+                self._remember(signature, value, created_at)
+            if self._db is None:
+                return
+            rows = [(signature, json.dumps(value), created_at) for signature, value in entries]
+            # New signatures are inserted and counted; the rest (rare: a concurrent batch got there first) updated
+            inserted = self._db.executemany(
+                "INSERT OR IGNORE INTO insights (signature, value, created_at) VALUES (?, ?, ?)", rows
+            ).rowcount
+            self._disk_entries += inserted
+            if inserted < len(rows):
+                self._db.executemany(
+                    "UPDATE insights SET value = ?, created_at = ? WHERE signature = ?",
+                    [(raw, created, signature) for signature, raw, created in rows]
+                )
+            self._puts_since_trim += len(rows)
+            # Trimming needs a COUNT(*); amortize it over a batch of writes
+            if self._puts_since_trim >= 100:
+                self._trim_disk()
+            self._db.commit()
+
+    def _trim_disk(self):
+        self._puts_since_trim = 0
+        self._disk_entries = 0
+        self._db.execute("DELETE FROM insights WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM insights").fetchone()
+        if count > self.disk_size:
+            self._db.execute(
+                "DELETE FROM insights WHERE signature IN "
+                "(SELECT signature FROM insights ORDER BY created_at LIMIT ?)",
+                (count - self.disk_size,)
+            )
+            count = self.disk_size
+        self._disk_entries = count
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+            "ttl_seconds": self.ttl_seconds,
+            "path": self.path if self._db is not None else None,
+        }
@@ -0,0 +1,165 @@
+# analyzer/llm_client.py
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from .batch_prompts import estimate_tokens
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at per_minute / 60 per second"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, factor: float):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate * factor)
+        self.updated = now
+
+    def wait_time(self, amount: float, factor: float = 1.0) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)"""
+        self._refill(factor)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / (self.rate * factor)
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class AdaptiveRateLimiter:
+    """
+    Requests/min and tokens/min buckets matching the provider quota. A 429
+    halves the effective refill rate and pauses everyone until retry-after;
+    each success then creeps the rate back up towards the full quota.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, min_factor: float = 0.1):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.factor = 1.0
+        self.min_factor = min_factor
+        self.blocked_until = 0.0
+        self.rate_limited = 0
+        self.granted = 0
+        self.waited_seconds = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, estimated_tokens: int):
+        # The lock makes waiters queue FIFO instead of racing for refills
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = max(
+                    self.blocked_until - now,
+                    self.requests.wait_time(1, self.factor),
+                    self.tokens.wait_time(estimated_tokens, self.factor),
+                )
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(estimated_tokens)
+                    self.granted += 1
+                    return
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+
+    def on_success(self, token_correction: int = 0):
+        # Charge (or refund) the difference between estimated and actual usage
+        self.tokens.tokens -= token_correction
+        self.factor = min(1.0, self.factor + 0.05)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        self.rate_limited += 1
+        self.factor = max(self.min_factor, self.factor * 0.5)
+        pause = retry_after if retry_after is not None else 2.0 / self.factor
+        self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+        print(f"   🐢 LLM rate limited - pausing {pause:.1f}s, rate factor now {self.factor:.2f}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity,
+            "rate_factor": round(self.factor, 2),
+            "granted": self.granted,
+            "rate_limited": self.rate_limited,
+            "waited_seconds": round(self.waited_seconds, 2),
+        }
+
+
+def _is_rate_limit(ex: Exception) -> bool:
+    return getattr(ex, "status_code", None) == 429 or type(ex).__name__ == "RateLimitError"
+
+
+def _retry_after(ex: Exception) -> Optional[float]:
+    response = getattr(ex, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncLLMClient:
+    """
+    One long-lived async Groq client shared by every request. Concurrency is
+    bounded by max_concurrency, request rate by the adaptive limiter, so
+    throughput follows the provider quota instead of a thread count.
+    """
+
+    def __init__(self, api_key: Optional[str], model: str = "llama-3.1-8b-instant",
+                 max_concurrency: int = 16, requests_per_minute: float = 30,
+                 tokens_per_minute: float = 6000, max_retries: int = 3):
+        self.api_key = api_key
+        self.model = model
+        self.max_retries = max_retries
+        self.limiter = AdaptiveRateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = None
+        self.in_flight = 0
+
+    def _get_client(self):
+        if self._client is None:
+            if not self.api_key:
+                raise Exception("❌ GROQ_API_KEY environment variable not set")
+            from groq import AsyncGroq
+            # Retries are handled here so 429s feed the limiter
+            self._client = AsyncGroq(api_key=self.api_key, max_retries=0)
+        return self._client
+
+    async def complete(self, messages: List[dict], max_tokens: int, **kwargs):
+        client = self._get_client()
+        estimated = sum(estimate_tokens(m.get("content", "")) for m in messages) + max_tokens
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(estimated)
+            async with self._semaphore:
+                self.in_flight += 1
+                try:
+                    completion = await client.chat.completions.create(
+                        model=self.model, messages=messages, max_tokens=max_tokens, **kwargs
+                    )
+                except Exception as ex:
+                    if _is_rate_limit(ex) and attempt < self.max_retries:
+                        self.limiter.on_rate_limited(_retry_after(ex))
+                        continue
+                    raise
+                finally:
+                    self.in_flight -= 1
+
+            used = completion.usage.total_tokens if getattr(completion, "usage", None) else estimated
+            self.limiter.on_success(used - estimated)
+            return completion
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            **self.limiter.stats(),
+        }
@@ -0,0 +1,118 @@
+# analyzer/lsa_index.py
+from typing import Dict, Any, Optional
+import numpy as np
+
+
+class LSAIndex:
+    """
+    Latent semantic index: a truncated SVD of the TF-IDF matrix restricted
+    to the terms that occur, with every document reduced to an L2-normalized
+    float32 vector (or int8 plus a per-row scale). Queries are projected the
+    same way and scored with a blocked dense matrix-vector product, so the
+    temporaries of the int8 -> float32 upcast stay bounded.
+
+    Components are fitted offline; documents appended later are folded in
+    with the existing components until the next fit.
+    """
+
+    def __init__(self, components: np.ndarray, columns: np.ndarray, vectors: np.ndarray,
+                 scales: Optional[np.ndarray], version: int, weights_version: int,
+                 block_rows: int = 65536, explained_variance: float = 0.0):
+        self.components = components          # (k, len(columns)) float32
+        self.columns = columns                # hashed term ids the SVD was fitted on
+        self.vectors = vectors                # (n_docs, k) float32, or int8 when quantized
+        self.scales = scales                  # per-row dequantization scale, None for float32
+        self.version = version
+        self.weights_version = weights_version
+        self.block_rows = block_rows
+        self.explained_variance = explained_variance
+
+    @property
+    def quantized(self) -> bool:
+        return self.scales is not None
+
+    @classmethod
+    def fit(cls, doc_matrix, doc_freq: np.ndarray, version: int, weights_version: int,
+            n_components: int = 64, quantize: bool = False, fit_sample: int = 200000,
+            block_rows: int = 65536, seed: int = 42) -> "LSAIndex":
+        from sklearn.decomposition import TruncatedSVD
+
+        columns = np.flatnonzero(doc_freq > 0).astype(np.int32)
+        n_components = max(1, min(n_components, len(columns) - 1))
+        sample = doc_matrix
+        if doc_matrix.shape[0] > fit_sample:
+            rows = np.random.default_rng(seed).choice(doc_matrix.shape[0], fit_sample, replace=False)
+            sample = doc_matrix[np.sort(rows)]
+
+        svd = TruncatedSVD(n_components=n_components, algorithm="randomized", random_state=seed)
+        svd.fit(sample[:, columns])
+        lsa = cls(svd.components_.astype(np.float32), columns, np.empty((0, n_components), dtype=np.float32),
+                  None, version, weights_version, block_rows, float(svd.explained_variance_ratio_.sum()))
+        vectors = lsa.project(doc_matrix)
+        lsa.vectors, lsa.scales = cls._quantize(vectors) if quantize else (vectors, None)
+        return lsa
+
+    def project(self, matrix) -> np.ndarray:
+        """Rows of a TF-IDF matrix as L2-normalized float32 LSA vectors"""
+        out = np.empty((matrix.shape[0], self.components.shape[0]), dtype=np.float32)
+        for start in range(0, matrix.shape[0], self.block_rows):
+            block = matrix[start:start + self.block_rows][:, self.columns]
+            out[start:start + self.block_rows] = block @ self.components.T
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    @staticmethod
+    def _quantize(vectors: np.ndarray):
+        """Symmetric per-row int8: v ~= q * scale"""
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        q = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return q, scales.astype(np.float32)
+
+    def updated(self, doc_matrix, version: int, weights_version: int, fold_in: bool = True) -> "LSAIndex":
+        """
+        LSA vectors for a newer index version with the same components: new
+        rows are folded in, or everything is re-projected when the existing
+        rows changed (an IDF rebase re-weights every TF-IDF row).
+        """
+        if fold_in:
+            new = self.project(doc_matrix[len(self.vectors):])
+            if self.quantized:
+                q, s = self._quantize(new)
+                vectors, scales = np.vstack([self.vectors, q]), np.concatenate([self.scales, s])
+            else:
+                vectors, scales = np.vstack([self.vectors, new]), None
+        else:
+            vectors = self.project(doc_matrix)
+            vectors, scales = self._quantize(vectors) if self.quantized else (vectors, None)
+        return LSAIndex(self.components, self.columns, vectors, scales, version, weights_version,
+                        self.block_rows, self.explained_variance)
+
+    def score(self, query_vec, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity in LSA space of one TF-IDF query row against every doc, or just `rows`"""
+        q = self.project(query_vec)[0]
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        scales = self.scales if rows is None or self.scales is None else self.scales[rows]
+
+        scores = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), self.block_rows):
+            end = start + self.block_rows
+            block = vectors[start:end]
+            if scales is None:
+                scores[start:end] = block @ q
+            else:
+                scores[start:end] = (block.astype(np.float32) @ q) * scales[start:end]
+        return scores
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+        return {
+            "version": self.version,
+            "components": int(self.components.shape[0]),
+            "terms": int(len(self.columns)),
+            "explained_variance": round(self.explained_variance, 4),
+            "quantized": self.quantized,
+            "documents": int(len(self.vectors)),
+            "vector_memory_mb": round(memory / 1e6, 1),
+        }
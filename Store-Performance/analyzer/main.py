@@ -1,19 +1,33 @@
 # analyzer/main.py
-import os, uuid, json
-from typing import List, Dict, Any
-from fastapi import FastAPI, HTTPException
+from .startup import StartupTracker
+
+# Created before anything heavy is imported so startup phases are measured from here
+startup = StartupTracker()
+startup.begin("imports")
+
+import os, uuid, json, time
+from typing import List, Dict, Any, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
 import uvicorn
 from dotenv import load_dotenv
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
-import requests
 
 
-from .advanced_analysis import AdvancedPatternAnalyzer
-from .enhanced_llm_analysis import AdvancedPatternAnalyzer as EnhancedPatternAnalyzer
-from .retrieval_system import SemanticSearchEngine
+from .analysis_pool import AnalysisPool
+from .retrieval_system import SemanticSearchEngine, SEARCH_BACKENDS
+from common.models import SearchBatchRequest
+from .index_snapshot import prune_snapshots, process_memory_mb, read_manifest
+from .suggest_index import SuggestIndex
+from .market_basket import StreamingMarketBasket, cross_selling_opportunity
+from .seasonality import BasketFrame
+from .time_buckets import parse_timestamps, timestamp_parser
+from .batch_prompts import (
+    build_batch_prompt, chunk_by_token_budget, parse_batch_response, RESPONSE_TOKENS_PER_EVENT
+)
+from .llm_cache import LLMInsightCache, feature_signature
+from .llm_client import AsyncLLMClient
 
 load_dotenv()
 
@@ -36,26 +50,104 @@ print(f"🔧 DEBUG - Environment Variables:")
 print(f"   USE_LLM: {USE_LLM}")
 print(f"   GROQ_API_KEY: {'***' + GROQ_API_KEY[-4:] if GROQ_API_KEY else 'NOT SET'}")
 
-# ThreadPool for parallel LLM calls
-executor = ThreadPoolExecutor(max_workers=5)
+# Single long-lived async LLM client; concurrency and rate follow the provider quota
+llm_client = AsyncLLMClient(
+    api_key=GROQ_API_KEY,
+    max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", 16)),
+    requests_per_minute=float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 30)),
+    tokens_per_minute=float(os.environ.get("LLM_TOKENS_PER_MINUTE", 6000)),
+)
+
+# Batched mode packs several events into one structured-JSON completion
+LLM_BATCH_MODE = os.environ.get("LLM_BATCH_MODE", "true").lower() == "true"
+LLM_BATCH_TOKEN_BUDGET = int(os.environ.get("LLM_BATCH_TOKEN_BUDGET", 4000))
+LLM_BATCH_MAX_EVENTS = int(os.environ.get("LLM_BATCH_MAX_EVENTS", 10))
+
+# Throughput counters for the per-event and batched LLM paths
+LLM_STATS = {
+    mode: {"calls": 0, "insights": 0, "tokens": 0, "seconds": 0.0}
+    for mode in ("per_event", "batched")
+}
 
+# Insights for transactions with the same normalized profile are reused across restarts
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_AMOUNT_BUCKET = float(os.environ.get("LLM_CACHE_AMOUNT_BUCKET", 10))
+llm_cache = LLMInsightCache(
+    path=os.environ.get("LLM_CACHE_PATH", ".cache/llm_insights.sqlite3"),
+    ttl_seconds=float(os.environ.get("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+    memory_size=int(os.environ.get("LLM_CACHE_MEMORY_SIZE", 2000)),
+    disk_size=int(os.environ.get("LLM_CACHE_DISK_SIZE", 50000)),
+) if LLM_CACHE_ENABLED else None
 
-search_engine = SemanticSearchEngine()
-pattern_analyzer = AdvancedPatternAnalyzer()
-enhanced_analyzer = EnhancedPatternAnalyzer()
+def record_llm_stats(mode: str, insights: int, tokens: int, seconds: float):
+    stats = LLM_STATS[mode]
+    stats["calls"] += 1
+    stats["insights"] += insights
+    stats["tokens"] += tokens
+    stats["seconds"] += seconds
+
+def llm_stats_summary() -> Dict[str, Any]:
+    summary = {}
+    for mode, stats in LLM_STATS.items():
+        summary[mode] = {
+            **stats,
+            "seconds": round(stats["seconds"], 2),
+            "tokens_per_insight": round(stats["tokens"] / stats["insights"], 1) if stats["insights"] else 0.0,
+            "insights_per_sec": round(stats["insights"] / stats["seconds"], 2) if stats["seconds"] else 0.0
+        }
+    return summary
 
-def test_groq_connection():
+
+search_engine = SemanticSearchEngine(
+    rebase_fraction=float(os.environ.get("INDEX_IDF_REBASE_FRACTION", 0.2)),
+    # Repeated /semantic-search and /chat queries are answered from this LRU (0 disables)
+    result_cache_size=int(os.environ.get("QUERY_CACHE_SIZE", 1024))
+)
+# /suggest typeahead over products, stores and categories, fed by the same events as the search index
+suggest_index = SuggestIndex()
+# Pair counts tracked for /cross-selling; less frequent pairs are pruned into a sketch beyond this
+CROSS_SELLING_MAX_PAIRS = int(os.environ.get("CROSS_SELLING_MAX_PAIRS", 50000))
+# /cross-selling counts over every ingested event, fed alongside the search index
+basket_stream = StreamingMarketBasket(CROSS_SELLING_MAX_PAIRS)
+# Default /semantic-search backend; callers can override per request
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "tfidf").lower()
+# Upper bound on queries per /semantic-search/batch call
+SEARCH_BATCH_MAX_QUERIES = int(os.environ.get("SEARCH_BATCH_MAX_QUERIES", 200))
+# Worker processes scoring tfidf queries over shards of the index snapshot (0 = in-process)
+SEARCH_SHARDS = int(os.environ.get("SEARCH_SHARDS", 0))
+# Dense LSA backend: fitted after the index warm-up when enabled
+LSA_ENABLED = os.environ.get("LSA_ENABLED", "false").lower() == "true"
+LSA_COMPONENTS = int(os.environ.get("LSA_COMPONENTS", 64))
+LSA_QUANTIZE = os.environ.get("LSA_QUANTIZE", "false").lower() == "true"
+LSA_FIT_SAMPLE = int(os.environ.get("LSA_FIT_SAMPLE", 200000))
+# Seconds between polls of the Collector for newly ingested events (0 disables)
+INDEX_REFRESH_SECONDS = float(os.environ.get("INDEX_REFRESH_SECONDS", 5))
+# Collector events ingested so far: their number and the event_id of the last one
+collector_offset = 0
+collector_last_event_id: Optional[str] = None
+# Index snapshots shared by analyzer workers on one host (empty disables)
+INDEX_SNAPSHOT_DIR = os.environ.get("INDEX_SNAPSHOT_DIR", ".cache/search_index")
+INDEX_SNAPSHOT_MIN_NEW_DOCS = int(os.environ.get("INDEX_SNAPSHOT_MIN_NEW_DOCS", 10000))
+INDEX_SNAPSHOT_KEEP = int(os.environ.get("INDEX_SNAPSHOT_KEEP", 2))
+index_snapshot_info: Dict[str, Any] = {"enabled": bool(INDEX_SNAPSHOT_DIR)}
+# Worker processes for /analyze's seasonality and cross-selling (0 = a thread of this process)
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", 1))
+# Batches queued or running in them; advanced analysis is skipped for batches beyond this
+ANALYSIS_QUEUE_SIZE = int(os.environ.get("ANALYSIS_QUEUE_SIZE", 8))
+analysis_pool = AnalysisPool(ANALYSIS_WORKERS, ANALYSIS_QUEUE_SIZE)
+
+# Filled in by the background probe started on startup; None means not probed yet
+groq_working: Optional[bool] = None
+groq_message = "Groq probe pending"
+
+async def test_groq_connection():
     """Test if we can connect to Groq API"""
     try:
         if not GROQ_API_KEY:
             return False, "GROQ_API_KEY not set in environment"
             
-        from groq import Groq
-        client = Groq(api_key=GROQ_API_KEY)
-        
         # Test with a simple completion
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        await llm_client.complete(
             messages=[{"role": "user", "content": "Say 'Hello World'"}],
             max_tokens=10,
             timeout=10
@@ -68,10 +160,14 @@ def test_groq_connection():
     except Exception as e:
         return False, f"Groq API error: {str(e)}"
 
-# Test connection on startup
-print("🧪 Testing Groq API connection...")
-groq_working, groq_message = test_groq_connection()
-print(f"   Groq Status: {groq_working} - {groq_message}")
+async def probe_llm_connection():
+    """Runs in the background so a slow or unreachable Groq API never delays startup"""
+    global groq_working, groq_message
+    startup.begin("llm_probe")
+    print("🧪 Testing Groq API connection...")
+    groq_working, groq_message = await test_groq_connection()
+    print(f"   Groq Status: {groq_working} - {groq_message}")
+    startup.finish("llm_probe", "done" if groq_working else "failed", message=groq_message)
 
 def extract_event_features(ev: dict):
     """Extract features from event for LLM context"""
@@ -104,16 +200,10 @@ def extract_event_features(ev: dict):
     
     return features
 
-def llm_insight_text(event: dict) -> Dict[str, Any]:
+async def llm_insight_text(event: dict) -> Dict[str, Any]:
     print(f"🤖 Attempting LLM analysis...")
     
     try:
-        if not GROQ_API_KEY:
-            raise Exception("❌ GROQ_API_KEY environment variable not set")
-            
-        from groq import Groq
-        client = Groq(api_key=GROQ_API_KEY)
-        
         features = extract_event_features(event)
         
         prompt = f"""
@@ -137,8 +227,8 @@ def llm_insight_text(event: dict) -> Dict[str, Any]:
 
         print(f"   Sending request to Groq API...")
         
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        started = time.perf_counter()
+        completion = await llm_client.complete(
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
             max_tokens=300,
@@ -172,13 +262,16 @@ def llm_insight_text(event: dict) -> Dict[str, Any]:
         tags = [tag.strip() for tag in tags_str.split(",")]
         
         print(f"   ✅ Parsed - Insight: {insight[:50]}...")
+
+        tokens = completion.usage.total_tokens if completion.usage else 0
+        record_llm_stats("per_event", 1, tokens, time.perf_counter() - started)
         
         return {
             "text": insight,
             "explanation": analysis,
             "tags": tags,
             "llm_used": True,
-            "tokens": completion.usage.total_tokens if completion.usage else 0
+            "tokens": tokens
         }
 
     except Exception as ex:
@@ -203,19 +296,109 @@ def llm_insight_text(event: dict) -> Dict[str, Any]:
             "error": str(ex)
         }
 
-async def llm_insight_async(event):
+async def llm_batch_insight_text(events: List[dict]) -> List[Optional[Dict[str, Any]]]:
+    """
+    One completion for several events. Returns one entry per event; None
+    marks an event whose result could not be parsed out of the reply.
+    """
+    prompt = build_batch_prompt([extract_event_features(ev) for ev in events])
+    print(f"🤖 Sending batched LLM request for {len(events)} events...")
+
+    started = time.perf_counter()
+    completion = await llm_client.complete(
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.7,
+        max_tokens=RESPONSE_TOKENS_PER_EVENT * len(events) + 50,
+        timeout=60,
+        response_format={"type": "json_object"}
+    )
+    elapsed = time.perf_counter() - started
+
+    parsed = parse_batch_response(completion.choices[0].message.content, len(events))
+    ok_count = sum(1 for p in parsed if p)
+    tokens = completion.usage.total_tokens if completion.usage else 0
+    record_llm_stats("batched", ok_count, tokens, elapsed)
+    print(f"   ✅ Batched response parsed for {ok_count}/{len(events)} events")
+
+    tokens_each = tokens // ok_count if ok_count else 0
+    return [
+        {**p, "llm_used": True, "tokens": tokens_each, "batched": True} if p else None
+        for p in parsed
+    ]
+
+async def llm_insights_for_events(events: List[dict]) -> List[Any]:
+    """
+    LLM insight per event, in order. Uses batched prompts when enabled and
+    retries anything the batch could not answer on the per-event path.
+    Entries may be exceptions, as with asyncio.gather(return_exceptions=True).
+    """
+    results: List[Any] = [None] * len(events)
+    signatures: List[Optional[str]] = [None] * len(events)
+
+    # Serve transactions whose feature profile was already analyzed; SQLite is read in one batch, off the event loop
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(executor, llm_insight_text, event)
+    if llm_cache is not None:
+        signatures = [feature_signature(extract_event_features(ev), LLM_CACHE_AMOUNT_BUCKET) for ev in events]
+        for i, cached in enumerate(await loop.run_in_executor(None, llm_cache.get_many, signatures)):
+            if cached is not None:
+                results[i] = {**cached, "llm_used": True, "cached": True}
+        hits = sum(1 for r in results if r is not None)
+        if hits:
+            print(f"   🗃️ LLM cache: {hits}/{len(events)} events served from cache")
+
+    pending = [i for i, res in enumerate(results) if res is None]
 
-def load_events_from_collector() -> List[dict]:
+    if LLM_BATCH_MODE and len(pending) > 1:
+        features_list = [extract_event_features(events[i]) for i in pending]
+        chunks = [
+            [pending[p] for p in chunk]
+            for chunk in chunk_by_token_budget(features_list, LLM_BATCH_TOKEN_BUDGET, LLM_BATCH_MAX_EVENTS)
+        ]
+        batch_results = await asyncio.gather(
+            *[llm_batch_insight_text([events[p] for p in chunk]) for chunk in chunks],
+            return_exceptions=True
+        )
+        for chunk, res in zip(chunks, batch_results):
+            if isinstance(res, Exception):
+                print(f"   ❌ Batched LLM call failed for {len(chunk)} events: {res}")
+                continue
+            for pos, item in zip(chunk, res):
+                results[pos] = item
+
+        missing = [i for i in pending if results[i] is None]
+        if missing:
+            print(f"   🔄 Falling back to per-event LLM calls for {len(missing)} events")
+    else:
+        missing = pending
+
+    fallback = await asyncio.gather(*[llm_insight_text(events[i]) for i in missing], return_exceptions=True)
+    for i, res in zip(missing, fallback):
+        results[i] = res
+
+    # Only genuine LLM answers are worth remembering
+    if llm_cache is not None:
+        answers = [(signatures[i], {
+            "text": results[i]["text"],
+            "explanation": results[i]["explanation"],
+            "tags": results[i]["tags"],
+            "tokens": results[i].get("tokens", 0)
+        }) for i in pending if isinstance(results[i], dict) and results[i].get("llm_used")]
+        await loop.run_in_executor(None, llm_cache.put_many, answers)
+
+    return results
+
+COLLECTOR_EVENTS_URL = "http://localhost:8100/events"  # Collector endpoint
+
+def load_events_from_collector(offset: int = 0) -> List[dict]:
     """
-    Load events from the Collector service
+    Load events from the Collector service, optionally only those after offset
     """
     try:
-        collector_url = "http://localhost:8100/events"  # Collector endpoint
+        collector_url = COLLECTOR_EVENTS_URL
         
-        print(f"📥 Loading events from Collector: {collector_url}")
-        response = requests.get(collector_url, timeout=30)
+        print(f"📥 Loading events from Collector: {collector_url}" + (f" (offset {offset})" if offset else ""))
+        import requests
+        response = requests.get(collector_url, params={"offset": offset} if offset else None, timeout=30)
         response.raise_for_status()
         
         events = response.json()
@@ -245,19 +428,35 @@ async def analyze(events: List[dict]):
     print(f"📋 Sample event structure:")
     print(json.dumps(sample_event, indent=2, default=str)[:500] + "...")
 
+    # Per-phase timings, returned so the coordinator can attribute latency
+    timings_ms = {}
+
     #  USE THE IMPORTED ANALYZERS FOR ADVANCED ANALYSIS
     advanced_insights = {}
+    phase_start = time.perf_counter()
     try:
-        # Run seasonal pattern analysis
-        seasonal_insights = pattern_analyzer.detect_product_seasonality(events)
+        loop = asyncio.get_event_loop()
+        # Explode the baskets once, off the event loop; the columns are what the analysis pool is sent
+        frame = await loop.run_in_executor(None, BasketFrame.from_events, events)
+
+        # Cross-selling from the counts over all ingested events, for the products in this batch;
+        # the batch alone is only used until the first events have been counted
+        stream_ready = basket_stream.stats()["baskets"] > 0
+
+        # Run seasonal pattern analysis and enhanced analysis in the analysis pool
+        analysis = await analysis_pool.run(frame, cross_selling=not stream_ready)
+        if analysis is None:
+            raise RuntimeError(f"Analysis queue is full ({ANALYSIS_QUEUE_SIZE} batches pending), skipped")
+        seasonal_insights, enhanced_insights = analysis["seasonal_insights"], analysis["enhanced_insights"]
         print(f"✅ Seasonal analysis: {len(seasonal_insights.get('insights', []))} insights")
-        
-        # Run enhanced analysis
-        enhanced_insights = enhanced_analyzer.detect_product_seasonality(events)
         print(f"✅ Enhanced analysis: {len(enhanced_insights.get('insights', []))} insights")
         
-        # Find cross-selling opportunities
-        cross_selling = search_engine.find_cross_selling_opportunities(events)
+        if stream_ready:
+            batch_products = [str(p) for p in frame.products if p is not None and p != ""]
+            pairs = basket_stream.pairs(min_count=2, top_n=10, products=batch_products)
+        else:
+            pairs = analysis["cross_selling_pairs"]
+        cross_selling = [cross_selling_opportunity(pair) for pair in pairs]
         print(f"✅ Cross-selling: {len(cross_selling)} opportunities")
         
         advanced_insights = {
@@ -269,14 +468,15 @@ async def analyze(events: List[dict]):
     except Exception as e:
         print(f"❌ Advanced analysis modules error: {e}")
         advanced_insights = {"error": str(e)}
+    timings_ms["advanced_analysis"] = round((time.perf_counter() - phase_start) * 1000, 2)
 
     # Continue with LLM analysis as before
+    phase_start = time.perf_counter()
     if USE_LLM and GROQ_API_KEY:
-        print(f"🤖 Using LLM for analysis...")
-        tasks = [llm_insight_async(ev) for ev in events]
+        print(f"🤖 Using LLM for analysis{' (batched prompts)' if LLM_BATCH_MODE else ''}...")
         
         try:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            results = await llm_insights_for_events(events)
             
             for i, res in enumerate(results):
                 if isinstance(res, Exception):
@@ -325,6 +525,8 @@ async def analyze(events: List[dict]):
                 "llm_used": False
             })
 
+    timings_ms["llm" if USE_LLM and GROQ_API_KEY else "simple_analysis"] = round((time.perf_counter() - phase_start) * 1000, 2)
+
     # Final output
     output = []
     llm_count = sum(1 for item in insights if item.get("llm_used"))
@@ -333,6 +535,7 @@ async def analyze(events: List[dict]):
         ev = item["event"]
         output.append({
             "insight_id": str(uuid.uuid4()),
+            "event_id": ev.get("event_id"),
             "store_id": ev.get("store_id", "unknown"),
             "ts": datetime.utcnow().isoformat(),
             "text": item["text"],
@@ -356,28 +559,56 @@ async def analyze(events: List[dict]):
         "advanced_analysis": advanced_insights,  
         "llm_traces": llm_traces,
         "mode": "LLM" if USE_LLM and GROQ_API_KEY else "SIMPLE",
-        "llm_insights_count": llm_count
+        "llm_insights_count": llm_count,
+        "timings_ms": timings_ms
     }
 
+def resolve_search_backend(backend: Optional[str]) -> str:
+    """Requested (or default) search backend, or an HTTP error if it can't be used"""
+    backend = (backend or SEARCH_BACKEND).lower()
+    if backend not in SEARCH_BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unknown search backend '{backend}', expected one of {list(SEARCH_BACKENDS)}")
+    if backend == "lsa" and not search_engine.lsa_ready:
+        detail = "LSA index is still being fitted" if LSA_ENABLED else "LSA backend is disabled (set LSA_ENABLED=true)"
+        raise HTTPException(status_code=503, detail=detail)
+    return backend
+
+async def ensure_search_index() -> bool:
+    """Load data from Collector if search engine is empty (joins a warm-up already in progress)"""
+    if not search_engine.fitted or len(search_engine.documents) == 0:
+        print("📥 Loading events from Collector for semantic search...")
+        await start_index_warm()
+        
+        if not search_engine.fitted:
+            print("❌ No events available from Collector")
+            return False
+    return True
+
 @app.post("/semantic-search")
-async def semantic_search(query: str):
+async def semantic_search(query: str, backend: Optional[str] = None,
+                          store_id: Optional[str] = None, season: Optional[str] = None,
+                          customer_category: Optional[str] = None, payment_method: Optional[str] = None,
+                          amount_min: Optional[float] = None, amount_max: Optional[float] = None,
+                          time_from: Optional[str] = None, time_to: Optional[str] = None):
     """
-    Handle semantic search queries from the frontend
+    Handle semantic search queries from the frontend. Facet filters take
+    comma-separated values; amount and time bounds are inclusive.
     """
+    backend = resolve_search_backend(backend)
+
+    filters = {
+        "store_id": store_id, "season": season,
+        "customer_category": customer_category, "payment_method": payment_method,
+    }
+    filters = {k: [v.strip() for v in value.split(",")] for k, value in filters.items() if value}
+    filters.update({k: v for k, v in {"amount_min": amount_min, "amount_max": amount_max,
+                                      "time_from": time_from, "time_to": time_to}.items() if v is not None})
+
     try:
         if not query.strip():
             return {"error": "Query cannot be empty"}
         
-        # Load data from Collector if search engine is empty
-        if not search_engine.fitted or len(search_engine.documents) == 0:
-            print("📥 Loading events from Collector for semantic search...")
-            events = load_events_from_collector()
-            
-            if events:
-                search_engine.index_events(events)
-                print(f"✅ Indexed {len(events)} events for semantic search")
-            else:
-                print("❌ No events available from Collector")
+        if not await ensure_search_index():
                 return {
                     "query": query,
                     "results": [],
@@ -385,28 +616,120 @@ async def semantic_search(query: str):
                     "message": "No data available for search. Please load data first."
                 }
         
-        # USE THE IMPORTED SEARCH ENGINE
-        results = search_engine.search_similar_patterns(query, top_k=10)
+        # USE THE IMPORTED SEARCH ENGINE - off the event loop, scoring is CPU-bound
+        try:
+            found = await asyncio.get_event_loop().run_in_executor(
+                None, lambda: search_engine.search(query, top_k=10, backend=backend, filters=filters))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        results = found["results"]
         
-        print(f"🔍 Search results for '{query}': {len(results)} matches")
+        print(f"🔍 Search results for '{query}' ({backend}): {len(results)} matches")
         
         return {
             "query": query,
+            "backend": backend,
+            "filters": filters,
             "results": results,
-            "total_matches": len(results)
+            "total_matches": len(results),
+            "documents_scored": found["documents_scored"],
+            "facet_counts": found["facet_counts"],
+            "cached": found["cached"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@app.post("/semantic-search/batch")
+async def semantic_search_batch(request: SearchBatchRequest):
+    """
+    Many searches in one call, scored together; filters apply to every query
+    and take the same names as the /semantic-search parameters
+    """
+    backend = resolve_search_backend(request.backend)
+    queries = [q for q in request.queries if q.strip()]
+    if not queries:
+        raise HTTPException(status_code=400, detail="No non-empty queries given")
+    if len(queries) > SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {SEARCH_BATCH_MAX_QUERIES} queries per batch")
+
+    if not await ensure_search_index():
+        return {"backend": backend, "responses": [], "message": "No data available for search. Please load data first."}
+
+    start = time.perf_counter()
+    try:
+        found = await asyncio.get_event_loop().run_in_executor(
+            None, lambda: search_engine.search_batch(queries, top_k=request.top_k, backend=backend,
+                                                     filters=request.filters))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    print(f"🔍 Batch search: {len(queries)} queries ({backend}) in {elapsed_ms} ms")
+    return {
+        "backend": backend,
+        "filters": request.filters,
+        "elapsed_ms": elapsed_ms,
+        "responses": [{
+            "query": query,
+            "results": f["results"],
+            "total_matches": len(f["results"]),
+            "documents_scored": f["documents_scored"],
+            "cached": f["cached"]
+        } for query, f in zip(queries, found)]
+    }
+
+@app.get("/suggest")
+def suggest(q: str, limit: int = 10, kind: Optional[str] = None):
+    """
+    Typeahead completions for products, stores, store types and customer
+    categories, best selling first. kind takes comma-separated kinds.
+    """
+    kinds = [k.strip() for k in kind.split(",") if k.strip()] if kind else None
+    start = time.perf_counter()
+    try:
+        suggestions = suggest_index.suggest(q, limit=min(max(limit, 0), 50), kinds=kinds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "query": q,
+        "suggestions": suggestions,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
+
+@app.get("/cross-selling")
+def cross_selling(product: Optional[List[str]] = Query(None), top_n: int = 10, min_count: int = 2,
+                  min_support: float = 0.0, min_confidence: float = 0.0, min_lift: float = 0.0):
+    """
+    Product pairs bought together across every ingested event, most
+    frequent first, with support, confidence and lift. product may be
+    repeated and keeps the pairs involving one of the given names.
+    """
+    products = [p for p in product if p] if product else None
+    start = time.perf_counter()
+    pairs = basket_stream.pairs(min_count=min_count, min_support=min_support, min_confidence=min_confidence,
+                                min_lift=min_lift, top_n=min(max(top_n, 0), 1000), products=products)
+    stats = basket_stream.stats()
+    return {
+        "opportunities": [cross_selling_opportunity(pair) for pair in pairs],
+        "baskets": stats["baskets"],
+        "exact": stats["exact"],
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
+
 @app.post("/chat")
 async def chat_with_data(query: str):
     """
     Handle natural language queries about the retail data
     """
     try:
-        # First, try semantic search for data-specific queries
-        search_results = search_engine.search_similar_patterns(query, top_k=5)
+        # First, try semantic search for data-specific queries (off the event loop, like /semantic-search)
+        search_results = await asyncio.get_event_loop().run_in_executor(
+            None, lambda: search_engine.search_similar_patterns(query, top_k=5))
         
         # Generate a natural language response
         if search_results:
@@ -497,11 +820,7 @@ async def analyze_user_intent(question: str) -> dict:
     """
     
     try:
-        from groq import Groq
-        client = Groq(api_key=GROQ_API_KEY)
-        
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        completion = await llm_client.complete(
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
             max_tokens=300,
@@ -571,7 +890,8 @@ async def get_relevant_data(intent_analysis: dict) -> dict:
         }
         
         # Time-based analysis (last 30 days)
-        recent_events = [e for e in sales_events if is_recent(e.get("ts"))]
+        ages = parse_timestamps([e.get("ts") for e in sales_events]).age_days()
+        recent_events = [e for e, age in zip(sales_events, ages.tolist()) if age < 30]
         relevant_data["recent_trends"] = {
             "recent_sales": sum(e.get("payload", {}).get("amount", 0) for e in recent_events),
             "recent_transactions": len(recent_events)
@@ -627,11 +947,7 @@ async def generate_ai_response(user_question: str, intent_analysis: dict, contex
     """
     
     try:
-        from groq import Groq
-        client = Groq(api_key=GROQ_API_KEY)
-        
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        completion = await llm_client.complete(
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
             max_tokens=500
@@ -643,28 +959,214 @@ async def generate_ai_response(user_question: str, intent_analysis: dict, contex
         print(f"❌ AI response generation failed: {e}")
         return f"I understand you're asking about: {user_question}. Based on our data, I can provide insights about store performance, product sales, and customer trends. Could you be more specific about what you'd like to know?"
 
-def is_recent(timestamp) -> bool:
-    """Check if event is from last 30 days"""
-    if not timestamp:
+_index_warm_task: Optional[asyncio.Task] = None
+
+def collector_holds(offset: int, last_event_id: Optional[str]) -> Optional[bool]:
+    """
+    Whether the Collector still has the events a snapshot was built from:
+    at least offset of them, the last with last_event_id. The Collector
+    keeps events in memory, so a restart empties it. None if it is
+    unreachable.
+    """
+    if offset == 0:
+        return True
+    try:
+        import requests
+        response = requests.get(COLLECTOR_EVENTS_URL, params={"offset": offset - 1}, timeout=30)
+        response.raise_for_status()
+        tail = response.json()
+    except Exception as e:
+        print(f"⚠️ Could not check the index snapshot against the Collector: {e}")
+        return None
+    if not tail:
         return False
+    return last_event_id is None or tail[0].get("event_id") == last_event_id
+
+def load_index_snapshot() -> bool:
+    """Memory-map the latest index snapshot, if there is one; the poller fetches anything newer"""
+    global collector_offset, collector_last_event_id, suggest_index, basket_stream
+    start = time.perf_counter()
     try:
-        from datetime import datetime, timedelta
-        event_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-        return datetime.now() - event_time < timedelta(days=30)
-    except:
-        return False    
+        manifest = read_manifest(INDEX_SNAPSHOT_DIR)
+        if manifest is None:
+            return False
+        offset = manifest.get("collector_offset", manifest["documents"])
+        last_event_id = manifest.get("collector_last_event_id")
+        if collector_holds(offset, last_event_id) is False:
+            print(f"⚠️ Collector no longer has the {offset} events of index snapshot {manifest['name']} - rebuilding")
+            return False
+        manifest = search_engine.load_snapshot(INDEX_SNAPSHOT_DIR, name=manifest["name"])
+    except Exception as e:
+        print(f"⚠️ Could not load index snapshot: {e}")
+        return False
+    if manifest is None:
+        return False
+    load_ms = round((time.perf_counter() - start) * 1000, 1)
+    collector_offset, collector_last_event_id = offset, last_event_id
+    if "suggest" in manifest:
+        suggest_index = SuggestIndex.from_dict(manifest["suggest"])
+    else:
+        print("⚠️ Index snapshot has no suggestion data - /suggest only covers events appended from now on")
+    if "cross_selling" in manifest:
+        basket_stream = StreamingMarketBasket.from_dict(manifest["cross_selling"], CROSS_SELLING_MAX_PAIRS)
+    else:
+        print("⚠️ Index snapshot has no cross-selling counts - /cross-selling only covers events appended from now on")
+    index_snapshot_info.update(loaded_documents=manifest["documents"], load_ms=load_ms,
+                               loaded_created_at=manifest["created_at"])
+    print(f"✅ Loaded index snapshot with {manifest['documents']} documents in {load_ms} ms")
+    return True
+
+def save_index_snapshot():
+    """Write the current index for other workers and restarts, keeping the newest few"""
+    start = time.perf_counter()
+    try:
+        name = search_engine.save_snapshot(INDEX_SNAPSHOT_DIR, collector_offset=collector_offset,
+                                           collector_last_event_id=collector_last_event_id,
+                                           suggest=suggest_index.to_dict(),
+                                           cross_selling=basket_stream.to_dict())
+        prune_snapshots(INDEX_SNAPSHOT_DIR, INDEX_SNAPSHOT_KEEP)
+    except Exception as e:
+        print(f"⚠️ Could not save index snapshot: {e}")
+        return
+    index_snapshot_info.update(saved=name, saved_documents=len(search_engine.documents),
+                               save_ms=round((time.perf_counter() - start) * 1000, 1))
+    print(f"💾 Saved index snapshot {name}")
 
-# Load data when analyzer starts
+async def warm_search_index():
+    """Load the index snapshot, or pull events from the Collector and build the index, off the event loop"""
+    global collector_offset, collector_last_event_id
+    startup.begin("index_warm")
+    loop = asyncio.get_event_loop()
+    try:
+        if INDEX_SNAPSHOT_DIR and await loop.run_in_executor(None, load_index_snapshot):
+            startup.finish("index_warm", "done", source="snapshot", documents=len(search_engine.documents))
+            if SEARCH_SHARDS > 0:
+                asyncio.ensure_future(start_sharded_search())
+            if LSA_ENABLED:
+                asyncio.ensure_future(build_lsa_index())
+            if SEARCH_BACKEND == "bm25":
+                asyncio.ensure_future(build_bm25_index())
+            return
+
+        events = await loop.run_in_executor(None, load_events_from_collector)
+        if events:
+            #  USE THE IMPORTED SEARCH ENGINE
+            await loop.run_in_executor(None, search_engine.index_events, events)
+            await loop.run_in_executor(None, suggest_index.add_events, events)
+            await loop.run_in_executor(None, basket_stream.add_events, events)
+            collector_offset, collector_last_event_id = len(events), events[-1].get("event_id")
+            print(f"✅ Pre-loaded {len(events)} events for semantic search")
+            startup.finish("index_warm", "done", source="collector", documents=len(search_engine.documents))
+            if INDEX_SNAPSHOT_DIR:
+                await loop.run_in_executor(None, save_index_snapshot)
+                if SEARCH_SHARDS > 0:
+                    asyncio.ensure_future(start_sharded_search())
+            if LSA_ENABLED:
+                asyncio.ensure_future(build_lsa_index())
+            if SEARCH_BACKEND == "bm25":
+                asyncio.ensure_future(build_bm25_index())
+        else:
+            print("⚠️ No events loaded on startup - semantic search will load on demand")
+            startup.finish("index_warm", "empty", documents=0)
+    except Exception as e:
+        print(f"❌ Search index warm-up failed: {e}")
+        startup.finish("index_warm", "failed", error=str(e))
+
+async def build_lsa_index():
+    """Fit the LSA backend in the background; readiness does not wait for it"""
+    startup.begin("lsa_fit")
+    loop = asyncio.get_event_loop()
+    try:
+        stats = await loop.run_in_executor(None, lambda: search_engine.build_lsa(
+            n_components=LSA_COMPONENTS, quantize=LSA_QUANTIZE, fit_sample=LSA_FIT_SAMPLE))
+        print(f"✅ LSA index ready: {stats['components']} components, {stats['vector_memory_mb']} MB")
+        startup.finish("lsa_fit", "done", **stats)
+    except Exception as e:
+        print(f"❌ LSA fit failed: {e}")
+        startup.finish("lsa_fit", "failed", error=str(e))
+
+async def build_bm25_index():
+    """Build the bm25 posting lists before the first query needs them; appends keep them current"""
+    startup.begin("bm25_build")
+    loop = asyncio.get_event_loop()
+    try:
+        stats = await loop.run_in_executor(None, search_engine.build_bm25)
+        print(f"✅ BM25 index ready: {stats['postings']} postings")
+        startup.finish("bm25_build", "done", **stats)
+    except Exception as e:
+        print(f"❌ BM25 build failed: {e}")
+        startup.finish("bm25_build", "failed", error=str(e))
+
+async def start_sharded_search():
+    """Spawn the shard workers and have them map the snapshot; queries stay in-process until then"""
+    startup.begin("search_shards")
+    loop = asyncio.get_event_loop()
+    try:
+        await loop.run_in_executor(None, search_engine.enable_sharding, SEARCH_SHARDS)
+        print(f"✅ Sharded search ready: {SEARCH_SHARDS} worker processes")
+        startup.finish("search_shards", "done", shards=SEARCH_SHARDS)
+    except Exception as e:
+        print(f"❌ Could not start sharded search: {e}")
+        startup.finish("search_shards", "failed", error=str(e))
+
+def start_index_warm() -> asyncio.Task:
+    """Start a warm-up unless one is already running; callers can await the task"""
+    global _index_warm_task
+    if _index_warm_task is None or _index_warm_task.done():
+        _index_warm_task = asyncio.ensure_future(warm_search_index())
+    return _index_warm_task
+
+async def follow_collector_events():
+    """Append newly ingested Collector events to the search index without a refit"""
+    global collector_offset, collector_last_event_id
+    loop = asyncio.get_event_loop()
+    while True:
+        await asyncio.sleep(INDEX_REFRESH_SECONDS)
+        if _index_warm_task is not None and not _index_warm_task.done():
+            continue
+        try:
+            events = await loop.run_in_executor(None, load_events_from_collector, collector_offset)
+            if events:
+                added = await loop.run_in_executor(None, search_engine.append_events, events)
+                # Consumed as soon as the search index has them: a retry would append them twice
+                collector_offset += len(events)
+                collector_last_event_id = events[-1].get("event_id")
+                for name, add_events in (("suggestion", suggest_index.add_events),
+                                         ("cross-selling", basket_stream.add_events)):
+                    try:
+                        await loop.run_in_executor(None, add_events, events)
+                    except Exception as e:
+                        print(f"⚠️ {len(events)} new events missing from the {name} counts: {e}")
+                if search_engine.lsa_ready:
+                    # New LSA vectors here rather than in the first lsa query after the append
+                    if await loop.run_in_executor(None, search_engine.refresh_lsa):
+                        print(f"♻️ Re-projected LSA vectors after the IDF rebase")
+                print(f"➕ Indexed {added} new documents (index version {search_engine.index_version})")
+                persisted = index_snapshot_info.get("saved_documents") or index_snapshot_info.get("loaded_documents", 0)
+                if INDEX_SNAPSHOT_DIR and len(search_engine.documents) - persisted >= INDEX_SNAPSHOT_MIN_NEW_DOCS:
+                    await loop.run_in_executor(None, save_index_snapshot)
+        except Exception as e:
+            print(f"⚠️ Incremental index refresh failed: {e}")
+
+@app.middleware("http")
+async def track_first_request(request: Request, call_next):
+    startup.mark_request()
+    return await call_next(request)
+
+# Load data when analyzer starts - without waiting for it
 @app.on_event("startup")
 async def startup_event():
-    print("🚀 Analyzer starting up - loading data from Collector...")
-    events = load_events_from_collector()
-    if events:
-        #  USE THE IMPORTED SEARCH ENGINE
-        search_engine.index_events(events)
-        print(f"✅ Pre-loaded {len(events)} events for semantic search")
-    else:
-        print("⚠️ No events loaded on startup - semantic search will load on demand")
+    print("🚀 Analyzer starting up - warming search index and probing LLM in the background...")
+    start_index_warm()
+    asyncio.ensure_future(probe_llm_connection())
+    if INDEX_REFRESH_SECONDS > 0:
+        asyncio.ensure_future(follow_collector_events())
+    analysis_pool.warm()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    search_engine.disable_sharding()
+    analysis_pool.shutdown()
 
 @app.get("/health")
 def health():
@@ -673,9 +1175,31 @@ def health():
         "llm_enabled": USE_LLM,
         "groq_api_available": bool(GROQ_API_KEY),
         "groq_working": groq_working,
+        "groq_message": groq_message,
+        "readiness": startup.report(),
+        "llm_batch_mode": LLM_BATCH_MODE,
+        "llm_client": llm_client.stats(),
+        "llm_throughput": llm_stats_summary(),
+        "llm_cache": llm_cache.stats() if llm_cache is not None else {"enabled": False},
+        "search_index": {
+            "version": search_engine.index_version,
+            "documents": len(search_engine.documents),
+            "collector_offset": collector_offset,
+            "lsa": search_engine.lsa_stats() or {"enabled": LSA_ENABLED, "built": False},
+            "query_cache": search_engine.result_cache.stats(),
+            "sharding": search_engine.sharding_stats() or {"enabled": False},
+            "snapshot": index_snapshot_info
+        },
+        "suggest": suggest_index.stats(),
+        "cross_selling": basket_stream.stats(),
+        "analysis_pool": analysis_pool.stats(),
+        "timestamp_parser": timestamp_parser.stats(),
+        "memory": process_memory_mb(),
         "modules_loaded": True  
     }
 
+startup.finish("imports")
+
 if __name__ == "__main__":
     print("🚀 Starting Analyzer Agent...")
     uvicorn.run(app, host="0.0.0.0", port=8101)
\ No newline at end of file
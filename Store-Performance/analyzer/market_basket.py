@@ -0,0 +1,408 @@
+# analyzer/market_basket.py
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+
+def pair_table(a: np.ndarray, b: np.ndarray, count: np.ndarray, item_counts: np.ndarray, n_baskets: int,
+               products: List[str], min_count: int = 1, min_support: float = 0.0, min_confidence: float = 0.0,
+               min_lift: float = 0.0, top_n: Optional[int] = None,
+               involving: Optional[np.ndarray] = None, errors: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    """
+    Pair rows (product ids a, b with their co-occurrence count) with
+    support, confidence both ways and lift, filtered and most frequent
+    first. `involving` is a boolean mask over products a pair must touch.
+    `errors` is how much each count may overstate; a pair with a nonzero
+    error is reported as estimated, with its confidences capped at 1.
+    """
+    if n_baskets == 0 or len(count) == 0:
+        return []
+    # product_a is the alphabetically first name of each pair
+    names = np.array(products, dtype=object)
+    swap = names[a] > names[b]
+    a, b = np.where(swap, b, a), np.where(swap, a, b)
+
+    support = count / n_baskets
+    # An estimated count can exceed what either product sold
+    confidence = np.minimum(count / item_counts[a], 1.0)
+    reverse = np.minimum(count / item_counts[b], 1.0)
+    if errors is None:
+        errors = np.zeros(len(count), dtype=np.int64)
+    lift = count * n_baskets / (item_counts[a] * item_counts[b])
+    keep = ((count >= min_count) & (support >= min_support) & (lift >= min_lift)
+            & (np.maximum(confidence, reverse) >= min_confidence))
+    if involving is not None:
+        keep &= involving[a] | involving[b]
+    selected = np.flatnonzero(keep)
+    order = selected[np.lexsort((names[b[selected]], names[a[selected]], -count[selected]))]
+    if top_n is not None:
+        order = order[:top_n]
+    return [{
+        "product_a": products[a[i]],
+        "product_b": products[b[i]],
+        "count": int(count[i]),
+        "support": round(float(support[i]), 6),
+        "confidence": round(float(confidence[i]), 4),
+        "reverse_confidence": round(float(reverse[i]), 4),
+        "lift": round(float(lift[i]), 4),
+        "estimated": bool(errors[i] > 0),
+        "count_error": int(errors[i]),
+    } for i in order]
+
+
+def cross_selling_opportunity(pair: Dict[str, Any]) -> Dict[str, Any]:
+    """A pair row in the shape /analyze and /cross-selling report opportunities"""
+    return {
+        "product_a": pair["product_a"],
+        "product_b": pair["product_b"],
+        "co_occurrence_count": pair["count"],
+        "support": pair["support"],
+        "confidence": pair["confidence"],
+        "reverse_confidence": pair["reverse_confidence"],
+        "lift": pair["lift"],
+        "estimated": pair["estimated"],
+        "count_error": pair["count_error"],
+        "recommendation": f"Bundle {pair['product_a']} with {pair['product_b']} - purchased together {pair['count']} times"
+    }
+
+
+class MarketBasket:
+    """
+    Baskets x products 0/1 incidence matrix X (CSR). Item counts are its
+    column sums and pair co-occurrence counts are the off-diagonal of XᵀX,
+    one sparse product instead of a loop over the pairs of every basket.
+    Larger itemsets are grown FP-growth style: each frequent itemset is
+    extended within its conditional database (the baskets containing it),
+    kept as a sparse sub-matrix rather than an FP-tree so counting stays
+    vectorized.
+    """
+
+    def __init__(self, incidence, products: List[str]):
+        self.incidence = incidence
+        self.products = products
+        self.n_baskets = incidence.shape[0]
+        self.item_counts = np.asarray(incidence.sum(axis=0)).ravel().astype(np.int64)
+        self._pairs = None
+
+    @classmethod
+    def from_events(cls, events: List[dict]) -> "MarketBasket":
+        """One row per sale event with at least one product"""
+        from scipy import sparse
+        ids: Dict[str, int] = {}
+        indices: List[int] = []
+        indptr = [0]
+        # The hot loop of the engine: kept to plain list and dict operations
+        for event in events:
+            if event.get("event_type") != "sale":
+                continue
+            items = event.get("payload", {}).get("items", [])
+            for product in items if isinstance(items, list) else [items]:
+                if product is None or product == "":
+                    continue
+                product = product if type(product) is str else str(product)
+                product_id = ids.get(product)
+                if product_id is None:
+                    product_id = ids[product] = len(ids)
+                indices.append(product_id)
+            if len(indices) > indptr[-1]:
+                indptr.append(len(indices))
+        incidence = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(ids)))
+        # A product listed twice in one basket counts once
+        incidence.sum_duplicates()
+        incidence.data[:] = 1
+        return cls(incidence, list(ids))
+
+    @classmethod
+    def from_frame(cls, frame) -> "MarketBasket":
+        """The baskets of from_events, built from a BasketFrame's item columns"""
+        from scipy import sparse
+        ids: Dict[str, int] = {}
+        product_ids = np.array([-1 if p is None or p == "" else ids.setdefault(str(p), len(ids))
+                                for p in frame.products], dtype=np.int64)
+        item_product = product_ids[frame.item_product]
+        keep = item_product >= 0
+        # Events without a product are not baskets
+        _, rows = np.unique(frame.item_event[keep], return_inverse=True)
+        rows = rows.ravel()
+        # Repeated (basket, product) entries are summed by the conversion, then count once
+        incidence = sparse.coo_matrix((np.ones(len(rows), dtype=np.int32), (rows, item_product[keep])),
+                                      shape=(int(rows.max()) + 1 if len(rows) else 0, len(ids))).tocsr()
+        incidence.data[:] = 1
+        return cls(incidence, list(ids))
+
+    def pair_counts(self):
+        """Upper triangle of XᵀX: baskets containing both products of each pair (COO)"""
+        if self._pairs is None:
+            from scipy import sparse
+            self._pairs = sparse.triu(self.incidence.T.tocsr() @ self.incidence, k=1).tocoo()
+        return self._pairs
+
+    def pairs(self, min_count: int = 1, min_support: float = 0.0, min_confidence: float = 0.0,
+              min_lift: float = 0.0, top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Product pairs bought together, most frequent first. support is the
+        share of baskets with both, confidence is P(product_b | product_a)
+        with reverse_confidence the other way round, and lift compares the
+        pair's count with what independent purchases would give.
+        min_confidence is met if either direction reaches it.
+        """
+        pairs = self.pair_counts()
+        return pair_table(pairs.row, pairs.col, pairs.data.astype(np.int64), self.item_counts, self.n_baskets,
+                          self.products, min_count, min_support, min_confidence, min_lift, top_n)
+
+    def frequent_itemsets(self, min_support: float = 0.01, max_len: Optional[int] = None,
+                          min_count: int = 1) -> List[Dict[str, Any]]:
+        """
+        Itemsets in at least min_support of the baskets (and min_count of
+        them), most frequent first. Single products and pairs are read off
+        the item counts and XᵀX; larger itemsets are grown (see _grow) over
+        just the products with a frequent partner, in baskets holding at
+        least three of them.
+        """
+        threshold = max(min_count, int(np.ceil(min_support * self.n_baskets)))
+        found = [((i,), int(c)) for i, c in enumerate(self.item_counts) if c >= threshold]
+        if max_len is None or max_len >= 2:
+            pairs = self.pair_counts()
+            keep = pairs.data >= threshold
+            found += [((int(a), int(b)), int(c)) for a, b, c in zip(pairs.row[keep], pairs.col[keep], pairs.data[keep])]
+            if (max_len is None or max_len >= 3) and keep.any():
+                items = np.union1d(pairs.row[keep], pairs.col[keep])
+                items = items[np.lexsort((items, -self.item_counts[items]))]
+                baskets = self.incidence[:, items].tocsr()
+                # A basket with fewer than three of these products supports no larger itemset
+                baskets = baskets[np.flatnonzero(np.diff(baskets.indptr) >= 3)]
+                longer: List[Tuple[Tuple[int, ...], int]] = []
+                self._grow(baskets, items, (), threshold, max_len, longer)
+                found += [f for f in longer if len(f[0]) >= 3]
+
+        found.sort(key=lambda f: (-f[1], len(f[0]), sorted(self.products[i] for i in f[0])))
+        return [{
+            "items": sorted(self.products[i] for i in itemset),
+            "count": count,
+            "support": round(count / self.n_baskets, 6),
+        } for itemset, count in found]
+
+    def _grow(self, baskets, items: np.ndarray, suffix: Tuple[int, ...], threshold: int,
+              max_len: Optional[int], out: List[Tuple[Tuple[int, ...], int]]):
+        """
+        Pattern growth over a conditional database: baskets x items (columns
+        in descending global frequency). Each frequent column extends the
+        suffix, and is then grown with the more frequent columns only, so
+        every itemset is produced once.
+        """
+        counts = np.asarray(baskets.sum(axis=0)).ravel()
+        by_item = baskets.tocsc()
+        for col in range(len(items) - 1, -1, -1):
+            if counts[col] < threshold:
+                continue
+            itemset = suffix + (int(items[col]),)
+            out.append((itemset, int(counts[col])))
+            if max_len is not None and len(itemset) >= max_len:
+                continue
+            extend = np.flatnonzero(counts[:col] >= threshold)
+            if len(extend) == 0:
+                continue
+            rows = by_item.indices[by_item.indptr[col]:by_item.indptr[col + 1]]
+            self._grow(baskets[rows][:, extend], items[extend], itemset, threshold, max_len, out)
+
+    def rules(self, min_support: float = 0.01, min_confidence: float = 0.5, min_lift: float = 1.0,
+              max_len: Optional[int] = 3, top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Association rules X -> y from the frequent itemsets: every itemset of
+        two or more products, with each of its products as the consequent.
+        Ordered by lift, then confidence.
+        """
+        itemsets = self.frequent_itemsets(min_support, max_len)
+        support = {tuple(s["items"]): s["count"] for s in itemsets}
+        counts = dict(zip(self.products, self.item_counts.tolist()))
+        rules = []
+        for itemset in itemsets:
+            items = itemset["items"]
+            if len(items) < 2:
+                continue
+            for consequent in items:
+                antecedent = tuple(p for p in items if p != consequent)
+                confidence = itemset["count"] / support[antecedent]
+                lift = confidence * self.n_baskets / counts[consequent]
+                if confidence >= min_confidence and lift >= min_lift:
+                    rules.append({
+                        "antecedent": list(antecedent),
+                        "consequent": consequent,
+                        "count": itemset["count"],
+                        "support": itemset["support"],
+                        "confidence": round(confidence, 4),
+                        "lift": round(lift, 4),
+                    })
+        rules.sort(key=lambda r: (-r["lift"], -r["confidence"], r["antecedent"], r["consequent"]))
+        return rules[:top_n] if top_n is not None else rules
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "baskets": self.n_baskets,
+            "products": len(self.products),
+            "avg_basket_size": round(self.incidence.nnz / self.n_baskets, 2) if self.n_baskets else 0.0,
+            "pairs": int(self.pair_counts().nnz),
+        }
+
+
+class _StreamState:
+    """One immutable version of the streaming counts; readers take a reference and never see a partial update"""
+    __slots__ = ("version", "products", "ids", "item_counts", "n_baskets", "keys", "counts", "errors")
+
+    def __init__(self, version: int, products: List[str], ids: Dict[str, int], item_counts: np.ndarray,
+                 n_baskets: int, keys: np.ndarray, counts: np.ndarray, errors: np.ndarray):
+        self.version = version
+        self.products = products          # product name per id
+        self.ids = ids                    # id of each product name, copied when a batch adds names
+        self.item_counts = item_counts    # baskets containing each product (exact)
+        self.n_baskets = n_baskets
+        self.keys = keys                  # tracked pairs as a << 32 | b with a < b, sorted
+        self.counts = counts              # baskets with both products, an upper bound once pruned
+        self.errors = errors              # most each count can overstate by (0 while exact)
+
+
+class StreamingMarketBasket:
+    """
+    Cross-selling counts kept across every ingested event. Each batch is
+    counted with the XᵀX product of its own baskets and merged into exact
+    per-product counts plus a table of tracked pairs, so the pair metrics
+    of all events so far are available without a recount.
+
+    Memory is bounded by max_pairs: once the table holds twice that many
+    pairs, only the max_pairs most frequent are kept and the counts of the
+    dropped ones go into a count-min sketch. A dropped pair that comes back
+    starts from its sketch estimate, an upper bound of what it had, and
+    records that estimate as its possible error. Counts stay exact until
+    the first prune.
+    """
+
+    def __init__(self, max_pairs: int = 50000, sketch_width: int = 1 << 16, sketch_depth: int = 4, seed: int = 42):
+        if sketch_width & (sketch_width - 1):
+            raise ValueError("sketch_width must be a power of two")
+        self.max_pairs = max_pairs
+        self._lock = threading.Lock()
+        self._sketch = np.zeros((sketch_depth, sketch_width), dtype=np.int64)
+        # Odd multipliers for multiply-shift hashing of pair keys, one per sketch row
+        self._hash = np.random.default_rng(seed).integers(1, 1 << 63, sketch_depth, dtype=np.uint64) | np.uint64(1)
+        self._shift = np.uint64(64 - sketch_width.bit_length() + 1)
+        self.prunes = 0
+        self.evicted = 0
+        self._state = _StreamState(0, [], {}, np.empty(0, dtype=np.int64), 0, np.empty(0, dtype=np.int64),
+                                   np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    def _buckets(self, keys: np.ndarray) -> np.ndarray:
+        """Sketch column of each key, one row per hash"""
+        return (keys.astype(np.uint64)[None, :] * self._hash[:, None]) >> self._shift
+
+    def _estimate(self, keys: np.ndarray) -> np.ndarray:
+        rows = np.arange(len(self._hash))[:, None]
+        return self._sketch[rows, self._buckets(keys)].min(axis=0)
+
+    def add_events(self, events: List[dict]) -> int:
+        """Count the sale baskets of a batch of events; returns how many baskets were added"""
+        batch = MarketBasket.from_events(events)
+        if batch.n_baskets == 0:
+            return 0
+        pairs = batch.pair_counts()
+        with self._lock:
+            state = self._state
+            products, ids = state.products, state.ids
+            added = [p for p in batch.products if p not in ids]
+            if added:
+                # Readers of the current state keep its own list and map
+                products, ids = products + added, dict(ids)
+                ids.update((p, len(state.products) + i) for i, p in enumerate(added))
+            to_global = np.array([ids[p] for p in batch.products], dtype=np.int64)
+            item_counts = np.zeros(len(products), dtype=np.int64)
+            item_counts[:len(state.item_counts)] = state.item_counts
+            item_counts[to_global] += batch.item_counts
+
+            a, b = to_global[pairs.row], to_global[pairs.col]
+            batch_keys = np.minimum(a, b) << 32 | np.maximum(a, b)
+            batch_counts = pairs.data.astype(np.int64)
+            keys, counts, errors = state.keys, state.counts.copy(), state.errors
+            pos = np.searchsorted(keys, batch_keys)
+            tracked = pos < len(keys)
+            tracked[tracked] = keys[pos[tracked]] == batch_keys[tracked]
+            counts[pos[tracked]] += batch_counts[tracked]
+
+            new_keys, new_counts = batch_keys[~tracked], batch_counts[~tracked]
+            if len(new_keys):
+                # Pairs dropped by an earlier prune come back with what the sketch holds for them
+                prior = self._estimate(new_keys) if self.prunes else np.zeros(len(new_keys), dtype=np.int64)
+                keys = np.concatenate([keys, new_keys])
+                counts = np.concatenate([counts, new_counts + prior])
+                errors = np.concatenate([errors, prior])
+                order = np.argsort(keys, kind="stable")
+                keys, counts, errors = keys[order], counts[order], errors[order]
+            if len(keys) > 2 * self.max_pairs:
+                keys, counts, errors = self._prune(keys, counts, errors)
+
+            self._state = _StreamState(state.version + 1, products, ids, item_counts, state.n_baskets + batch.n_baskets,
+                                       keys, counts, errors)
+        return batch.n_baskets
+
+    def _prune(self, keys: np.ndarray, counts: np.ndarray, errors: np.ndarray):
+        """Keep the max_pairs most frequent pairs; the rest go into the sketch"""
+        order = np.lexsort((keys, -counts))
+        keep, drop = np.sort(order[:self.max_pairs]), order[self.max_pairs:]
+        # Only what was counted while tracked: the prior estimate is already in the sketch
+        rows = np.arange(len(self._hash))[:, None]
+        np.add.at(self._sketch, (np.broadcast_to(rows, (len(self._hash), len(drop))), self._buckets(keys[drop])),
+                  counts[drop] - errors[drop])
+        self.prunes += 1
+        self.evicted += len(drop)
+        return keys[keep], counts[keep], errors[keep]
+
+    def pairs(self, min_count: int = 1, min_support: float = 0.0, min_confidence: float = 0.0,
+              min_lift: float = 0.0, top_n: Optional[int] = 10,
+              products: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Current pair metrics (see MarketBasket.pairs), optionally only pairs touching one of `products`"""
+        state = self._state
+        involving = None
+        if products is not None:
+            involving = np.zeros(len(state.products), dtype=bool)
+            involving[[state.ids[p] for p in products if p in state.ids]] = True
+        return pair_table(state.keys >> 32, state.keys & 0xFFFFFFFF, state.counts, state.item_counts,
+                          state.n_baskets, state.products, min_count, min_support, min_confidence, min_lift,
+                          top_n, involving, state.errors)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Counts and sketch, for saving alongside an index snapshot"""
+        state = self._state
+        return {"products": list(state.products), "item_counts": state.item_counts.tolist(),
+                "n_baskets": state.n_baskets, "keys": state.keys.tolist(), "counts": state.counts.tolist(),
+                "errors": state.errors.tolist(), "prunes": self.prunes, "evicted": self.evicted,
+                # The sketch is all zeros until the first prune
+                "sketch": self._sketch.tolist() if self.prunes else None}
+
+    @classmethod
+    def from_dict(cls, saved: Dict[str, Any], max_pairs: int = 50000) -> "StreamingMarketBasket":
+        sketch = saved.get("sketch")
+        if sketch is None:
+            stream = cls(max_pairs)
+        else:
+            stream = cls(max_pairs, sketch_width=len(sketch[0]), sketch_depth=len(sketch))
+            stream._sketch = np.array(sketch, dtype=np.int64)
+        stream.prunes, stream.evicted = saved.get("prunes", 0), saved.get("evicted", 0)
+        products = list(saved["products"])
+        stream._state = _StreamState(1, products, {p: i for i, p in enumerate(products)}, np.array(saved["item_counts"], dtype=np.int64), saved["n_baskets"],
+                                     np.array(saved["keys"], dtype=np.int64), np.array(saved["counts"], dtype=np.int64),
+                                     np.array(saved["errors"], dtype=np.int64))
+        return stream
+
+    def stats(self) -> Dict[str, Any]:
+        state = self._state
+        return {
+            "version": state.version,
+            "baskets": state.n_baskets,
+            "products": len(state.products),
+            "tracked_pairs": int(len(state.keys)),
+            "max_pairs": self.max_pairs,
+            "exact": self.prunes == 0,
+            "prunes": self.prunes,
+            "evicted_pairs": self.evicted,
+            "memory_mb": round((state.keys.nbytes * 3 + self._sketch.nbytes) / 1e6, 2),
+        }
@@ -0,0 +1,105 @@
+# analyzer/result_cache.py
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class QueryResultCache:
+    """
+    Bounded LRU of search responses keyed by the normalized query (expanded
+    and original, as bags of words), backend, top_k and filters. Entries
+    belong to one index version: the first lookup against a newer version
+    drops them all, so an append or rebuild can never serve stale results.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, Tuple[dict, float]]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_ms = 0.0
+
+    @staticmethod
+    def _bag(text: str) -> Tuple[str, ...]:
+        return tuple(sorted(text.lower().split()))
+
+    @staticmethod
+    def _filters(filters: Optional[Dict[str, Any]]) -> tuple:
+        normalized = []
+        for name, value in sorted((filters or {}).items()):
+            if value is None or value == "" or value == []:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                value = tuple(sorted(str(v).lower() for v in value))
+            elif isinstance(value, str):
+                value = value.lower()
+            normalized.append((name, value))
+        return tuple(normalized)
+
+    @classmethod
+    def key_for(cls, query: str, expanded: str, backend: str, top_k: int,
+                filters: Optional[Dict[str, Any]], facet_counts: bool) -> tuple:
+        # The original query is part of the key because it is the fallback when
+        # the expanded one finds nothing
+        return (cls._bag(expanded), cls._bag(query), backend, top_k, cls._filters(filters), facet_counts)
+
+    def _check_version(self, version: int):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version: int, key: tuple) -> Optional[dict]:
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            response, compute_ms = entry
+            self.saved_ms += compute_ms
+        # Callers get their own result list; the cached one stays untouched
+        return {**response, "results": [dict(r) for r in response["results"]]}
+
+    def put(self, version: int, key: tuple, response: dict, compute_ms: float):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = ({**response, "results": [dict(r) for r in response["results"]]}, compute_ms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. when a new LSA model changes results within a version"""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.max_size > 0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "index_version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "saved_ms": round(self.saved_ms, 1),
+            "avg_saved_ms_per_hit": round(self.saved_ms / self.hits, 2) if self.hits else 0.0,
+        }
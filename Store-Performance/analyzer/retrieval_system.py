@@ -1,21 +1,126 @@
 # analyzer/retrieval_system.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import threading
+import time
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import json
+from functools import reduce
+
+from .bm25_index import BM25Index
+from .facets import FacetIndex, facet_row, CATEGORICAL_FACETS
+from .lsa_index import LSAIndex
+from .result_cache import QueryResultCache
+from .market_basket import MarketBasket, cross_selling_opportunity
+from .sharded_search import ShardedSearch, row_block, score_rows, top_k_positions
+from . import index_snapshot
+from .index_snapshot import ChainedColumn, ChainedRows
+
+# Hashed vocabulary size; fixed so new documents never need a refit
+HASH_FEATURES = 2 ** 18
+
+# "tfidf": brute-force cosine over every document; "bm25": inverted index;
+# "lsa": dense latent-semantic vectors (needs build_lsa first)
+SEARCH_BACKENDS = ("tfidf", "bm25", "lsa")
+
+
+class SearchIndex:
+    """
+    One immutable version of the search index. Queries grab a single
+    reference to it, so appends and rebuilds (which publish a new
+    SearchIndex) never expose a half-updated index.
+    """
+
+    __slots__ = ("version", "documents", "metadata", "term_counts", "doc_freq",
+                 "idf", "doc_matrix", "docs_at_rebase", "facets", "weights_version", "bm25")
+
+    def __init__(self, version, documents, metadata, term_counts, doc_freq, idf, doc_matrix, docs_at_rebase,
+                 facets, weights_version=None, bm25=None):
+        self.version = version
+        self.documents = documents
+        self.metadata = metadata
+        self.term_counts = term_counts    # raw term counts, ChainedRows of CSR (n_docs x HASH_FEATURES)
+        self.doc_freq = doc_freq          # documents containing each hashed term
+        self.idf = idf                    # float32 IDF the doc_matrix was weighted with
+        self.doc_matrix = doc_matrix      # L2-normalized float32 TF-IDF rows, ChainedRows of CSR
+        self.docs_at_rebase = docs_at_rebase
+        self.facets = facets              # FacetIndex for filtered search
+        # Version at which the existing doc_matrix rows were last (re)weighted;
+        # appends without an IDF rebase only add rows
+        self.weights_version = version if weights_version is None else weights_version
+        # Posting lists for the bm25 backend: built on first use, then carried over by appends
+        self.bm25 = bm25
+
 
 class SemanticSearchEngine:
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
-        self.documents = []
-        self.document_metadata = []
-        self.fitted = False
-    
-    def index_events(self, events: List[dict]):
-        """Index events for semantic search"""
+    def __init__(self, n_features: int = HASH_FEATURES, rebase_fraction: float = 0.2,
+                 result_cache_size: int = 1024):
+        self.n_features = n_features
+        # IDF is recomputed (and every row re-weighted) once the corpus has
+        # grown by this fraction since the last rebase
+        self.rebase_fraction = rebase_fraction
+        # sklearn is imported when the first index is built, not at analyzer startup
+        self.vectorizer = None
+        self._index: Optional[SearchIndex] = None
+        self._write_lock = threading.Lock()
+        # Serializes the first build of the bm25 posting lists
+        self._bm25_lock = threading.Lock()
+        # Dense LSA vectors for the lsa backend; fitted by build_lsa, kept current by fold-in
+        # and re-projected by refresh_lsa after a rebase or rebuild
+        self._lsa: Optional[LSAIndex] = None
+        self._lsa_lock = threading.Lock()
+        # Base term counts of the index the LSA vectors were projected from; another base means other documents
+        self._lsa_rows = None
+        # Responses per index version; any new version invalidates them
+        self.result_cache = QueryResultCache(result_cache_size)
+        # Optional process pool scoring tfidf queries over shards of the last snapshot
+        self._shards: Optional[ShardedSearch] = None
+        # Last snapshot saved or loaded: root, name, documents and the weights_version of its rows
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+    # Read-only views of the current index version
+    @property
+    def fitted(self) -> bool:
+        return self._index is not None
+
+    @property
+    def documents(self) -> List[str]:
+        return self._index.documents if self._index else []
+
+    @property
+    def document_metadata(self) -> List[dict]:
+        return self._index.metadata if self._index else []
+
+    @property
+    def doc_matrix(self):
+        return self._index.doc_matrix if self._index else None
+
+    @property
+    def index_version(self) -> int:
+        return self._index.version if self._index else 0
+
+    @property
+    def lsa_ready(self) -> bool:
+        return self._lsa is not None
+
+    def lsa_stats(self) -> Optional[Dict[str, Any]]:
+        lsa = self._lsa
+        return lsa.stats() if lsa is not None else None
+
+    def _get_vectorizer(self):
+        if self.vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+            # Stateless: same tokenization as before (english stop words), raw counts
+            self.vectorizer = HashingVectorizer(
+                n_features=self.n_features, stop_words='english', alternate_sign=False,
+                norm=None, dtype=np.float32
+            )
+        return self.vectorizer
+
+    @staticmethod
+    def _build_documents(events: List[dict]) -> Tuple[List[str], List[dict], List[dict]]:
         documents = []
         metadata = []
+        facet_rows = []
         
         for event in events:
             if event.get("event_type") == "sale":
@@ -46,12 +151,204 @@ class SemanticSearchEngine:
                     "products": products,
                     "timestamp": event.get("ts")
                 })
+                facet_rows.append(facet_row(event))
+
+        return documents, metadata, facet_rows
+
+    @staticmethod
+    def _idf(doc_freq: np.ndarray, n_docs: int) -> np.ndarray:
+        # Same smoothed IDF as sklearn's TfidfTransformer
+        return (np.log((1.0 + n_docs) / (1.0 + doc_freq)) + 1.0).astype(np.float32)
+
+    @staticmethod
+    def _weight(term_counts, idf: np.ndarray):
+        from sklearn.preprocessing import normalize
+        weighted = term_counts.tocsr(copy=True)
+        # Column scaling in place; cheaper than a product with a 2**18 diagonal
+        weighted.data *= idf[weighted.indices]
+        return normalize(weighted, norm='l2', copy=False)
+
+    @staticmethod
+    def _chained(column) -> ChainedColumn:
+        """The documents or metadata of a full build as a column that appends in place"""
+        return ChainedColumn(column, []) if isinstance(column, list) else column
+
+    @staticmethod
+    def _doc_freq(term_counts) -> np.ndarray:
+        return np.bincount(term_counts.indices, minlength=term_counts.shape[1]).astype(np.int64)
+    
+    def index_events(self, events: List[dict]):
+        """Index events for semantic search (full rebuild)"""
+        documents, metadata, facet_rows = self._build_documents(events)
         
         if documents:
-            self.documents = documents
-            self.document_metadata = metadata
-            self.vectorizer.fit(documents)
-            self.fitted = True
+            term_counts = self._get_vectorizer().transform(documents).tocsr()
+            with self._write_lock:
+                self._index = self._full_index(documents, metadata, facet_rows, term_counts)
+
+    def _full_index(self, documents: List[str], metadata: List[dict], facet_rows: List[dict],
+                    term_counts) -> SearchIndex:
+        """A fresh index over these documents, with IDF fitted to them; the caller holds the write lock"""
+        doc_freq = self._doc_freq(term_counts)
+        idf = self._idf(doc_freq, len(documents))
+        return SearchIndex(
+            self.index_version + 1, documents, metadata, ChainedRows(term_counts), doc_freq, idf,
+            ChainedRows(self._weight(term_counts, idf)), len(documents), FacetIndex.build(facet_rows)
+        )
+
+    def save_snapshot(self, root: str, **extra) -> Optional[str]:
+        """Write the current index version to disk; returns the snapshot name"""
+        index = self._index
+        if index is None:
+            return None
+        name = index_snapshot.save_snapshot(root, index, self.n_features, extra)
+        self._snapshot = {"root": root, "name": name, "documents": len(index.documents),
+                          "weights_version": index.weights_version}
+        return name
+
+    def load_snapshot(self, root: str, mmap: bool = True, name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Replace the index with a snapshot under root (the latest by default),
+        memory-mapped by default. Returns the snapshot manifest, or None if
+        there is none.
+        """
+        snapshot = index_snapshot.load_snapshot(root, name, mmap=mmap)
+        if snapshot is None:
+            return None
+        manifest = snapshot["manifest"]
+        if manifest["n_features"] != self.n_features:
+            print(f"⚠️ Ignoring index snapshot {snapshot['name']}: built with {manifest['n_features']} hash features")
+            return None
+
+        with self._write_lock:
+            self._index = SearchIndex(
+                self.index_version + 1, snapshot["documents"], snapshot["metadata"],
+                ChainedRows(snapshot["term_counts"]), snapshot["doc_freq"], snapshot["idf"],
+                ChainedRows(snapshot["doc_matrix"]), manifest["docs_at_rebase"], snapshot["facets"]
+            )
+            self._snapshot = {"root": root, "name": snapshot["name"], "documents": manifest["documents"],
+                              "weights_version": self._index.weights_version}
+        return manifest
+
+    def enable_sharding(self, n_shards: int, max_workers: Optional[int] = None):
+        """
+        Score tfidf queries across a pool of worker processes, each taking a
+        range of rows of the last snapshot; rows appended since are scored
+        here. Until a snapshot matches the current IDF weights, queries run
+        in-process as usual.
+        """
+        self.disable_sharding()
+        self._shards = ShardedSearch(n_shards, max_workers)
+        snapshot = self._snapshot
+        if snapshot is not None:
+            self._shards.warm(snapshot["root"], snapshot["name"])
+
+    def disable_sharding(self):
+        shards, self._shards = self._shards, None
+        if shards is not None:
+            shards.shutdown()
+
+    def sharding_stats(self) -> Optional[Dict[str, Any]]:
+        shards = self._shards
+        return shards.stats() if shards is not None else None
+
+    def _shard_snapshot(self, index: SearchIndex) -> Optional[Dict[str, Any]]:
+        """The snapshot whose rows are a prefix of this index's rows, when sharding can serve it"""
+        snapshot = self._snapshot
+        if self._shards is None or snapshot is None:
+            return None
+        # A rebase or rebuild since the snapshot re-weighted its rows
+        if snapshot["weights_version"] != index.weights_version or snapshot["documents"] > len(index.documents):
+            return None
+        return snapshot
+
+    def build_lsa(self, n_components: int = 64, quantize: bool = False, fit_sample: int = 200000) -> Dict[str, Any]:
+        """Fit the truncated SVD for the lsa backend on the current index (slow; run off the event loop)"""
+        index = self._index
+        if index is None:
+            raise RuntimeError("Nothing indexed yet - cannot build the LSA index")
+        lsa = LSAIndex.fit(index.doc_matrix, index.doc_freq, index.version, index.weights_version,
+                           n_components=n_components, quantize=quantize, fit_sample=fit_sample)
+        with self._lsa_lock:
+            self._lsa, self._lsa_rows = lsa, index.term_counts.base
+        # A refit changes lsa results without a new index version
+        self.result_cache.clear()
+        return lsa.stats()
+
+    def refresh_lsa(self) -> bool:
+        """
+        Bring the LSA vectors up to the current index version: fold in new
+        rows, or re-project every row when an IDF rebase or rebuild changed
+        them (slow; run off the event loop). The result is swapped in at
+        once, and queries keep using the previous vectors meanwhile.
+        Returns whether everything was re-projected.
+        """
+        index, lsa = self._index, self._lsa
+        if index is None or lsa is None:
+            return False
+        if self._lsa_rows is index.term_counts.base and lsa.weights_version == index.weights_version:
+            self._lsa_index(index)
+            return False
+        projected = lsa.updated(index.doc_matrix, index.version, index.weights_version, fold_in=False)
+        with self._lsa_lock:
+            self._lsa, self._lsa_rows = projected, index.term_counts.base
+        # Same index version, different lsa results
+        self.result_cache.clear()
+        return True
+
+    def build_bm25(self) -> Dict[str, Any]:
+        """Build the bm25 posting lists now rather than in the first bm25 query (run off the event loop)"""
+        index = self._index
+        if index is None:
+            raise RuntimeError("Nothing indexed yet - cannot build the BM25 index")
+        return self._bm25_index(index).stats()
+
+    def append_events(self, events: List[dict]) -> int:
+        """
+        Add new events without refitting. New rows are weighted with the
+        current IDF and appended after the existing ones, which are neither
+        copied nor written (a loaded snapshot stays memory-mapped); once the
+        corpus has grown by rebase_fraction the IDF is recomputed from the
+        stored term counts and all rows re-weighted - no re-tokenization
+        either way. Returns the number of documents added.
+        """
+        documents, metadata, facet_rows = self._build_documents(events)
+        if not documents:
+            return 0
+
+        new_counts = self._get_vectorizer().transform(documents).tocsr()
+
+        with self._write_lock:
+            current = self._index
+            if current is None:
+                self._index = self._full_index(documents, metadata, facet_rows, new_counts)
+                return len(documents)
+
+            term_counts = current.term_counts.append(new_counts)
+            doc_freq = current.doc_freq + self._doc_freq(new_counts)
+            n_docs = term_counts.shape[0]
+
+            if n_docs >= current.docs_at_rebase * (1 + self.rebase_fraction):
+                idf = self._idf(doc_freq, n_docs)
+                doc_matrix = ChainedRows(self._weight(term_counts, idf))
+                docs_at_rebase = n_docs
+                weights_version = current.version + 1
+                print(f"♻️ Rebased IDF over {n_docs} documents")
+            else:
+                idf = current.idf
+                doc_matrix = current.doc_matrix.append(self._weight(new_counts, idf))
+                docs_at_rebase = current.docs_at_rebase
+                weights_version = current.weights_version
+
+            # Posting lists already built get the new docs as a segment of their own
+            bm25 = current.bm25.appended(new_counts) if current.bm25 is not None else None
+            self._index = SearchIndex(
+                current.version + 1, self._chained(current.documents) + documents,
+                self._chained(current.metadata) + metadata,
+                term_counts, doc_freq, idf, doc_matrix, docs_at_rebase, current.facets.append(facet_rows),
+                weights_version, bm25
+            )
+        return len(documents)
     
     def expand_query(self, query: str) -> str:
         """Expand query with related terms for better matching"""
@@ -82,96 +379,323 @@ class SemanticSearchEngine:
         print(f"🔍 Expanded query: '{query}' -> '{expanded}'")
         return expanded
     
-    def search_similar_patterns(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+    def search_similar_patterns(self, query: str, top_k: int = 10, backend: str = "tfidf",
+                                filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Find similar patterns using semantic search"""
-        if not self.fitted or not self.documents:
+        return self.search(query, top_k, backend, filters, facet_counts=False)["results"]
+
+    def search(self, query: str, top_k: int = 10, backend: str = "tfidf",
+               filters: Optional[Dict[str, Any]] = None, facet_counts: bool = True) -> Dict[str, Any]:
+        """
+        Results plus facet counts. Filters are evaluated against the facet
+        bitmaps first and only the matching documents are scored; facet counts
+        cover the filtered documents that match the query at all.
+        """
+        if backend not in SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search backend '{backend}', expected one of {SEARCH_BACKENDS}")
+
+        # Read the index once; appends and rebuilds publish a new version
+        index = self._index
+        if index is None or not index.documents:
             print("❌ Search engine not ready - no data indexed")
-            return []
-        
+            return {"results": [], "facet_counts": {}, "documents_scored": 0}
+
         # Expand query with related terms
         query_expanded = self.expand_query(query)
+
+        key = QueryResultCache.key_for(query, query_expanded, backend, top_k, filters, facet_counts)
+        cached = self.result_cache.get(index.version, key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        start = time.perf_counter()
+        response = self._search_index(index, query, query_expanded, top_k, backend, filters, facet_counts)
+        self.result_cache.put(index.version, key, response, (time.perf_counter() - start) * 1000)
+        return {**response, "cached": False}
+
+    def _search_index(self, index: SearchIndex, query: str, query_expanded: str, top_k: int,
+                      backend: str, filters: Optional[Dict[str, Any]], facet_counts: bool) -> Dict[str, Any]:
+        mask = index.facets.mask(filters)
+        rows = np.flatnonzero(mask) if mask is not None else None
+        documents_scored = len(rows) if rows is not None else len(index.documents)
+
+        if backend == "lsa":
+            lsa = self._lsa_index(index)
+            scorer = lambda text: lsa.score(self._query_vector(index, text), rows)
+        else:
+            scorer = lambda text: self._score(index, text, rows)
+
+        if backend == "bm25":
+            results, matched = self._search_bm25(index, query_expanded, top_k, mask, facet_counts)
+            return {"results": results, "facet_counts": index.facets.counts(matched) if facet_counts else {},
+                    "documents_scored": documents_scored}
+
+        snapshot = self._shard_snapshot(index) if backend == "tfidf" else None
+        if snapshot is not None:
+            try:
+                return self._search_sharded(index, snapshot, query, query_expanded, top_k, filters, mask,
+                                            facet_counts, documents_scored)
+            except Exception as e:
+                print(f"⚠️ Sharded search failed, scoring in-process: {e}")
         
-        # Transform query and documents
-        query_vec = self.vectorizer.transform([query_expanded.lower()])
-        doc_vecs = self.vectorizer.transform(self.documents)
-        
-        # Calculate similarities
-        similarities = cosine_similarity(query_vec, doc_vecs).flatten()
-        
-        # Get top k results
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-        
-        results = []
-        for idx in top_indices:
-            if similarities[idx] > 0.05:  # Lower threshold for more results
-                results.append({
-                    "metadata": self.document_metadata[idx],
-                    "similarity_score": float(similarities[idx]),
-                    "document_preview": self.documents[idx][:100] + "..."
-                })
+        # Rows are L2-normalized, so cosine similarity is a sparse dot product
+        similarities = scorer(query_expanded)
+        results = self._top_results(similarities, top_k, 0.05, index, rows)  # Lower threshold for more results
         
         print(f"📊 Found {len(results)} results for query: '{query}'")
         
         # If no results with expanded query, try original query
         if len(results) == 0:
             print("🔄 No results with expanded query, trying original query...")
-            query_vec_original = self.vectorizer.transform([query.lower()])
-            similarities_original = cosine_similarity(query_vec_original, doc_vecs).flatten()
-            
-            top_indices_original = np.argsort(similarities_original)[-top_k:][::-1]
-            
-            for idx in top_indices_original:
-                if similarities_original[idx] > 0.01:  # Even lower threshold
-                    results.append({
-                        "metadata": self.document_metadata[idx],
-                        "similarity_score": float(similarities_original[idx]),
-                        "document_preview": self.documents[idx][:100] + "..."
-                    })
+            similarities = scorer(query)
+            results = self._top_results(similarities, top_k, 0.01, index, rows)  # Even lower threshold
             
             print(f"📊 Found {len(results)} results with original query")
-        
+
+        counts = {}
+        if facet_counts:
+            matched = similarities > (0.05 if backend == "lsa" else 0)  # dense scores are rarely exactly 0
+            counts = index.facets.counts(rows[matched] if rows is not None else matched)
+        return {"results": results, "facet_counts": counts, "documents_scored": documents_scored}
+
+    def _search_sharded(self, index: SearchIndex, snapshot: Dict[str, Any], query: str, query_expanded: str,
+                        top_k: int, filters: Optional[Dict[str, Any]], mask: Optional[np.ndarray],
+                        facet_counts: bool, documents_scored: int) -> Dict[str, Any]:
+        """Same results as the in-process tfidf path, with the per-shard top-k lists merged by a heap"""
+        def run(text: str, threshold: float):
+            query_vec = self._query_vector(index, text)
+            parts = self._shards.score(snapshot["root"], snapshot["name"], snapshot["documents"], query_vec,
+                                       top_k, threshold, filters, facet_counts)
+            dense = np.zeros(query_vec.shape[1], dtype=np.float32)
+            dense[query_vec.indices] = query_vec.data
+            # Rows appended since the snapshot
+            parts.append(score_rows(index.doc_matrix, index.facets, snapshot["documents"], len(index.documents),
+                                    mask, dense, top_k, threshold, facet_counts))
+            return [self._result(index, doc, score) for doc, score in ShardedSearch.merge(parts, top_k)], parts
+
+        results, parts = run(query_expanded, 0.05)
+        print(f"📊 Found {len(results)} results for query: '{query}' across {len(parts) - 1} shards")
+        if len(results) == 0:
+            print("🔄 No results with expanded query, trying original query...")
+            results, parts = run(query, 0.01)
+
+        counts = {}
+        if facet_counts:
+            # The tail may know values the snapshot's tallies are too short for
+            counts = index.facets.top_counts({facet: reduce(self._add_tally, (part[2][facet] for part in parts))
+                                              for facet in CATEGORICAL_FACETS})
+        return {"results": results, "facet_counts": counts, "documents_scored": documents_scored}
+
+    @staticmethod
+    def _add_tally(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        total = np.zeros(max(len(a), len(b)), dtype=np.int64)
+        total[:len(a)] += a
+        total[:len(b)] += b
+        return total
+
+    def _query_vector(self, index: SearchIndex, text: str):
+        """Query as an L2-normalized TF-IDF row, weighted with the index's IDF"""
+        return self._query_matrix(index, [text])
+
+    def _query_matrix(self, index: SearchIndex, texts: List[str]):
+        """One L2-normalized TF-IDF row per query"""
+        query_counts = self._get_vectorizer().transform([t.lower() for t in texts]).tocsr()
+        # Drop terms no indexed document contains, as a fitted vocabulary would
+        query_counts.data *= index.doc_freq[query_counts.indices] > 0
+        query_counts.eliminate_zeros()
+        return self._weight(query_counts, index.idf)
+
+    def _score(self, index: SearchIndex, text: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity of one query against every indexed document, or just `rows`"""
+        query_vec = self._query_vector(index, text)
+        # Sparse matrix x dense vector is a single pass over the doc matrix
+        dense = np.zeros(query_vec.shape[1], dtype=np.float32)
+        dense[query_vec.indices] = query_vec.data
+        doc_matrix = index.doc_matrix[rows] if rows is not None else index.doc_matrix
+        return doc_matrix @ dense
+
+    def _lsa_index(self, index: SearchIndex) -> LSAIndex:
+        """LSA vectors for this index version, folding in rows added since the last fit"""
+        lsa = self._lsa
+        if lsa is None:
+            raise RuntimeError("LSA index not built - call build_lsa() first")
+        if lsa.version == index.version:
+            return lsa
+        with self._lsa_lock:
+            lsa = self._lsa
+            if lsa.version != index.version:
+                if self._lsa_rows is index.term_counts.base and len(lsa.vectors) <= len(index.documents):
+                    # Only new rows. After an IDF rebase the existing vectors keep their old weights
+                    # until refresh_lsa re-projects them, so the re-projection never runs in a query
+                    lsa = lsa.updated(index.doc_matrix, index.version, lsa.weights_version, fold_in=True)
+                else:
+                    # A rebuild or another snapshot: other documents, nothing to fold into
+                    lsa = lsa.updated(index.doc_matrix, index.version, index.weights_version, fold_in=False)
+                    self._lsa_rows = index.term_counts.base
+                self._lsa = lsa
+        return lsa
+
+    def search_batch(self, queries: List[str], top_k: int = 10, backend: str = "tfidf",
+                     filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Many queries at once, sharing one set of filters. For tfidf the cache
+        misses are scored together with a single sparse matrix-matrix product
+        per block of documents; other backends run query by query. Responses
+        match search() without facet counts and share its result cache.
+        """
+        if backend not in SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search backend '{backend}', expected one of {SEARCH_BACKENDS}")
+
+        index = self._index
+        if index is None or not index.documents:
+            print("❌ Search engine not ready - no data indexed")
+            return [{"results": [], "facet_counts": {}, "documents_scored": 0, "cached": False} for _ in queries]
+        if backend != "tfidf":
+            return [self.search(q, top_k, backend, filters, facet_counts=False) for q in queries]
+
+        expanded = [self.expand_query(q) for q in queries]
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        pending: Dict[tuple, List[int]] = {}  # identical queries in one batch are scored once
+        for i, (query, query_expanded) in enumerate(zip(queries, expanded)):
+            key = QueryResultCache.key_for(query, query_expanded, backend, top_k, filters, False)
+            if key in pending:
+                pending[key].append(i)
+                continue
+            cached = self.result_cache.get(index.version, key)
+            if cached is not None:
+                responses[i] = {**cached, "cached": True}
+            else:
+                pending[key] = [i]
+
+        if pending:
+            start = time.perf_counter()
+            mask = index.facets.mask(filters)
+            rows = np.flatnonzero(mask) if mask is not None else None
+            documents_scored = len(rows) if rows is not None else len(index.documents)
+            firsts = [positions[0] for positions in pending.values()]
+
+            results = self._batch_top_results(index, [expanded[i] for i in firsts], top_k, 0.05, rows)
+            # Same fallback as search(): the original query where the expanded one found nothing
+            empty = [j for j, found in enumerate(results) if not found]
+            if empty:
+                fallback = self._batch_top_results(index, [queries[firsts[j]] for j in empty], top_k, 0.01, rows)
+                for j, found in zip(empty, fallback):
+                    results[j] = found
+
+            per_query_ms = (time.perf_counter() - start) * 1000 / len(pending)
+            for (key, positions), found in zip(pending.items(), results):
+                response = {"results": found, "facet_counts": {}, "documents_scored": documents_scored}
+                self.result_cache.put(index.version, key, response, per_query_ms)
+                for i in positions:
+                    responses[i] = {**response, "results": [dict(r) for r in found], "cached": False}
+
+        from_cache = sum(1 for r in responses if r["cached"])
+        print(f"📊 Batch of {len(queries)} queries: {len(pending)} scored, {from_cache} from cache")
+        return responses
+
+    def _batch_top_results(self, index: SearchIndex, texts: List[str], top_k: int, threshold: float,
+                           rows: Optional[np.ndarray] = None, block_rows: int = 65536) -> List[List[Dict[str, Any]]]:
+        """
+        Top-k per query from one (doc block x query matrix) product per block.
+        The product stays sparse, so each query only partitions the docs it
+        actually matched, merged into its running top-k.
+        """
+        queries_t = self._query_matrix(index, texts).T.tocsc()
+        doc_matrix = index.doc_matrix[rows] if rows is not None else index.doc_matrix
+        k = max(top_k, 0)
+        best_docs = [np.empty(0, dtype=np.int64) for _ in texts]
+        best_scores = [np.empty(0, dtype=np.float32) for _ in texts]
+
+        for start in range(0, doc_matrix.shape[0], block_rows):
+            block = (row_block(doc_matrix, start, min(start + block_rows, doc_matrix.shape[0])) @ queries_t).tocsc()
+            for j in range(len(texts)):
+                lo, hi = block.indptr[j], block.indptr[j + 1]
+                scores = block.data[lo:hi]
+                above = scores > threshold
+                docs = np.concatenate([best_docs[j], block.indices[lo:hi][above].astype(np.int64) + start])
+                scores = np.concatenate([best_scores[j], scores[above]])
+                # Kept ones come first in (score, doc) order and the block's docs are all later,
+                # so position order breaks ties by doc as in single-query search
+                keep = top_k_positions(scores, k)
+                best_docs[j], best_scores[j] = docs[keep], scores[keep]
+
+        results = []
+        for docs, scores in zip(best_docs, best_scores):
+            results.append([self._result(index, rows[d] if rows is not None else d, score)
+                            for d, score in zip(docs, scores)])
         return results
+
+    def _bm25_index(self, index: SearchIndex) -> BM25Index:
+        """Inverted index for this index version, built from the stored term counts if no append carried it over"""
+        if index.bm25 is None:
+            with self._bm25_lock:
+                if index.bm25 is None:
+                    index.bm25 = BM25Index(index.term_counts)
+                    with self._write_lock:
+                        # Appends published during the build had no posting lists to carry over
+                        current = self._index
+                        if current.bm25 is None and current.term_counts.base is index.term_counts.base:
+                            current.bm25 = index.bm25.appended(current.term_counts[len(index.documents):])
+        return index.bm25
+
+    def _search_bm25(self, index: SearchIndex, text: str, top_k: int, mask: Optional[np.ndarray] = None,
+                     with_matches: bool = True) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray]]:
+        """BM25 top-k over posting lists; the expanded query already contains the original terms"""
+        term_ids = self._get_vectorizer().transform([text.lower()]).indices
+        bm25 = self._bm25_index(index)
+        doc_ids, scores = bm25.top_k(term_ids, top_k, allowed=mask)
+
+        results = [self._result(index, idx, score) for idx, score in zip(doc_ids, scores)]
+        print(f"📊 Found {len(results)} BM25 results for query: '{text}'")
+        return results, bm25.matching_docs(term_ids, allowed=mask) if with_matches else None
+
+    @staticmethod
+    def _result(index: SearchIndex, idx: int, score: float) -> Dict[str, Any]:
+        return {
+            "metadata": index.metadata[idx],
+            "similarity_score": float(score),
+            "document_preview": index.documents[idx][:100] + "..."
+        }
+
+    @classmethod
+    def _top_results(cls, similarities: np.ndarray, top_k: int, threshold: float,
+                     index: SearchIndex, rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Top-k above threshold via a partition (O(n)) then a sort of just those k; ties go to the earlier doc"""
+        top = top_k_positions(similarities, top_k)
+
+        return [cls._result(index, rows[idx] if rows is not None else idx, similarities[idx])
+                for idx in top if similarities[idx] > threshold]
     
-    def find_cross_selling_opportunities(self, events: List[dict]) -> List[Dict[str, Any]]:
-        """Find product bundling opportunities"""
-        product_cooccurrence = {}
-        
-        for event in events:
-            if event.get("event_type") == "sale":
-                products = event.get("payload", {}).get("items", [])
-                if isinstance(products, list) and len(products) >= 2:
-                    # Track product pairs
-                    for i, product1 in enumerate(products):
-                        for j, product2 in enumerate(products):
-                            if i != j:
-                                pair = tuple(sorted([str(product1), str(product2)]))
-                                if pair not in product_cooccurrence:
-                                    product_cooccurrence[pair] = 0
-                                product_cooccurrence[pair] += 1
-        
-        # Convert to recommendations
-        opportunities = []
-        for (product1, product2), count in sorted(product_cooccurrence.items(), 
-                                                key=lambda x: x[1], reverse=True)[:10]:
-            if count >= 2:  # Minimum co-occurrence threshold
-                opportunities.append({
-                    "product_a": product1,
-                    "product_b": product2,
-                    "co_occurrence_count": count,
-                    "recommendation": f"Bundle {product1} with {product2} - purchased together {count} times"
-                })
-        
-        return opportunities
+    def find_cross_selling_opportunities(self, events: List[dict], min_count: int = 2, min_support: float = 0.0,
+                                         min_confidence: float = 0.0, min_lift: float = 0.0,
+                                         top_n: int = 10) -> List[Dict[str, Any]]:
+        """
+        Product bundling opportunities: pairs bought together in at least
+        min_count baskets, with support, confidence and lift from the
+        basket x product matrix (each pair counted once per basket)
+        """
+        pairs = MarketBasket.from_events(events).pairs(min_count=min_count, min_support=min_support,
+                                                       min_confidence=min_confidence, min_lift=min_lift,
+                                                       top_n=top_n)
+        return [cross_selling_opportunity(pair) for pair in pairs]
 
     def get_search_stats(self) -> Dict[str, Any]:
         """Get statistics about the search engine"""
-        if not self.fitted:
+        index = self._index
+        if index is None:
             return {"status": "not_fitted"}
         
-        feature_names = self.vectorizer.get_feature_names_out()
+        analyzer = self._get_vectorizer().build_analyzer()
+        sample_terms = []
+        for doc in index.documents[:20]:
+            sample_terms.extend(t for t in analyzer(doc) if t not in sample_terms)
         return {
             "status": "ready",
-            "documents_indexed": len(self.documents),
-            "unique_terms": len(feature_names),
-            "sample_terms": feature_names.tolist()[:20]
+            "index_version": index.version,
+            "documents_indexed": len(index.documents),
+            "unique_terms": int(np.count_nonzero(index.doc_freq)),
+            "documents_at_last_idf_rebase": index.docs_at_rebase,
+            "bm25": index.bm25.stats() if index.bm25 is not None else {"built": False},
+            "lsa": self.lsa_stats() or {"built": False},
+            "sample_terms": sample_terms[:20]
         }
\ No newline at end of file
@@ -0,0 +1,233 @@
+# analyzer/seasonality.py
+import re
+import zlib
+from functools import lru_cache
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import numpy as np
+
+from .time_buckets import TimeBuckets, parse_timestamps
+
+SEASONS = ["winter", "spring", "summer", "fall"]
+
+
+def stable_season(product: str) -> str:
+    """A season spread evenly over product names that is the same in every process (unlike hash())"""
+    return SEASONS[zlib.crc32(product.encode("utf-8")) % len(SEASONS)]
+
+
+class SeasonMatcher:
+    """
+    Season of the first season (in keyword table order) with a keyword
+    inside a lowercased product name. Every keyword is compiled into one
+    alternation that answers "any seasonal keyword at all?" in a single
+    scan; only names that have one go on to one compiled pattern per season,
+    in table order. Results are memoized per product name in a bounded LRU.
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]], memo_size: int = 65536):
+        self._any = self._compile(w for words in keywords.values() for w in words)
+        self._by_season = [(season, self._compile(words)) for season, words in keywords.items() if words]
+        self.keywords = len({w for words in keywords.values() for w in words})
+        self.match = lru_cache(maxsize=memo_size)(self._match)
+
+    @staticmethod
+    def _compile(words) -> Optional["re.Pattern"]:
+        words = list(dict.fromkeys(words))
+        return re.compile("|".join(map(re.escape, words))) if words else None
+
+    def _match(self, product: str) -> Optional[str]:
+        if self._any is None or not self._any.search(product):
+            return None
+        for season, pattern in self._by_season:
+            if pattern.search(product):
+                return season
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        info = self.match.cache_info()
+        return {"keywords": self.keywords, "memo_size": info.currsize, "memo_max": info.maxsize,
+                "hits": info.hits, "misses": info.misses}
+
+
+def _first_seen_codes(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Codes numbering the distinct keys in order of first appearance, and the first row of each"""
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    remap = np.empty(len(order), dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return remap[inverse.ravel()], first[order]
+
+
+class BasketFrame:
+    """
+    Sale events exploded once into columns: one row per basket item with
+    codes into the distinct products, timestamps and given seasons, plus
+    per-event amounts. The seasonality analyzers evaluate their rules per
+    distinct value and aggregate with grouped sums over these columns,
+    instead of walking every product of every event.
+    """
+
+    def __init__(self, products: list, timestamps: list, seasons: List[str], amount: np.ndarray,
+                 event_ts: np.ndarray, event_season: np.ndarray, item_event: np.ndarray, item_product: np.ndarray,
+                 share: np.ndarray):
+        self.products = products          # distinct basket items, as given
+        self.timestamps = timestamps      # distinct event timestamps
+        self.seasons = seasons            # distinct payload seasons, lowercased
+        self.amount = amount              # per sale event
+        self.event_ts = event_ts          # per sale event, code into timestamps
+        self.event_season = event_season  # per sale event, code into seasons
+        self.item_event = item_event      # per item row, the sale event it belongs to
+        self.item_product = item_product  # per item row, code into products
+        self.share = share                # per item row, the event amount split evenly over its items
+        self._times: Optional[TimeBuckets] = None
+
+    @classmethod
+    def from_events(cls, events: List[dict]) -> "BasketFrame":
+        product_ids: Dict[Any, int] = {}
+        ts_ids: Dict[Any, int] = {}
+        season_ids: Dict[str, int] = {}
+        amounts, event_ts, event_season, sizes, item_product = [], [], [], [], []
+        for event in events:
+            if event.get("event_type") != "sale":
+                continue
+            payload = event.get("payload", {})
+            items = payload.get("items", [])
+            items = items if isinstance(items, list) else [items]
+            try:
+                amounts.append(float(payload.get("amount") or 0))
+            except (TypeError, ValueError):
+                amounts.append(0.0)
+            event_ts.append(ts_ids.setdefault(event.get("ts", ""), len(ts_ids)))
+            event_season.append(season_ids.setdefault(str(payload.get("season") or "").lower(), len(season_ids)))
+            sizes.append(len(items))
+            for product in items:
+                item_product.append(product_ids.setdefault(product, len(product_ids)))
+
+        amount = np.array(amounts, dtype=np.float64)
+        sizes = np.array(sizes, dtype=np.int64)
+        item_event = np.repeat(np.arange(len(sizes)), sizes)
+        share = amount[item_event] / sizes[item_event]
+        return cls(list(product_ids), list(ts_ids), list(season_ids), amount,
+                   np.array(event_ts, dtype=np.int64), np.array(event_season, dtype=np.int64),
+                   item_event, np.array(item_product, dtype=np.int64), share)
+
+    def __len__(self) -> int:
+        return len(self.item_product)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pickled for the analysis workers: item_event and share are rebuilt from
+        # the basket sizes, and codes travel as int32
+        return {
+            "products": self.products, "timestamps": self.timestamps, "seasons": self.seasons,
+            "amount": self.amount, "event_ts": self.event_ts.astype(np.int32),
+            "event_season": self.event_season.astype(np.int32),
+            "sizes": np.bincount(self.item_event, minlength=len(self.amount)).astype(np.int32),
+            "item_product": self.item_product.astype(np.int32),
+        }
+
+    def __setstate__(self, state: Dict[str, Any]):
+        sizes = state["sizes"].astype(np.int64)
+        item_event = np.repeat(np.arange(len(sizes)), sizes)
+        self.__init__(state["products"], state["timestamps"], state["seasons"], state["amount"],
+                      state["event_ts"].astype(np.int64), state["event_season"].astype(np.int64), item_event,
+                      state["item_product"].astype(np.int64), state["amount"][item_event] / sizes[item_event])
+
+    @property
+    def times(self) -> TimeBuckets:
+        """The distinct timestamps parsed once, shared by every analyzer using this frame"""
+        if self._times is None:
+            self._times = parse_timestamps(self.timestamps)
+        return self._times
+
+    def item_seasons(self, product_season: Callable[[Any], Optional[str]],
+                     ts_seasons: Optional[List[str]] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Season of every item row: the event's own season unless it is empty
+        or "unknown", then product_season(product) per distinct product, and
+        where that gives None, the season of the event's timestamp
+        (ts_seasons, aligned with timestamps). Returns the season names and a
+        code into them per row.
+        """
+        names: Dict[str, int] = {}
+        given = np.array([names.setdefault(s, len(names)) if s not in ("", "unknown") else -1
+                          for s in self.seasons], dtype=np.int64)
+        by_product = np.array([-1 if s is None else names.setdefault(s, len(names))
+                               for s in map(product_season, self.products)], dtype=np.int64)
+        codes = given[self.event_season[self.item_event]]
+        missing = codes < 0
+        codes[missing] = by_product[self.item_product[missing]]
+        missing = codes < 0
+        if ts_seasons is not None and missing.any():
+            needed = self.event_ts[self.item_event[missing]]
+            by_ts = np.full(len(self.timestamps), -1, dtype=np.int64)
+            for ts in np.unique(needed).tolist():
+                by_ts[ts] = names.setdefault(ts_seasons[ts], len(names))
+            codes[missing] = by_ts[needed]
+        return list(names), codes
+
+    def product_trends(self, season_codes: np.ndarray, month_codes: np.ndarray, months: List[str],
+                       top: int, rows: Optional[np.ndarray] = None) -> Dict[int, Dict[Any, Dict[str, Any]]]:
+        """
+        The `top` products by revenue per season (ties to the first seen),
+        as {season code: {product: {"revenue", "transactions",
+        "monthly_trend"}}} with seasons and products in order of first
+        appearance. month_codes index months per item row; -1 leaves a row
+        out of the trend. Sums run in row order, like the loops they replace.
+        """
+        rows = np.arange(len(self)) if rows is None else rows
+        if len(rows) == 0:
+            return {}
+        group, first = _first_seen_codes(season_codes[rows] * len(self.products) + self.item_product[rows])
+        revenue = np.bincount(group, weights=self.share[rows])
+        transactions = np.bincount(group)
+        group_season = season_codes[rows][first]
+
+        chosen = []
+        for season in dict.fromkeys(group_season.tolist()):
+            candidates = np.flatnonzero(group_season == season)
+            best = candidates[np.lexsort((candidates, -revenue[candidates]))[:top]]
+            chosen.extend(np.sort(best).tolist())
+
+        # Monthly trends of the chosen products only
+        trend_rows = np.flatnonzero(np.isin(group, chosen) & (month_codes[rows] >= 0))
+        trend_group = group[trend_rows]
+        cell, cell_first = _first_seen_codes(trend_group * (len(months) + 1) + month_codes[rows][trend_rows])
+        cell_revenue = np.bincount(cell, weights=self.share[rows][trend_rows])
+        trends: Dict[int, Dict[str, float]] = {g: {} for g in chosen}
+        for c, r in enumerate(cell_first):
+            trends[int(trend_group[r])][months[month_codes[rows][trend_rows[r]]]] = float(cell_revenue[c])
+
+        result: Dict[int, Dict[Any, Dict[str, Any]]] = {}
+        for g in chosen:
+            result.setdefault(int(group_season[g]), {})[self.products[self.item_product[rows][first[g]]]] = {
+                "revenue": float(revenue[g]),
+                "transactions": int(transactions[g]),
+                "monthly_trend": trends[g]
+            }
+        return result
+
+    def month_codes(self, ts_months: List[str], skip_empty: bool) -> Tuple[List[str], np.ndarray]:
+        """
+        Month names and a code into them per item row, from the month of each
+        distinct timestamp (ts_months, aligned with timestamps). With
+        skip_empty, rows whose month is empty get -1.
+        """
+        names: Dict[str, int] = {}
+        by_ts = np.array([-1 if skip_empty and not m else names.setdefault(m, len(names)) for m in ts_months],
+                         dtype=np.int64)
+        return list(names), by_ts[self.event_ts[self.item_event]]
+
+    def monthly_totals(self, ts_months: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Revenue and sale count per month (events with no month left out), months in order of first sale"""
+        names: Dict[str, int] = {}
+        by_ts = np.array([names.setdefault(m, len(names)) if m else -1 for m in ts_months], dtype=np.int64)
+        events = np.flatnonzero(by_ts[self.event_ts] >= 0)
+        if len(events) == 0:
+            return {}
+        month, first = _first_seen_codes(by_ts[self.event_ts[events]])
+        revenue = np.bincount(month, weights=self.amount[events])
+        transactions = np.bincount(month)
+        month_names = list(names)
+        return {month_names[by_ts[self.event_ts[events[r]]]]: {"revenue": float(revenue[c]),
+                                                                "transactions": int(transactions[c])}
+                for c, r in enumerate(first)}
@@ -0,0 +1,152 @@
+# analyzer/sharded_search.py
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+from . import index_snapshot
+
+# (doc ids, scores, facet tallies or None) of one shard, best first
+ShardResult = Tuple[np.ndarray, np.ndarray, Optional[Dict[str, np.ndarray]]]
+
+
+def top_k_positions(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k highest scores, best first. Equal scores keep
+    position order, so the top-k of any row-range split merges back to
+    exactly the top-k of the whole.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if n > k:
+        kth = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth)
+        tied = np.flatnonzero(scores == kth)[:k - len(above)]
+        positions = np.concatenate([above, tied])
+    else:
+        positions = np.arange(n)
+    return positions[np.lexsort((positions, -scores[positions]))]
+
+
+def row_block(matrix, start: int, end: int):
+    """Rows start:end of a CSR matrix as a view on its arrays (scipy's slicing copies them)"""
+    from scipy import sparse
+    if isinstance(matrix, index_snapshot.ChainedRows):
+        return matrix.block(start, end)
+    lo, hi = matrix.indptr[start], matrix.indptr[end]
+    block = sparse.csr_matrix((end - start, matrix.shape[1]), dtype=matrix.dtype)
+    # Assigned rather than passed in: the constructor copies slices of larger arrays
+    block.data, block.indices = matrix.data[lo:hi], matrix.indices[lo:hi]
+    block.indptr = matrix.indptr[start:end + 1] - lo
+    return block
+
+
+def score_rows(doc_matrix, facets, start: int, end: int, mask: Optional[np.ndarray], query: np.ndarray,
+               top_k: int, threshold: float, tallies: bool) -> ShardResult:
+    """
+    Score rows start:end (those passing `mask`, if given) against a dense
+    query: the top-k above threshold, plus facet tallies of the rows that
+    match at all.
+    """
+    block = row_block(doc_matrix, start, end)
+    local = np.arange(end - start)
+    if mask is not None:
+        local = np.flatnonzero(mask[start:end])
+        block = block[local]
+    scores = block @ query
+    top = top_k_positions(scores, top_k)
+    top = top[scores[top] > threshold]
+    counts = None
+    if tallies:
+        # Widened to whole bytes of the facet bitmaps
+        base = start // 8 * 8
+        matched = np.zeros(end - base, dtype=bool)
+        matched[start - base + local[scores > 0]] = True
+        counts = facets.tallies(matched, base, end)
+    return start + local[top], scores[top], counts
+
+
+# Snapshot mapped by this worker process; replaced when a task names a newer one
+_worker_snapshot: Dict[str, Any] = {}
+
+
+def _load_worker_snapshot(root: str, name: str):
+    if _worker_snapshot.get("name") != name:
+        snapshot = index_snapshot.load_snapshot(root, name, mmap=True)
+        if snapshot is None:
+            raise RuntimeError(f"Index snapshot {name} is not readable under {root}")
+        _worker_snapshot.clear()
+        _worker_snapshot.update(name=name, doc_matrix=snapshot["doc_matrix"], facets=snapshot["facets"])
+    return _worker_snapshot
+
+
+def _warm_worker(root: str, name: str):
+    _load_worker_snapshot(root, name)
+
+
+def _score_shard(root: str, name: str, start: int, end: int, query_indices: np.ndarray, query_data: np.ndarray,
+                 top_k: int, threshold: float, filters: Optional[Dict[str, Any]], tallies: bool) -> ShardResult:
+    snapshot = _load_worker_snapshot(root, name)
+    doc_matrix, facets = snapshot["doc_matrix"], snapshot["facets"]
+    query = np.zeros(doc_matrix.shape[1], dtype=np.float32)
+    query[query_indices] = query_data
+    return score_rows(doc_matrix, facets, start, end, facets.mask(filters), query, top_k, threshold, tallies)
+
+
+class ShardedSearch:
+    """
+    TF-IDF scoring split across a process pool. Every worker memory-maps the
+    same index snapshot (one page-cache copy per host) and scores a
+    contiguous range of its rows; the coordinator merges the per-shard top-k
+    lists with a heap and sums the facet tallies. Workers are spawned rather
+    than forked, so they never inherit the server's threads or locks.
+    """
+
+    def __init__(self, n_shards: int, max_workers: Optional[int] = None):
+        self.n_shards = max(1, n_shards)
+        self.max_workers = max_workers or self.n_shards
+        self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self.queries = 0
+        self.failures = 0
+
+    def ranges(self, n_docs: int) -> List[Tuple[int, int]]:
+        bounds = np.linspace(0, n_docs, self.n_shards + 1).astype(int)
+        return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    def score(self, root: str, name: str, n_docs: int, query_vec, top_k: int, threshold: float,
+              filters: Optional[Dict[str, Any]], tallies: bool) -> List[ShardResult]:
+        """
+        Per-shard results for the first n_docs rows of snapshot `name`. Waits
+        for every shard, so call it from a worker thread, never on the event
+        loop.
+        """
+        futures = [self._pool.submit(_score_shard, root, name, start, end, query_vec.indices, query_vec.data,
+                                     top_k, threshold, filters, tallies)
+                   for start, end in self.ranges(n_docs)]
+        self.queries += 1
+        try:
+            return [f.result() for f in futures]
+        except Exception:
+            self.failures += 1
+            raise
+
+    @staticmethod
+    def merge(parts: List[ShardResult], top_k: int) -> List[Tuple[int, float]]:
+        """(doc id, score) of the overall top-k: a heap merge of lists already ordered by (-score, id)"""
+        streams = [zip((-scores).tolist(), ids.tolist()) for ids, scores, _ in parts]
+        return [(doc, -neg) for neg, doc in islice(heapq.merge(*streams), top_k)]
+
+    def warm(self, root: str, name: str):
+        """Have the workers map the snapshot before the first query needs it"""
+        for future in [self._pool.submit(_warm_worker, root, name) for _ in range(self.max_workers)]:
+            future.result()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"shards": self.n_shards, "workers": self.max_workers,
+                "queries": self.queries, "failures": self.failures}
@@ -0,0 +1,50 @@
+# analyzer/startup.py
+import time
+from typing import Any, Dict, Optional
+
+
+class StartupTracker:
+    """
+    Records how long each startup phase took and whether it succeeded, so
+    /health can say what the analyzer is still doing instead of the process
+    simply not answering. Times are milliseconds since the tracker was
+    created, which happens first thing at module import.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.first_request_ms: Optional[float] = None
+
+    def _now_ms(self) -> float:
+        return round((time.perf_counter() - self.t0) * 1000, 1)
+
+    def begin(self, phase: str):
+        self.phases[phase] = {"status": "running", "started_ms": self._now_ms()}
+
+    def finish(self, phase: str, status: str = "done", **info):
+        entry = self.phases.setdefault(phase, {"started_ms": self._now_ms()})
+        entry.update(info)
+        entry["status"] = status
+        entry["finished_ms"] = self._now_ms()
+        entry["duration_ms"] = round(entry["finished_ms"] - entry["started_ms"], 1)
+
+    def mark_request(self):
+        if self.first_request_ms is None:
+            self.first_request_ms = self._now_ms()
+
+    def phase(self) -> str:
+        """Overall readiness: starting -> warming -> ready (LLM probe never blocks readiness)"""
+        index = self.phases.get("index_warm", {}).get("status")
+        if "imports" not in self.phases or self.phases["imports"]["status"] != "done":
+            return "starting"
+        if index in (None, "running"):
+            return "warming"
+        return "ready"
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "phase": self.phase(),
+            "phases": self.phases,
+            "time_to_first_request_ms": self.first_request_ms,
+        }
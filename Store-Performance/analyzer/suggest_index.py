@@ -0,0 +1,205 @@
+# analyzer/suggest_index.py
+import re
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+SUGGEST_KINDS = ("product", "store", "store_type", "customer_category")
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def suggest_terms(event: dict) -> List[Tuple[str, str]]:
+    """(kind, value) pairs a sale event contributes to the suggestion index"""
+    payload = event.get("payload", {})
+    items = payload.get("items", [])
+    terms = [("product", str(p)) for p in (items if isinstance(items, list) else [items]) if p not in (None, "")]
+    for kind, value in (("store", event.get("store_id")), ("store_type", payload.get("store_type")),
+                        ("customer_category", payload.get("customer_category"))):
+        if value not in (None, ""):
+            terms.append((kind, str(value)))
+    return terms
+
+
+class _SuggestState:
+    """One immutable version of the suggestion index; readers take a reference and never see a partial update"""
+    __slots__ = ("version", "kinds", "values", "sales", "revenue", "words", "word_entries", "pending",
+                 "by_rank", "rank")
+
+    def __init__(self, version: int, kinds: np.ndarray, values: List[str], sales: np.ndarray, revenue: np.ndarray,
+                 words: np.ndarray, word_entries: np.ndarray, pending: List[Tuple[str, int]]):
+        self.version = version
+        self.kinds = kinds                # code into SUGGEST_KINDS per entry
+        self.values = values              # display value per entry
+        self.sales = sales                # sale events per entry
+        self.revenue = revenue            # summed amount of those events
+        self.words = words                # every word of every entry, sorted
+        self.word_entries = word_entries  # entry id of each sorted word
+        self.pending = pending            # (word, entry id) added since the last sort
+        # Entry ids best selling first (ties in insertion order), and each entry's position in that order
+        self.by_rank = np.lexsort((np.arange(len(sales)), -sales))
+        self.rank = np.empty(len(sales), dtype=np.int64)
+        self.rank[self.by_rank] = np.arange(len(sales))
+
+
+class SuggestIndex:
+    """
+    Typeahead over distinct product names, store ids, store types and
+    customer categories. Every word of a value is kept in a sorted array, so
+    the entries with a word starting with a prefix are one contiguous range
+    found by binary search; a multi-word query ANDs one such range per word.
+    Matches are ranked by sales volume.
+
+    Events only bump counters unless they bring new values. New words go to
+    a small unsorted tail that is scanned linearly and merged into the sorted
+    array once it reaches `merge_threshold` words.
+    """
+
+    def __init__(self, merge_threshold: int = 512):
+        self.merge_threshold = merge_threshold
+        self._lock = threading.Lock()
+        self._ids: Dict[Tuple[str, str], int] = {}  # (kind, lowercase value) -> entry id
+        self._state = _SuggestState(0, np.empty(0, dtype=np.int8), [], np.empty(0, dtype=np.int64),
+                                    np.empty(0, dtype=np.float64), np.empty(0, dtype="<U1"),
+                                    np.empty(0, dtype=np.int32), [])
+
+    def add_events(self, events: List[dict]) -> int:
+        """Count sale events into the index; returns how many new values were added"""
+        sales: Dict[int, int] = {}
+        revenue: Dict[int, float] = {}
+        with self._lock:
+            state = self._state
+            kinds, values, pending = list(state.kinds), list(state.values), list(state.pending)
+            for event in events:
+                if event.get("event_type") != "sale":
+                    continue
+                try:
+                    amount = float(event.get("payload", {}).get("amount") or 0)
+                except (TypeError, ValueError):
+                    amount = 0.0
+                counted = set()  # "Milk" and "milk" in one basket are one sale of one entry
+                for kind, value in suggest_terms(event):
+                    key = (kind, value.lower())
+                    entry = self._ids.get(key)
+                    if entry is None:
+                        entry = self._ids[key] = len(values)
+                        kinds.append(SUGGEST_KINDS.index(kind))
+                        values.append(value)
+                        pending.extend((word, entry) for word in set(_words(value)))
+                    elif entry in counted:
+                        continue
+                    counted.add(entry)
+                    sales[entry] = sales.get(entry, 0) + 1
+                    revenue[entry] = revenue.get(entry, 0.0) + amount
+
+            added = len(values) - len(state.values)
+            new_sales = np.concatenate([state.sales, np.zeros(added, dtype=np.int64)])
+            new_revenue = np.concatenate([state.revenue, np.zeros(added, dtype=np.float64)])
+            if sales:
+                ids = np.fromiter(sales.keys(), dtype=np.int64, count=len(sales))
+                new_sales[ids] += np.fromiter(sales.values(), dtype=np.int64, count=len(sales))
+                new_revenue[ids] += np.fromiter(revenue.values(), dtype=np.float64, count=len(revenue))
+
+            words, word_entries = state.words, state.word_entries
+            if len(pending) >= self.merge_threshold:
+                words, word_entries = self._merge(words, word_entries, pending)
+                pending = []
+            self._state = _SuggestState(state.version + 1, np.array(kinds, dtype=np.int8), values,
+                                        new_sales, new_revenue, words, word_entries, pending)
+        return added
+
+    @staticmethod
+    def _merge(words: np.ndarray, word_entries: np.ndarray, pending: List[Tuple[str, int]]):
+        if not pending:
+            return words, word_entries
+        merged_words = np.concatenate([words, np.array([w for w, _ in pending])])
+        merged_entries = np.concatenate([word_entries, np.array([e for _, e in pending], dtype=np.int32)])
+        order = np.argsort(merged_words, kind="stable")
+        return merged_words[order], merged_entries[order]
+
+    def _matching(self, state: _SuggestState, prefix: str) -> np.ndarray:
+        """Ids of entries with a word starting with `prefix`; an entry may repeat"""
+        lo = np.searchsorted(state.words, prefix, side="left")
+        hi = np.searchsorted(state.words, prefix + "\U0010ffff", side="left")
+        entries = state.word_entries[lo:hi]
+        extra = [entry for word, entry in state.pending if word.startswith(prefix)]
+        return np.concatenate([entries, np.array(extra, dtype=np.int32)]) if extra else entries
+
+    def suggest(self, query: str, limit: int = 10, kinds: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Completions whose words start with the query's words (the last one
+        may be partial), best selling first; ties keep insertion order.
+        """
+        prefixes = _words(query)
+        state = self._state
+        n = len(state.values)
+        if not prefixes or limit <= 0 or not n:
+            return []
+        unknown = set(kinds or []) - set(SUGGEST_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown suggestion kinds {sorted(unknown)}, expected {list(SUGGEST_KINDS)}")
+
+        candidates = self._matching(state, prefixes[0])
+        hits = None
+        if len(prefixes) > 1 or kinds:
+            hits = np.zeros(n, dtype=bool)
+            hits[candidates] = True
+            for prefix in prefixes[1:]:
+                also = np.zeros(n, dtype=bool)
+                also[self._matching(state, prefix)] = True
+                hits &= also
+            if kinds:
+                hits &= np.isin(state.kinds, [SUGGEST_KINDS.index(k) for k in kinds])
+            candidates = np.flatnonzero(hits)
+
+        if len(candidates) * 16 > n:
+            # A broad prefix: walk entries best selling first until enough of them match
+            if hits is None:
+                hits = np.zeros(n, dtype=bool)
+                hits[candidates] = True
+            top, start, chunk = [], 0, 8 * limit
+            while start < n and len(top) < limit:
+                block = state.by_rank[start:start + chunk]
+                top.extend(block[hits[block]][:limit - len(top)])
+                start, chunk = start + chunk, chunk * 2
+        else:
+            top = state.by_rank[np.unique(state.rank[candidates])[:limit]]
+
+        return [{
+            "value": state.values[e],
+            "kind": SUGGEST_KINDS[state.kinds[e]],
+            "sales": int(state.sales[e]),
+            "revenue": round(float(state.revenue[e]), 2),
+        } for e in top]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Entries and counters, for saving alongside an index snapshot"""
+        state = self._state
+        return {"kinds": [SUGGEST_KINDS[k] for k in state.kinds], "values": list(state.values),
+                "sales": state.sales.tolist(), "revenue": state.revenue.tolist()}
+
+    @classmethod
+    def from_dict(cls, saved: Dict[str, Any], merge_threshold: int = 512) -> "SuggestIndex":
+        index = cls(merge_threshold)
+        values = list(saved["values"])
+        index._ids = {(kind, value.lower()): i for i, (kind, value) in enumerate(zip(saved["kinds"], values))}
+        pending = [(word, i) for i, value in enumerate(values) for word in set(_words(value))]
+        words, word_entries = cls._merge(np.empty(0, dtype="<U1"), np.empty(0, dtype=np.int32), pending)
+        index._state = _SuggestState(1, np.array([SUGGEST_KINDS.index(k) for k in saved["kinds"]], dtype=np.int8),
+                                     values, np.array(saved["sales"], dtype=np.int64),
+                                     np.array(saved["revenue"], dtype=np.float64), words, word_entries, [])
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        state = self._state
+        return {
+            "version": state.version,
+            "entries": len(state.values),
+            "by_kind": {kind: int((state.kinds == i).sum()) for i, kind in enumerate(SUGGEST_KINDS)},
+            "indexed_words": int(len(state.words)),
+            "pending_words": len(state.pending),
+        }
@@ -0,0 +1,122 @@
+# analyzer/time_buckets.py
+import threading
+import time
+from itertools import islice
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+
+MONTH_NAMES = ["", "January", "February", "March", "April", "May", "June", "July",
+               "August", "September", "October", "November", "December"]
+# Season of each month number; 0 is an unparsed timestamp
+MONTH_SEASONS = ["unknown", "winter", "winter", "spring", "spring", "spring", "summer",
+                 "summer", "summer", "fall", "fall", "fall", "winter"]
+
+
+class TimeBuckets:
+    """
+    A parsed column of timestamps: the month as written (1-12, 0 where the
+    value is not an ISO 8601 string) and the UTC instant in epoch seconds
+    (NaN where unparsed; timestamps without an offset are taken as UTC).
+    """
+
+    def __init__(self, month: np.ndarray, epoch: np.ndarray):
+        self.month = month
+        self.epoch = epoch
+
+    def __len__(self) -> int:
+        return len(self.month)
+
+    @property
+    def parsed(self) -> np.ndarray:
+        return self.month > 0
+
+    def month_names(self, missing: str = "") -> List[str]:
+        names = MONTH_NAMES[:]
+        names[0] = missing
+        return [names[m] for m in self.month.tolist()]
+
+    def seasons(self) -> List[str]:
+        return [MONTH_SEASONS[m] for m in self.month.tolist()]
+
+    def age_days(self, now: Optional[float] = None) -> np.ndarray:
+        """Days since each timestamp (NaN where unparsed)"""
+        return ((time.time() if now is None else now) - self.epoch) / 86400.0
+
+
+class TimestampParser:
+    """
+    Parses timestamps a column at a time: the distinct strings not seen
+    recently go through one vectorized ISO 8601 parse, and the results are
+    kept in a bounded cache (oldest first out), since the same events are
+    analyzed again by /analyze, /chat and the per-event helpers.
+    """
+
+    def __init__(self, cache_size: int = 200000):
+        self.cache_size = cache_size
+        self._cache: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.parsed = 0
+
+    @staticmethod
+    def _parse(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        import pandas as pd
+        instants = pd.to_datetime(pd.Series(strings, dtype=object), format="ISO8601", errors="coerce", utc=True)
+        valid = instants.notna().to_numpy()
+        epoch = np.full(len(strings), np.nan)
+        # Whatever unit pandas picked for the column
+        epoch[valid] = (instants[valid] - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()
+        # The month as written (YYYY-MM, YYYY-M or YYYYMM): converting to UTC would move timestamps
+        # with an offset across month ends. Other shapes pandas accepts (a bare year, leading blanks) have none
+        digits = np.array(strings, dtype="U8").view(np.uint32).reshape(len(strings), 8).astype(np.int64) - ord("0")
+        is_digit = (digits >= 0) & (digits <= 9)
+        dashed = digits[:, 4] == ord("-") - ord("0")
+        month = np.select(
+            [dashed & is_digit[:, 5] & is_digit[:, 6] & ~is_digit[:, 7], dashed & is_digit[:, 5] & ~is_digit[:, 6],
+             ~dashed & is_digit[:, 4] & is_digit[:, 5]],
+            [digits[:, 5] * 10 + digits[:, 6], digits[:, 5], digits[:, 4] * 10 + digits[:, 5]], 0)
+        month = np.where(valid & is_digit[:, :4].all(axis=1) & (month >= 1) & (month <= 12), month, 0).astype(np.int8)
+        return month, epoch
+
+    def parse(self, values: Sequence) -> TimeBuckets:
+        """Month and instant of every value; anything but a parseable string is unparsed"""
+        ids: Dict[Any, int] = {}
+        codes = np.fromiter((ids.setdefault(v, len(ids)) if isinstance(v, str) else -1 for v in values),
+                            dtype=np.int64, count=len(values))
+        distinct = list(ids)
+        month = np.zeros(len(distinct) + 1, dtype=np.int8)    # the last slot is for non-strings
+        epoch = np.full(len(distinct) + 1, np.nan)
+        with self._lock:
+            cache = self._cache
+            missing = []
+            for i, value in enumerate(distinct):
+                found = cache.get(value)
+                if found is None:
+                    missing.append(i)
+                else:
+                    month[i], epoch[i] = found
+            self.hits += len(distinct) - len(missing)
+            if missing:
+                new_month, new_epoch = self._parse([distinct[i] for i in missing])
+                month[missing], epoch[missing] = new_month, new_epoch
+                self.parsed += len(missing)
+                if self.cache_size > 0:
+                    keep = missing[-self.cache_size:]
+                    overflow = len(cache) + len(keep) - self.cache_size
+                    for old in list(islice(cache, max(overflow, 0))):
+                        del cache[old]
+                    cache.update(zip((distinct[i] for i in keep), zip(month[keep].tolist(), epoch[keep].tolist())))
+        return TimeBuckets(month[codes], epoch[codes])
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.parsed
+        return {"cached": len(self._cache), "cache_size": self.cache_size, "hits": self.hits, "parsed": self.parsed,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0}
+
+
+# Shared by every analyzer code path that buckets events by time
+timestamp_parser = TimestampParser()
+
+
+def parse_timestamps(values: Sequence) -> TimeBuckets:
+    return timestamp_parser.parse(values)
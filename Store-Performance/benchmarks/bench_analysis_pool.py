@@ -0,0 +1,82 @@
+# benchmarks/bench_analysis_pool.py
+"""
+Event-loop responsiveness while /analyze crunches a batch: a heartbeat
+coroutine stands in for the lightweight endpoints (/health, search, chat)
+and records how late each of its ticks fires while the batch is analyzed
+inline on the loop, on a thread, or in the process pool. Also reports how
+much smaller the BasketFrame sent to a worker pickles than the events.
+
+    python -m benchmarks.bench_analysis_pool --events 200000 --batches 2
+"""
+import argparse
+import asyncio
+import pickle
+import time
+
+import numpy as np
+
+from analyzer.analysis_pool import AnalysisPool, analyze_frame
+from analyzer.seasonality import BasketFrame
+from benchmarks.synthetic_events import make_events
+
+TICK_S = 0.005
+
+
+async def heartbeat(lateness: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_S)
+        lateness.append((time.perf_counter() - start - TICK_S) * 1000)
+
+
+async def under_load(analyze, frames: list) -> tuple:
+    """Heartbeat lateness (ms) while the batches are analyzed one after another"""
+    lateness, stop = [], asyncio.Event()
+    beat = asyncio.ensure_future(heartbeat(lateness, stop))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    for frame in frames:
+        await analyze(frame)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return np.array(lateness), elapsed
+
+
+async def run(args):
+    events = make_events(args.events)
+    frame = BasketFrame.from_events(events)
+    frames = [frame] * args.batches
+    print(f"\n⚙️ {args.batches} x {len(events):,} events, {len(frame):,} basket items")
+    print(f"   pickled: events {len(pickle.dumps(events)) / 1e6:.1f} MB, "
+          f"BasketFrame {len(pickle.dumps(frame)) / 1e6:.1f} MB")
+
+    async def inline(f):
+        analyze_frame(f, True)
+
+    thread_pool = AnalysisPool(0)
+    process_pool = AnalysisPool(args.workers)
+    # Workers started and analyzers built before timing, as the service's startup does
+    await process_pool.run(BasketFrame.from_events([]), False)
+
+    modes = [("inline", inline),
+             ("thread", lambda f: thread_pool.run(f, True)),
+             (f"{args.workers} process(es)", lambda f: process_pool.run(f, True))]
+    for name, analyze in modes:
+        lateness, elapsed = await under_load(analyze, frames)
+        print(f"   {name:14}: {elapsed:6.2f} s   heartbeat lateness p50 {np.percentile(lateness, 50):7.1f} ms  "
+              f"p99 {np.percentile(lateness, 99):7.1f} ms  max {lateness.max():7.1f} ms  ({len(lateness)} ticks)")
+    process_pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--batches", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_index_snapshot.py
+"""
+Index load time and per-worker memory when several analyzer workers load the
+same on-disk snapshot, memory-mapped versus read into private memory, and
+again once each worker has appended a batch of new events.
+
+    python -m benchmarks.bench_index_snapshot --size 1000000 --workers 4
+"""
+import argparse
+import multiprocessing
+import shutil
+import tempfile
+import time
+
+from analyzer.retrieval_system import SemanticSearchEngine
+from analyzer.index_snapshot import process_memory_mb
+from benchmarks.synthetic_events import make_events
+
+
+def worker(root: str, mmap: bool, ready, results):
+    import scipy.sparse  # noqa: F401  (import cost is not load cost)
+    engine = SemanticSearchEngine()
+    start = time.perf_counter()
+    engine.load_snapshot(root, mmap=mmap)
+    load_ms = (time.perf_counter() - start) * 1000
+    # A query touches every page of the doc matrix
+    engine.search_similar_patterns("student mobile payment", top_k=10)
+    loaded = process_memory_mb()
+    # Appended rows go to a separate tail; the mapped pages stay shared
+    engine.append_events(make_events(1000, seed=7))
+    engine.search_similar_patterns("student mobile payment", top_k=10)
+    results.put((load_ms, loaded, process_memory_mb()))
+    ready.wait()  # stay alive until every worker has measured, so pages are shared
+
+
+def run_workers(root: str, mmap: bool, n: int) -> list:
+    ctx = multiprocessing.get_context("spawn")
+    ready, results = ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(root, mmap, ready, results)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    measured = [results.get() for _ in procs]
+    ready.set()
+    for p in procs:
+        p.join()
+    return measured
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="index-snapshot-")
+    try:
+        engine = SemanticSearchEngine()
+        start = time.perf_counter()
+        engine.index_events(make_events(args.size))
+        print(f"\n📚 {args.size:,} docs indexed in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        engine.save_snapshot(root)
+        print(f"💾 snapshot saved in {(time.perf_counter() - start) * 1000:.0f} ms")
+        del engine
+
+        for mmap in (True, False):
+            measured = run_workers(root, mmap, args.workers)
+            load = sorted(m[0] for m in measured)
+            rss = [m[1].get("rss_mb") or 0 for m in measured]
+            shared = [m[1].get("shared_mb") or 0 for m in measured]
+            private_after = [(m[2].get("rss_mb") or 0) - (m[2].get("shared_mb") or 0) for m in measured]
+            print(f"   {'mmap' if mmap else 'read':5}: load p50 {load[len(load) // 2]:8.1f} ms   "
+                  f"rss/worker {sum(rss) / len(rss):7.1f} MB   shared/worker {sum(shared) / len(shared):7.1f} MB   "
+                  f"private/worker {sum(r - s for r, s in zip(rss, shared)) / len(rss):7.1f} MB   "
+                  f"after an append {sum(private_after) / len(private_after):7.1f} MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_lsa.py
+"""
+Recall and latency of the dense LSA backend (float32 and int8) against
+exact sparse TF-IDF scoring.
+
+The synthetic corpus has thousands of near-identical documents, so recall@k
+is tolerance-based: an LSA hit counts if its exact TF-IDF score is within 1%
+of the k-th best exact score. The score ratio is the mean exact score of the
+LSA top-k over that of the exact top-k.
+
+    python -m benchmarks.bench_lsa --size 1000000 --components 32 64
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from analyzer.retrieval_system import SemanticSearchEngine
+from benchmarks.synthetic_events import make_events
+
+QUERIES = ["student mobile payment", "store_chicago product_milk", "product_butter product_bread",
+           "payment_cash season_summer", "customer_professional promotion_none", "product_coffee product_tea"]
+
+
+def quality_at_k(engine: SemanticSearchEngine, query: str, k: int) -> tuple:
+    index = engine._index
+    expanded = engine.expand_query(query)
+    exact = engine._score(index, expanded)
+    best = np.partition(exact, len(exact) - k)[len(exact) - k:]
+    lsa = engine._lsa_index(index).score(engine._query_vector(index, expanded))
+    top = np.argpartition(-lsa, k - 1)[:k]
+    recall = float(np.mean(exact[top] >= best.min() * 0.99))
+    return recall, float(exact[top].mean() / best.mean())
+
+
+def timed(fn, repeats: int) -> list:
+    timings = []
+    for _ in range(repeats):
+        for q in QUERIES:
+            start = time.perf_counter()
+            fn(q)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--components", type=int, nargs="+", default=[32, 64])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = SemanticSearchEngine(result_cache_size=0)  # measure scoring, not the result cache
+    engine.index_events(make_events(args.size))
+    print(f"\n📚 {args.size:,} docs, sparse matrix {engine.doc_matrix.tocsr().data.nbytes / 1e6:.1f} MB")
+    sparse = timed(lambda q: engine.search(q, top_k=args.k, facet_counts=False), args.repeats)
+    print(f"   tfidf sparse       : p50 {statistics.median(sparse):7.2f} ms   recall 1.000   score ratio 1.000")
+
+    for n_components in args.components:
+        for quantize in (False, True):
+            start = time.perf_counter()
+            stats = engine.build_lsa(n_components=n_components, quantize=quantize)
+            fit_s = time.perf_counter() - start
+            lsa = timed(lambda q: engine.search(q, top_k=args.k, backend="lsa", facet_counts=False), args.repeats)
+            quality = [quality_at_k(engine, q, args.k) for q in QUERIES]
+            recall = statistics.mean(r for r, _ in quality)
+            ratio = statistics.mean(r for _, r in quality)
+            label = f"lsa k={n_components} {'int8' if quantize else 'f32'}"
+            print(f"   {label:19}: p50 {statistics.median(lsa):7.2f} ms   recall {recall:.3f}   score ratio {ratio:.3f}   "
+                  f"vectors {stats['vector_memory_mb']:7.1f} MB   fit {fit_s:5.1f}s   "
+                  f"explained variance {stats['explained_variance']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# benchmarks/bench_search_batch.py
+"""
+Queries/sec of SemanticSearchEngine.search_batch (what /semantic-search/batch
+runs) against one search() call per query (what /semantic-search runs).
+The result cache is off so every query is scored.
+
+    python -m benchmarks.bench_search_batch --size 1000000 --batch-sizes 10 50 100
+"""
+import argparse
+import random
+import time
+
+from analyzer.retrieval_system import SemanticSearchEngine
+from benchmarks.synthetic_events import make_events, CITIES, PRODUCTS, CUSTOMER_CATEGORIES
+
+
+def make_queries(n: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        parts = [f"store_{rng.choice(CITIES).lower()}", f"product_{rng.choice(PRODUCTS).lower()}",
+                 f"customer_{rng.choice(CUSTOMER_CATEGORIES).lower()}"]
+        queries.append(" ".join(rng.sample(parts, rng.randint(1, 3))))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = SemanticSearchEngine(result_cache_size=0)
+    engine.index_events(make_events(args.size))
+    queries = make_queries(args.queries)
+    print(f"\n📚 {args.size:,} docs, {len(queries)} distinct queries")
+
+    start = time.perf_counter()
+    for q in queries:
+        engine.search(q, top_k=10, facet_counts=False)
+    single_qps = len(queries) / (time.perf_counter() - start)
+    print(f"   single        : {single_qps:8.1f} queries/s")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(queries), batch_size):
+            engine.search_batch(queries[i:i + batch_size], top_k=10)
+        qps = len(queries) / (time.perf_counter() - start)
+        print(f"   batch of {batch_size:<4} : {qps:8.1f} queries/s   ({qps / single_qps:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
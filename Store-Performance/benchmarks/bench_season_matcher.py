@@ -0,0 +1,71 @@
+# benchmarks/bench_season_matcher.py
+"""
+Product -> season keyword classification over basket items: the previous
+`any(keyword in product)` scan per season and item, versus SeasonMatcher's
+single compiled regex, without and with its memo. Names are drawn from a
+catalog with a long tail, like real basket items.
+
+    python -m benchmarks.bench_season_matcher --items 1000000 --catalog 100000
+"""
+import argparse
+import random
+import time
+
+from analyzer.advanced_analysis import AdvancedPatternAnalyzer
+from analyzer.seasonality import SeasonMatcher
+from benchmarks.synthetic_events import PRODUCTS
+
+WORDS = ["organic", "classic", "family", "pack", "mini", "deluxe", "fresh", "large", "value", "premium"]
+
+
+def keyword_scan(keywords: dict, product: str):
+    """The previous per-item classification"""
+    for season, words in keywords.items():
+        if any(keyword in product for keyword in words):
+            return season
+    return None
+
+
+def make_items(n_items: int, n_catalog: int, keywords: dict, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    seasonal = [k for words in keywords.values() for k in words]
+    catalog = []
+    for _ in range(n_catalog):
+        base = rng.choice(seasonal) if rng.random() < 0.2 else rng.choice(PRODUCTS).lower()
+        catalog.append(f"{rng.choice(WORDS)} {base} {rng.choice(WORDS)} {rng.randint(1, 999)}")
+    # Skewed popularity: the first names of the catalog make up most of the items
+    return [catalog[int(n_catalog * rng.random() ** 4)] for _ in range(n_items)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--catalog", type=int, default=100_000)
+    args = parser.parse_args()
+
+    keywords = AdvancedPatternAnalyzer().seasonal_keywords
+    items = make_items(args.items, args.catalog, keywords)
+    print(f"\n🏷️ {len(items):,} basket items, {len(set(items)):,} distinct names, "
+          f"{sum(map(len, keywords.values()))} keywords")
+
+    start = time.perf_counter()
+    legacy = [keyword_scan(keywords, p) for p in items]
+    legacy_s = time.perf_counter() - start
+
+    matcher = SeasonMatcher(keywords)
+    start = time.perf_counter()
+    compiled = [matcher._match(p) for p in items]
+    compiled_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    memoized = [matcher.match(p) for p in items]
+    memo_s = time.perf_counter() - start
+
+    print(f"   keyword scan    : {legacy_s:6.2f} s")
+    print(f"   compiled regex  : {compiled_s:6.2f} s   {legacy_s / compiled_s:.1f}x")
+    print(f"   regex + memo    : {memo_s:6.2f} s   {legacy_s / memo_s:.1f}x   {matcher.stats()}")
+    print(f"   same seasons    : {legacy == compiled == memoized}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_seasonality.py
+"""
+Seasonality analysis as /analyze runs it: the baskets exploded once into a
+BasketFrame shared by both analyzers, versus each analyzer exploding them
+on its own.
+
+    python -m benchmarks.bench_seasonality --sizes 10000 200000
+"""
+import argparse
+import time
+
+from analyzer.advanced_analysis import AdvancedPatternAnalyzer
+from analyzer.enhanced_llm_analysis import AdvancedPatternAnalyzer as EnhancedPatternAnalyzer
+from analyzer.seasonality import BasketFrame
+from benchmarks.synthetic_events import make_events
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 200000])
+    parser.add_argument("--unseasoned", type=float, default=0.3,
+                        help="share of events without a season, classified from products and timestamps")
+    args = parser.parse_args()
+
+    advanced, enhanced = AdvancedPatternAnalyzer(), EnhancedPatternAnalyzer()
+    for size in args.sizes:
+        events = make_events(size)
+        for i, event in enumerate(events):
+            if i % 100 < args.unseasoned * 100:
+                event["payload"]["season"] = ""
+
+        _, separate_a = timed(advanced.detect_product_seasonality, events)
+        _, separate_b = timed(enhanced.detect_product_seasonality, events)
+        frame, frame_s = timed(BasketFrame.from_events, events)
+        result_a, shared_a = timed(advanced.detect_product_seasonality, events, frame)
+        result_b, shared_b = timed(enhanced.detect_product_seasonality, events, frame)
+
+        print(f"\n📅 {size:,} events, {len(frame):,} basket items, {len(frame.products)} products")
+        print(f"   separate frames : {separate_a + separate_b:6.3f} s")
+        print(f"   shared frame    : {frame_s + shared_a + shared_b:6.3f} s   "
+              f"(explode {frame_s:.3f} s, advanced {shared_a:.3f} s, enhanced {shared_b:.3f} s)")
+        print(f"   insights        : {len(result_a['insights'])} advanced, {len(result_b['insights'])} enhanced")
+
+
+if __name__ == "__main__":
+    main()
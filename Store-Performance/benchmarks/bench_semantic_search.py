@@ -0,0 +1,99 @@
+# benchmarks/bench_semantic_search.py
+"""
+Query latency of SemanticSearchEngine against the previous implementation,
+which re-transformed every document and ran a full argsort per query, the
+BM25 inverted-index backend, repeated queries served by the result cache,
+and the cost of appending a batch of new events versus a full rebuild.
+
+    python -m benchmarks.bench_semantic_search --sizes 100000 1000000
+"""
+import argparse
+import time
+import statistics
+
+import numpy as np
+
+from analyzer.retrieval_system import SemanticSearchEngine
+from benchmarks.synthetic_events import make_events
+
+QUERIES = ["winter butter discount", "holiday shopping patterns", "premium customer",
+           "summer ice cream", "student mobile payment", "bread milk eggs"]
+FILTERS = {"store_id": "Chicago", "season": "Winter", "amount_min": 50}
+
+
+def legacy_search(engine: SemanticSearchEngine, query: str, top_k: int = 10):
+    """The pre-cache query path: transform the whole corpus, cosine, argsort"""
+    from sklearn.metrics.pairwise import cosine_similarity
+    idf = engine._index.idf
+    query_vec = engine._weight(engine._get_vectorizer().transform([query.lower()]), idf)
+    doc_vecs = engine._weight(engine._get_vectorizer().transform(engine.documents), idf)
+    similarities = cosine_similarity(query_vec, doc_vecs).flatten()
+    return np.argsort(similarities)[-top_k:][::-1]
+
+
+def time_queries(fn, repeats: int) -> list:
+    timings = []
+    for _ in range(repeats):
+        for q in QUERIES:
+            start = time.perf_counter()
+            fn(q)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true", help="legacy path is very slow at 1M docs")
+    parser.add_argument("--append-batch", type=int, default=1000, help="events per incremental append")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        events = make_events(size)
+        engine = SemanticSearchEngine(result_cache_size=0)  # measure scoring, not the result cache
+        start = time.perf_counter()
+        engine.index_events(events)
+        print(f"\n📚 {size:,} docs indexed in {time.perf_counter() - start:.1f}s "
+              f"(matrix {engine.doc_matrix.tocsr().data.nbytes / 1e6:.1f} MB float32)")
+
+        expanded = {q: engine.expand_query(q) for q in QUERIES}
+        cached = time_queries(lambda q: engine.search_similar_patterns(q, top_k=10), args.repeats)
+        print(f"   cached matrix : p50 {statistics.median(cached):8.2f} ms   max {max(cached):8.2f} ms")
+
+        start = time.perf_counter()
+        engine.search_similar_patterns(QUERIES[0], backend="bm25")  # builds the posting lists
+        print(f"   bm25 build    : {(time.perf_counter() - start) * 1000:8.1f} ms")
+        bm25 = time_queries(lambda q: engine.search_similar_patterns(q, top_k=10, backend="bm25"), args.repeats)
+        print(f"   bm25 postings : p50 {statistics.median(bm25):8.2f} ms   max {max(bm25):8.2f} ms")
+
+        for backend in ("tfidf", "bm25"):
+            faceted = time_queries(lambda q: engine.search(q, top_k=10, backend=backend, filters=FILTERS), args.repeats)
+            print(f"   {backend + ' filtered':14}: p50 {statistics.median(faceted):8.2f} ms   max {max(faceted):8.2f} ms"
+                  f"   (with facet counts)")
+
+        if not args.skip_legacy:
+            legacy = time_queries(lambda q: legacy_search(engine, expanded[q]), 1)
+            print(f"   legacy        : p50 {statistics.median(legacy):8.2f} ms   max {max(legacy):8.2f} ms"
+                  f"   ({statistics.median(legacy) / statistics.median(cached):.0f}x slower)")
+
+        engine.result_cache.max_size = 1024
+        time_queries(lambda q: engine.search(q, top_k=10, filters=FILTERS), 1)  # fill the cache
+        repeated = time_queries(lambda q: engine.search(q, top_k=10, filters=FILTERS), args.repeats)
+        stats = engine.result_cache.stats()
+        print(f"   result cache  : p50 {statistics.median(repeated):8.3f} ms   hit ratio {stats['hit_ratio']:.2f}"
+              f"   saved {stats['avg_saved_ms_per_hit']:.2f} ms/hit")
+
+        new_events = make_events(args.append_batch, seed=7)
+        start = time.perf_counter()
+        engine.append_events(new_events)
+        appended = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        SemanticSearchEngine().index_events(events + new_events)
+        rebuilt = (time.perf_counter() - start) * 1000
+        print(f"   append {args.append_batch:,}  : {appended:8.1f} ms   full rebuild {rebuilt:8.1f} ms"
+              f"   ({rebuilt / appended:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_sharded_search.py
+"""
+tfidf query latency with the corpus split across worker processes versus
+the single-process engine, checking that every query returns exactly the
+same results. Speedup is bounded by the cores available.
+
+    python -m benchmarks.bench_sharded_search --size 1000000 --shards 2 4 8
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from analyzer.retrieval_system import SemanticSearchEngine
+from benchmarks.synthetic_events import make_events
+from benchmarks.bench_search_batch import make_queries
+
+
+def timed_search(engine: SemanticSearchEngine, queries: list):
+    timings, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        found = engine.search(q, top_k=10)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(([(r["metadata"]["event_id"], r["similarity_score"]) for r in found["results"]],
+                        found["facet_counts"]))
+    return timings, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_shards_")
+    try:
+        engine = SemanticSearchEngine(result_cache_size=0)
+        engine.index_events(make_events(args.size))
+        engine.save_snapshot(root)
+        queries = make_queries(args.queries)
+        print(f"\n📚 {args.size:,} docs, {len(queries)} queries, {os.cpu_count()} CPUs")
+
+        base_timings, expected = timed_search(engine, queries)
+        base_p50 = np.percentile(base_timings, 50)
+        print(f"   in-process : p50 {base_p50:6.1f} ms   p95 {np.percentile(base_timings, 95):6.1f} ms")
+
+        for shards in args.shards:
+            engine.enable_sharding(shards)
+            timed_search(engine, queries[:5])  # first query per worker maps the snapshot
+            timings, results = timed_search(engine, queries)
+            engine.disable_sharding()
+            identical = sum(1 for a, b in zip(expected, results) if a == b)
+            p50 = np.percentile(timings, 50)
+            print(f"   {shards} shards   : p50 {p50:6.1f} ms   p95 {np.percentile(timings, 95):6.1f} ms   "
+                  f"({base_p50 / p50:.1f}x)   identical {identical}/{len(queries)}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
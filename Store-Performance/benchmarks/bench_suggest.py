@@ -0,0 +1,59 @@
+# benchmarks/bench_suggest.py
+"""
+Latency of SuggestIndex.suggest (what /suggest runs) over a large product
+catalog, for typed prefixes of 1 to 6 characters, plus the cost of
+appending a batch of events.
+
+    python -m benchmarks.bench_suggest --events 300000 --products 100000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from analyzer.suggest_index import SuggestIndex
+from benchmarks.synthetic_events import make_events, PRODUCTS
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=300_000)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    events = make_events(args.events, n_products=args.products)
+    index = SuggestIndex()
+    start = time.perf_counter()
+    index.add_events(events[:-1000])
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    index.add_events(events[-1000:])
+    append_ms = (time.perf_counter() - start) * 1000
+    print(f"\n📚 {args.events:,} events, {index.stats()['entries']:,} distinct values "
+          f"(built in {build_s:.1f} s, +1k events in {append_ms:.1f} ms)")
+
+    rng = random.Random(7)
+    names = PRODUCTS + [f"Product {i}" for i in range(args.products - len(PRODUCTS))]
+    for length in (1, 2, 3, 6):
+        queries = [rng.choice(names).lower()[:length] for _ in range(args.queries)]
+        timings = []
+        for q in queries:
+            t = time.perf_counter()
+            index.suggest(q, limit=10)
+            timings.append((time.perf_counter() - t) * 1000)
+        print(f"   prefix len {length}: p50 {np.percentile(timings, 50):.3f} ms   p99 {np.percentile(timings, 99):.3f} ms")
+
+    q = "product 12"
+    timings = []
+    for _ in range(args.queries):
+        t = time.perf_counter()
+        index.suggest(q, limit=10)
+        timings.append((time.perf_counter() - t) * 1000)
+    print(f"   '{q}'  : p50 {np.percentile(timings, 50):.3f} ms   p99 {np.percentile(timings, 99):.3f} ms")
+    print(f"   top for 'ch': {[s['value'] for s in index.suggest('ch', limit=5)]}")
+
+
+if __name__ == "__main__":
+    main()
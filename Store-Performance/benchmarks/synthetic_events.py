@@ -0,0 +1,54 @@
+# benchmarks/synthetic_events.py
+"""
+Synthetic sale events shaped like collector/load_kaggle.py output, for
+benchmarks that need more rows than a local collector holds.
+"""
+import random
+import datetime as dt
+from typing import List
+
+CITIES = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia",
+          "San Antonio", "San Diego", "Dallas", "Seattle", "Boston", "Miami"]
+STORE_TYPES = ["Supermarket", "Convenience Store", "Warehouse Club", "Pharmacy",
+               "Specialty Store", "Department Store"]
+CUSTOMER_CATEGORIES = ["Student", "Professional", "Young Adult", "Senior Citizen",
+                       "Middle-Aged", "Homemaker", "Retiree", "Teenager"]
+PAYMENT_METHODS = ["Cash", "Credit Card", "Debit Card", "Mobile Payment"]
+SEASONS = ["Winter", "Spring", "Summer", "Fall"]
+PROMOTIONS = ["None", "BOGO (Buy One Get One)", "Discount on Selected Items"]
+PRODUCTS = ["Butter", "Milk", "Bread", "Eggs", "Cheese", "Yogurt", "Apple", "Banana",
+            "Orange", "Tomatoes", "Potatoes", "Onions", "Rice", "Pasta", "Cereal",
+            "Coffee", "Tea", "Sugar", "Salt", "Pepper", "Chicken", "Beef", "Fish",
+            "Shampoo", "Soap", "Toothpaste", "Toilet Paper", "Paper Towels", "Detergent",
+            "Ice Cream", "Sunscreen", "Hot Chocolate", "Soup", "Pumpkin", "Candle",
+            "Sweater", "Gloves", "Lemonade", "Flowers", "Umbrella", "Jam", "Honey",
+            "Juice", "Water", "Soda", "Chips", "Cookies", "Chocolate", "Vinegar", "Ketchup"]
+
+
+def make_events(n: int, seed: int = 42, n_products: int = len(PRODUCTS)) -> List[dict]:
+    rng = random.Random(seed)
+    # Extra synthetic SKUs when a benchmark wants a larger catalog
+    products = PRODUCTS + [f"Product {i}" for i in range(max(0, n_products - len(PRODUCTS)))]
+    start = dt.datetime(2020, 1, 1)
+    events = []
+    for i in range(n):
+        basket = rng.sample(products, rng.randint(1, 6))
+        ts = start + dt.timedelta(minutes=rng.randint(0, 4 * 365 * 24 * 60))
+        events.append({
+            "event_id": f"tx{i}",
+            "store_id": rng.choice(CITIES),
+            "ts": ts.isoformat(),
+            "event_type": "sale",
+            "payload": {
+                "amount": round(rng.uniform(5, 150), 2),
+                "items": basket,
+                "qty": len(basket),
+                "payment_method": rng.choice(PAYMENT_METHODS),
+                "store_type": rng.choice(STORE_TYPES),
+                "discount_applied": rng.random() < 0.5,
+                "customer_category": rng.choice(CUSTOMER_CATEGORIES),
+                "season": rng.choice(SEASONS),
+                "promotion": rng.choice(PROMOTIONS),
+            }
+        })
+    return events
@@ -118,7 +118,7 @@ async def collect_batch(events: List[StoreEvent], user: dict = Depends(get_curre
         try:
             await client.post(
                 COORDINATOR_URL,
-                json={"events": sanitized},
+                json={"events": sanitized, "priority": "bulk"},
                 headers={"X-API-KEY": API_KEY},
             )
         except Exception as ex:
@@ -126,9 +126,9 @@ async def collect_batch(events: List[StoreEvent], user: dict = Depends(get_curre
     return {"status": "ok", "received": len(sanitized), "user": user['username']}
 
 @app.get("/events")
-async def list_events():
-    
-    return EVENT_STORE
+async def list_events(offset: int = 0):
+    # offset lets consumers pull only events ingested since their last read
+    return EVENT_STORE[max(offset, 0):]
 
 def redact(payload: dict):
     s = str(payload)
@@ -37,6 +37,12 @@ class User(BaseModel):
     password: str  # In real app, this would be hashed
     role: str = "user"
 
+class SearchBatchRequest(BaseModel):
+    queries: List[str]
+    top_k: int = 10
+    backend: Optional[str] = None
+    filters: Dict[str, Any] = {}  # same names as the /semantic-search query parameters
+
 class LoginRequest(BaseModel):
     username: str
     password: str
\ No newline at end of file
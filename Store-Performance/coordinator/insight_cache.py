@@ -0,0 +1,66 @@
+# coordinator/insight_cache.py
+import json
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class InsightCache:
+    """
+    Bounded LRU of analyzer insights keyed by (event_id, payload hash).
+
+    Hashing the payload means an event that is re-sent with different
+    content is treated as new rather than served a stale insight.
+    """
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(event: dict) -> Tuple[str, str]:
+        payload = json.dumps(event.get("payload", {}), sort_keys=True, default=str)
+        return str(event.get("event_id", "")), hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, event: dict) -> Optional[dict]:
+        key = self.key_for(event)
+        insight = self._entries.get(key)
+        if insight is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return insight
+
+    def put(self, event: dict, insight: dict):
+        key = self.key_for(event)
+        self._entries[key] = insight
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def partition(self, events: List[dict]) -> Tuple[Dict[int, dict], List[Tuple[int, dict]]]:
+        """Split events into {position: cached insight} and [(position, event)] misses"""
+        cached, misses = {}, []
+        for pos, event in enumerate(events):
+            insight = self.get(event)
+            if insight is None:
+                misses.append((pos, event))
+            else:
+                cached[pos] = {**insight, "cached": True}
+        return cached, misses
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,60 @@
+# coordinator/kpi_refresh.py
+import asyncio
+from typing import Any, Dict, Optional
+
+import httpx
+
+
+class KpiCoalescer:
+    """
+    Debounces KPI refresh requests. The first caller opens a window of
+    `window` seconds; every caller that arrives inside it waits on the same
+    KPI recompute, which starts when the window closes. Callers arriving
+    after that open a new window, so nobody is served a KPI snapshot that
+    was started before their events reached the collector.
+    """
+
+    def __init__(self, url: str, window: float = 1.0, timeout: float = 120.0):
+        self.url = url
+        self.window = window
+        self.timeout = timeout
+        self.requests = 0
+        self.refreshes = 0
+        self._pending: Optional[asyncio.Future] = None
+
+    async def refresh(self) -> Dict[str, Any]:
+        self.requests += 1
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._run())
+        # shield: one cancelled waiter must not cancel the shared recompute
+        return await asyncio.shield(self._pending)
+
+    async def _run(self) -> Dict[str, Any]:
+        await asyncio.sleep(self.window)
+        self._pending = None
+        self.refreshes += 1
+        refresh_id = self.refreshes
+
+        print(f"📈 Requesting KPI calculation from {self.url} (refresh #{refresh_id})...")
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                k = await client.get(self.url)
+
+            if k.status_code == 200:
+                print(f"   ✅ KPI calculation successful")
+                return {"status": "kpi_updated", "refresh_id": refresh_id, "data": k.json()}
+
+            print(f"   ⚠️ KPI returned status {k.status_code}")
+            return {"status": "kpi_failed", "refresh_id": refresh_id, "error": f"HTTP {k.status_code}"}
+
+        except Exception as ex:
+            print(f"   ⚠️ KPI calculation failed: {ex}")
+            return {"status": "kpi_warning", "refresh_id": refresh_id, "error": str(ex)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_seconds": self.window,
+            "requests": self.requests,
+            "refreshes": self.refreshes,
+            "coalesced": self.requests - self.refreshes,
+        }
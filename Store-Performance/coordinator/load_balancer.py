@@ -0,0 +1,184 @@
+# coordinator/load_balancer.py
+import time
+import asyncio
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+
+import httpx
+
+
+class NoAvailableReplicaError(Exception):
+    """Raised when every analyzer replica has an open circuit"""
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures, half-open after a cool-down"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self, outstanding: int = 0) -> bool:
+        state = self.state
+        # Half-open lets a single probe through at a time
+        return state == "closed" or (state == "half_open" and outstanding == 0)
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        state = self.state
+        # A failed probe in half-open re-opens the circuit straight away
+        if state == "half_open" or (state == "closed" and self.consecutive_failures >= self.failure_threshold):
+            self.trips += 1
+            self.opened_at = time.monotonic()
+
+
+class AnalyzerReplica:
+    """One analyzer endpoint with its in-flight count, latency window and breaker"""
+
+    def __init__(self, url: str, failure_threshold: int, reset_timeout: float, latency_window: int = 100):
+        self.url = url
+        self.outstanding = 0
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.hedged_requests = 0
+        self.hedges_lost = 0
+        self.latencies = deque(maxlen=latency_window)
+        self.last_error: Optional[str] = None
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def record(self, ok: bool, latency: float, error: Optional[str] = None):
+        self.latencies.append(latency)
+        if ok:
+            self.successes += 1
+            self.breaker.record_success()
+        else:
+            self.failures += 1
+            self.last_error = error
+            self.breaker.record_failure()
+
+    def stats(self) -> Dict[str, Any]:
+        lat = sorted(self.latencies)
+        avg = sum(lat) / len(lat) if lat else 0.0
+        p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))] if lat else 0.0
+        return {
+            "url": self.url,
+            "circuit": self.breaker.state,
+            "circuit_trips": self.breaker.trips,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "error_rate": round(self.failures / self.requests, 3) if self.requests else 0.0,
+            "hedged_requests": self.hedged_requests,
+            "hedges_lost": self.hedges_lost,
+            "latency_avg_ms": round(avg * 1000, 1),
+            "latency_p95_ms": round(p95 * 1000, 1),
+            "last_error": self.last_error,
+        }
+
+
+class AnalyzerPool:
+    """
+    Routes analyzer calls to the replica with the fewest outstanding requests,
+    skipping replicas whose circuit is open. When hedge_after is set, a request
+    still running after that many seconds is duplicated on another replica and
+    whichever answers first wins.
+    """
+
+    def __init__(self, urls: List[str], failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 hedge_after: Optional[float] = None):
+        if not urls:
+            raise ValueError("AnalyzerPool needs at least one analyzer URL")
+        self.replicas = [AnalyzerReplica(u, failure_threshold, reset_timeout) for u in urls]
+        self.hedge_after = hedge_after
+        self._rr = 0
+
+    def pick(self, exclude: Optional[AnalyzerReplica] = None) -> AnalyzerReplica:
+        candidates = [r for r in self.replicas if r is not exclude and r.breaker.allow_request(r.outstanding)]
+        if not candidates:
+            raise NoAvailableReplicaError("All analyzer replicas have open circuits")
+        # Rotate the start point so ties don't always land on the first replica
+        self._rr = (self._rr + 1) % len(self.replicas)
+        ordered = candidates[self._rr % len(candidates):] + candidates[:self._rr % len(candidates)]
+        return min(ordered, key=lambda r: r.outstanding)
+
+    async def _call(self, client: httpx.AsyncClient, replica: AnalyzerReplica, events: List[dict]) -> httpx.Response:
+        replica.outstanding += 1
+        replica.requests += 1
+        start = time.monotonic()
+        try:
+            response = await client.post(replica.url, json=events)
+        except asyncio.CancelledError:
+            # Lost a hedge race - neither a success nor a failure, but the
+            # elapsed time is still a (lower-bound) latency sample
+            replica.hedges_lost += 1
+            replica.latencies.append(time.monotonic() - start)
+            raise
+        except Exception as ex:
+            replica.record(False, time.monotonic() - start, f"{type(ex).__name__}: {ex}")
+            raise
+        finally:
+            replica.outstanding -= 1
+        ok = response.status_code < 500
+        replica.record(ok, time.monotonic() - start, None if ok else f"HTTP {response.status_code}")
+        return response
+
+    async def post(self, client: httpx.AsyncClient, events: List[dict]) -> Tuple[httpx.Response, AnalyzerReplica]:
+        """Send one sub-batch, hedging onto a second replica if it straggles"""
+        primary = self.pick()
+        first = asyncio.ensure_future(self._call(client, primary, events))
+
+        if not self.hedge_after or len(self.replicas) < 2:
+            return await first, primary
+
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done:
+            return first.result(), primary
+
+        try:
+            backup = self.pick(exclude=primary)
+        except NoAvailableReplicaError:
+            return await first, primary
+
+        backup.hedged_requests += 1
+        print(f"   🏇 Hedging straggling sub-batch from {primary.url} to {backup.url}")
+        second = asyncio.ensure_future(self._call(client, backup, events))
+        owners = {first: primary, second: backup}
+        pending = {first, second}
+        fallback = None
+        error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                if task.result().status_code == 200:
+                    for other in pending:
+                        other.cancel()
+                    return task.result(), owners[task]
+                fallback = fallback or (task.result(), owners[task])
+
+        if fallback is not None:
+            return fallback
+        raise error
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [r.stats() for r in self.replicas]
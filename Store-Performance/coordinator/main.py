@@ -1,13 +1,22 @@
 # coordinator/main.py
 import os
 import uuid
+import asyncio
 import datetime
-from fastapi import FastAPI, HTTPException
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Header
 import httpx
 import uvicorn
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 
+from .load_balancer import AnalyzerPool, NoAvailableReplicaError
+from .stages import StageGraph
+from .kpi_refresh import KpiCoalescer
+from .tracing import StageStats, Timeline
+from .scheduler import LaneScheduler
+from .insight_cache import InsightCache
+
 load_dotenv()
 
 app = FastAPI(title="Coordinator Agent")
@@ -22,22 +31,87 @@ app.add_middleware(
 )
 
 ANALYZER_URL = os.environ.get("ANALYZER_URL", "http://localhost:8101/analyze")
-print(f"🔧 Coordinator configured with ANALYZER_URL: {ANALYZER_URL}")
+# Comma-separated list of analyzer replicas; falls back to the single ANALYZER_URL
+ANALYZER_URLS = [u.strip() for u in os.environ.get("ANALYZER_URLS", ANALYZER_URL).split(",") if u.strip()]
+print(f"🔧 Coordinator configured with ANALYZER_URLS: {ANALYZER_URLS}")
 KPI_URL = os.environ.get("KPI_URL", "http://localhost:8102/kpis")
 API_KEY = os.environ.get("API_KEY", "demo-key")
 REPORT_URL = os.environ.get("REPORT_URL", "http://localhost:8103")
 
 AUDIT_STORE = {}
 
+# Rolling per-stage latency window behind /stats
+STAGE_STATS = StageStats(window=int(os.environ.get("STATS_WINDOW", 500)))
+
+# Circuit breaker / hedging knobs (HEDGE_AFTER_SECONDS=0 disables hedged retries)
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 3))
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", 30))
+HEDGE_AFTER_SECONDS = float(os.environ.get("HEDGE_AFTER_SECONDS", 0))
+MAX_INFLIGHT_PER_REPLICA = int(os.environ.get("MAX_INFLIGHT_PER_REPLICA", 2))
+
+analyzer_pool = AnalyzerPool(
+    ANALYZER_URLS,
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=BREAKER_RESET_SECONDS,
+    hedge_after=HEDGE_AFTER_SECONDS or None,
+)
+
+def parse_lane_setting(raw: str, cast):
+    """Parse 'interactive:4,bulk:1' style env settings"""
+    out = {}
+    for part in raw.split(","):
+        if ":" in part:
+            name, value = part.split(":", 1)
+            out[name.strip()] = cast(value.strip())
+    return out
+
+# Priority lanes: interactive dashboard clicks vs loader-driven bulk batches.
+# Total analyzer slots are shared; bulk is capped so interactive work always
+# has headroom, and weights set each lane's share when both are backlogged.
+TOTAL_ANALYZER_SLOTS = max(1, len(ANALYZER_URLS) * MAX_INFLIGHT_PER_REPLICA)
+LANE_WEIGHTS = parse_lane_setting(os.environ.get("LANE_WEIGHTS", "interactive:4,bulk:1"), float)
+LANE_CONCURRENCY = parse_lane_setting(
+    os.environ.get("LANE_CONCURRENCY", f"interactive:{TOTAL_ANALYZER_SLOTS},bulk:{max(1, TOTAL_ANALYZER_SLOTS // 2)}"), int
+)
+DEFAULT_LANE = os.environ.get("DEFAULT_LANE", "bulk")
+
+lane_scheduler = LaneScheduler(
+    {name: (weight, LANE_CONCURRENCY.get(name, TOTAL_ANALYZER_SLOTS)) for name, weight in LANE_WEIGHTS.items()},
+    total_concurrency=TOTAL_ANALYZER_SLOTS,
+    default_lane=DEFAULT_LANE,
+)
+
+# Insights already produced for an identical event are reused instead of re-analyzed
+insight_cache = InsightCache(max_size=int(os.environ.get("INSIGHT_CACHE_SIZE", 5000)))
+# Tags the analyzer puts on degraded insights; those are retried rather than cached
+UNCACHEABLE_TAGS = {"fallback", "error", "system_error"}
+
+# KPI refreshes requested within this window share a single recompute
+KPI_COALESCE_SECONDS = float(os.environ.get("KPI_COALESCE_SECONDS", 1.0))
+kpi_refresher = KpiCoalescer(KPI_URL, window=KPI_COALESCE_SECONDS)
+
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "batches_processed": len(AUDIT_STORE)}
+    return {
+        "status": "healthy",
+        "batches_processed": len(AUDIT_STORE),
+        "analyzer_replicas": analyzer_pool.stats(),
+        "kpi_refresh": kpi_refresher.stats(),
+        "insight_cache": insight_cache.stats()
+    }
 
 @app.post("/orchestrate")
-async def orchestrate(payload: dict):
+async def orchestrate(payload: dict, x_priority: Optional[str] = Header(None)):
     print(f"📦 Received orchestration request with {len(payload.get('events', []))} events")
     
     events = payload.get("events", [])
+    priority = payload.get("priority") or x_priority or DEFAULT_LANE
+    lane = str(priority).strip().lower()
+
+    if lane not in lane_scheduler.lanes:
+        print(f"⚠️ Unknown priority {priority!r} (expected one of: {', '.join(lane_scheduler.lanes)}), "
+              f"using {DEFAULT_LANE}")
+        lane = DEFAULT_LANE
     
     # Validate event count
     if len(events) > 20:
@@ -60,13 +134,20 @@ async def orchestrate(payload: dict):
     print(f"\n{'='*60}")
     print(f"📦 NEW BATCH: Processing {len(events)} events")
     print(f"📦 Batch size: {batch_size} events per sub-batch")
+    print(f"📦 Priority lane: {lane}")
     print(f"{'='*60}\n")
-    
-    # Split events into smaller batches
+
+    # Only events without a cached insight go to the analyzer
+    cached, misses = insight_cache.partition(events)
+    print(f"🗃️ Insight cache: {len(cached)} hits, {len(misses)} misses")
+
+    # Split cache misses into smaller batches, remembering each event's position
     batches = []
-    for i in range(0, len(events), batch_size):
-        batch = events[i:i + batch_size]
-        batches.append(batch)
+    batch_positions = []
+    for i in range(0, len(misses), batch_size):
+        chunk = misses[i:i + batch_size]
+        batches.append([ev for _, ev in chunk])
+        batch_positions.append([pos for pos, _ in chunk])
     
     batch_id = str(uuid.uuid4())
     ts = datetime.datetime.utcnow().isoformat()
@@ -78,62 +159,57 @@ async def orchestrate(payload: dict):
         "events_count": len(events),
         "batches_count": len(batches),
         "batch_size": batch_size,
-        "errors": []
+        "priority": lane,
+        "queue_wait_ms": 0.0,
+        "insight_cache": {
+            "hits": len(cached),
+            "misses": len(misses),
+            "hit_ratio": round(len(cached) / len(events), 3)
+        },
+        "errors": [],
+        "timeline": []
     }
 
-    all_insights = []
+    audit = AUDIT_STORE[batch_id]
+    timeline = Timeline(audit["timeline"], STAGE_STATS)
+
+    # Analysis and KPI refresh are independent; the report waits for both
+    graph = StageGraph()
+    graph.add("analysis", lambda deps: run_analysis(audit, batches, batch_positions, cached, timeline, lane))
+    graph.add("kpi_refresh", lambda deps: run_kpi_refresh(audit))
+    graph.add("report", lambda deps: build_report(audit, batches, deps["analysis"]),
+              deps=["analysis", "kpi_refresh"])
+
+    with timeline.span("orchestrate", events=len(events)):
+        results = await graph.run(timeline)
+    return results["report"]
+
+async def run_analysis(audit: dict, batches: list, batch_positions: list, cached: dict,
+                       timeline: Timeline, lane: str) -> dict:
+    """Fan cache-miss sub-batches out to the analyzer replicas and merge with cached insights"""
     failed_batches = 0
-    
-    # Process each batch separately with detailed error tracking
-    for i, batch_events in enumerate(batches):
-        print(f"\n🔍 Processing sub-batch {i+1}/{len(batches)} ({len(batch_events)} events)")
-        
-        try:
-            # Create client with very long timeout
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                print(f"   ⏳ Sending to analyzer at {ANALYZER_URL}...")
-                
-                # Send batch to analyzer - NO AUTH HEADERS
-                a = await client.post(ANALYZER_URL, json=batch_events)
-                
-                print(f"   📡 Analyzer response status: {a.status_code}")
-                
-                if a.status_code != 200:
-                    error_msg = f"Batch {i+1}: Analyzer returned status {a.status_code} - {a.text}"
-                    print(f"   ❌ {error_msg}")
-                    AUDIT_STORE[batch_id]["errors"].append(error_msg)
-                    failed_batches += 1
-                    continue
-                
-                analyzer_json = a.json()
-                batch_insights = analyzer_json.get("insights_list", [])
-                all_insights.extend(batch_insights)
-                
-                print(f"   ✅ Got {len(batch_insights)} insights from batch {i+1}")
-                
-        except httpx.TimeoutException:
-            error_msg = f"Batch {i+1}: Timeout after 300 seconds"
-            print(f"   ⏰ {error_msg}")
-            AUDIT_STORE[batch_id]["errors"].append(error_msg)
-            failed_batches += 1
-            
-        except httpx.HTTPStatusError as ex:
-            error_msg = f"Batch {i+1}: HTTP error {ex.response.status_code} - {ex.response.text[:200]}"
-            print(f"   ❌ {error_msg}")
-            AUDIT_STORE[batch_id]["errors"].append(error_msg)
-            failed_batches += 1
-            
-        except httpx.ConnectError:
-            error_msg = f"Batch {i+1}: Cannot connect to analyzer (is it running on port 8101?)"
-            print(f"   🔌 {error_msg}")
-            AUDIT_STORE[batch_id]["errors"].append(error_msg)
-            failed_batches += 1
-            
-        except Exception as ex:
-            error_msg = f"Batch {i+1}: Unexpected error - {type(ex).__name__}: {str(ex)}"
-            print(f"   ❌ {error_msg}")
-            AUDIT_STORE[batch_id]["errors"].append(error_msg)
+
+    # Sub-batches run concurrently; the lane scheduler hands out analyzer
+    # slots and the pool spreads them across replicas
+    async with httpx.AsyncClient(timeout=300.0) as client:
+        results = await asyncio.gather(*[
+            process_sub_batch(client, lane, timeline, audit, i, len(batches), batch_events)
+            for i, batch_events in enumerate(batches)
+        ])
+
+    # Insights by original event position, so cached and fresh ones interleave in order
+    by_position = dict(cached)
+    for positions, batch_events, (batch_insights, error_msg) in zip(batch_positions, batches, results):
+        if error_msg:
+            audit["errors"].append(error_msg)
             failed_batches += 1
+            continue
+        for pos, ev, insight in match_insights(batch_events, positions, batch_insights):
+            by_position[pos] = insight
+            if not UNCACHEABLE_TAGS.intersection(insight.get("tags", [])):
+                insight_cache.put(ev, insight)
+
+    all_insights = [by_position[pos] for pos in sorted(by_position)]
 
     # Check results
     print(f"\n{'='*60}")
@@ -141,50 +217,63 @@ async def orchestrate(payload: dict):
     print(f"   Total sub-batches: {len(batches)}")
     print(f"   Successful: {len(batches) - failed_batches}")
     print(f"   Failed: {failed_batches}")
+    print(f"   Cached insights: {len(cached)}")
     print(f"   Total insights: {len(all_insights)}")
     print(f"{'='*60}\n")
 
+    if all_insights:
+        # Update status after successful analysis
+        audit["status"] = "analyzed"
+        audit["analyzer"] = {
+            "count": len(all_insights),
+            "insights_preview": all_insights[:3],
+            "batches_processed": len(batches),
+            "batches_failed": failed_batches
+        }
+
+    return {"insights": all_insights, "failed_batches": failed_batches}
+
+def match_insights(batch_events: list, positions: list, batch_insights: list):
+    """Pair analyzer insights with their events by event_id, or by order as a fallback"""
+    by_event_id = {ins["event_id"]: ins for ins in batch_insights if ins.get("event_id") is not None}
+    for j, (pos, ev) in enumerate(zip(positions, batch_events)):
+        if by_event_id:
+            insight = by_event_id.get(ev.get("event_id"))
+        else:
+            insight = batch_insights[j] if j < len(batch_insights) else None
+        if insight is not None:
+            yield pos, ev, insight
+
+async def run_kpi_refresh(audit: dict) -> dict:
+    """Request a (coalesced) KPI recompute and record the outcome on the audit"""
+    result = await kpi_refresher.refresh()
+
+    audit["kpi_status"] = result["status"]
+    audit["kpi_refresh_id"] = result["refresh_id"]
+    if "data" in result:
+        audit["kpi_results"] = result["data"]
+    else:
+        audit["error_kpi"] = result["error"]
+
+    return result
+
+async def build_report(audit: dict, batches: list, analysis: dict) -> dict:
+    batch_id = audit["batch_id"]
+    all_insights = analysis["insights"]
+    failed_batches = analysis["failed_batches"]
+
     if not all_insights:
-        AUDIT_STORE[batch_id]["status"] = "analyzer_failed"
+        audit["status"] = "analyzer_failed"
         return {
             "batch_id": batch_id, 
             "status": "analyzer_failed",
             "message": f"Failed to generate any insights. {failed_batches}/{len(batches)} batches failed.",
-            "errors": AUDIT_STORE[batch_id]["errors"]
+            "errors": audit["errors"]
         }
 
-    # Update status after successful analysis
-    AUDIT_STORE[batch_id]["status"] = "analyzed"
-    AUDIT_STORE[batch_id]["analyzer"] = {
-        "count": len(all_insights),
-        "insights_preview": all_insights[:3],
-        "batches_processed": len(batches),
-        "batches_failed": failed_batches
-    }
-
-    # KPI calculation
-    print(f"📈 Requesting KPI calculation from {KPI_URL}...")
-    try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            k = await client.get(KPI_URL)
-            
-            if k.status_code == 200:
-                kpi_data = k.json()
-                AUDIT_STORE[batch_id]["status"] = "kpi_updated"
-                AUDIT_STORE[batch_id]["kpi_results"] = kpi_data
-                print(f"   ✅ KPI calculation successful")
-            else:
-                print(f"   ⚠️ KPI returned status {k.status_code}")
-                AUDIT_STORE[batch_id]["status"] = "kpi_failed"
-                
-    except Exception as ex:
-        print(f"   ⚠️ KPI calculation failed: {ex}")
-        AUDIT_STORE[batch_id]["status"] = "kpi_warning"
-        AUDIT_STORE[batch_id]["error_kpi"] = str(ex)
-
     # Final status
-    AUDIT_STORE[batch_id]["status"] = "processing_complete"
-    AUDIT_STORE[batch_id]["report"] = {
+    audit["status"] = "processing_complete"
+    audit["report"] = {
         "batch_id": batch_id,
         "insights_count": len(all_insights),
         "message": f"Successfully processed {len(batches) - failed_batches}/{len(batches)} batches"
@@ -200,10 +289,91 @@ async def orchestrate(payload: dict):
         "batches_failed": failed_batches
     }
 
+async def process_sub_batch(client: httpx.AsyncClient, lane: str, timeline: Timeline, audit: dict,
+                            i: int, total: int, batch_events: list):
+    """Send one sub-batch to the least-loaded analyzer replica; returns (insights, error)"""
+    with timeline.span("queue_wait", sub_batch=i + 1, lane=lane):
+        waited_ms = await lane_scheduler.acquire(lane)
+    audit["queue_wait_ms"] = round(audit["queue_wait_ms"] + waited_ms, 2)
+    try:
+        print(f"\n🔍 Processing sub-batch {i+1}/{total} ({len(batch_events)} events)")
+
+        try:
+            with timeline.span("analyzer_http", sub_batch=i + 1, events=len(batch_events)) as span:
+                a, replica = await analyzer_pool.post(client, batch_events)
+                span["replica"] = replica.url
+                span["status_code"] = a.status_code
+
+            print(f"   📡 Analyzer {replica.url} response status: {a.status_code}")
+
+            if a.status_code != 200:
+                error_msg = f"Batch {i+1}: Analyzer {replica.url} returned status {a.status_code} - {a.text}"
+                print(f"   ❌ {error_msg}")
+                return [], error_msg
+
+            analyzer_json = a.json()
+            batch_insights = analyzer_json.get("insights_list", [])
+
+            # Phases timed inside the analyzer (LLM calls, pattern analysis), laid back to back
+            # from the start of the request since only their durations are reported
+            phase_start = span["start_ms"]
+            for phase, duration_ms in analyzer_json.get("timings_ms", {}).items():
+                phase_start = timeline.record(f"analyzer_{phase}", duration_ms, start_ms=phase_start,
+                                              sub_batch=i + 1, parent="analyzer_http")
+
+            print(f"   ✅ Got {len(batch_insights)} insights from batch {i+1}")
+            return batch_insights, None
+
+        except NoAvailableReplicaError as ex:
+            error_msg = f"Batch {i+1}: {ex}"
+            print(f"   🚫 {error_msg}")
+            return [], error_msg
+
+        except httpx.TimeoutException:
+            error_msg = f"Batch {i+1}: Timeout after 300 seconds"
+            print(f"   ⏰ {error_msg}")
+            return [], error_msg
+
+        except httpx.HTTPStatusError as ex:
+            error_msg = f"Batch {i+1}: HTTP error {ex.response.status_code} - {ex.response.text[:200]}"
+            print(f"   ❌ {error_msg}")
+            return [], error_msg
+
+        except httpx.ConnectError:
+            error_msg = f"Batch {i+1}: Cannot connect to analyzer (is it running on port 8101?)"
+            print(f"   🔌 {error_msg}")
+            return [], error_msg
+
+        except Exception as ex:
+            error_msg = f"Batch {i+1}: Unexpected error - {type(ex).__name__}: {str(ex)}"
+            print(f"   ❌ {error_msg}")
+            return [], error_msg
+    finally:
+        lane_scheduler.release(lane)
+
 @app.get("/audit/{batch_id}")
 def audit(batch_id: str):
     return AUDIT_STORE.get(batch_id, {})
 
+@app.get("/audit/{batch_id}/timeline")
+def audit_timeline(batch_id: str):
+    record = AUDIT_STORE.get(batch_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+
+    spans = sorted(record.get("timeline", []), key=lambda s: s.get("start_ms", s.get("end_ms", 0)))
+    total = next((s["duration_ms"] for s in spans if s["stage"] == "orchestrate"), None)
+    return {"batch_id": batch_id, "status": record.get("status"), "total_ms": total, "spans": spans}
+
+@app.get("/stats")
+def stats():
+    """Rolling p50/p95/p99 per orchestration stage"""
+    return {
+        "window": STAGE_STATS.window,
+        "stages": STAGE_STATS.summary(),
+        "scheduler": lane_scheduler.stats()
+    }
+
 @app.get("/audits")
 def audits():
     return sorted(AUDIT_STORE.values(), key=lambda x: x["ts"], reverse=True)
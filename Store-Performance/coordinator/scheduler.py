@@ -0,0 +1,115 @@
+# coordinator/scheduler.py
+import time
+import asyncio
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+
+class Lane:
+    """One priority queue: its share (weight), concurrency cap and wait history"""
+
+    def __init__(self, name: str, weight: float, max_concurrency: int, wait_window: int = 500):
+        self.name = name
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.served = 0
+        self.virtual_time = 0.0
+        self.waiters: deque = deque()
+        self.waits_ms = deque(maxlen=wait_window)
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self.waits_ms)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+        return {
+            "weight": self.weight,
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "queued": sum(1 for w in self.waiters if not w.done()),
+            "served": self.served,
+            "queue_wait_avg_ms": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+            "queue_wait_p95_ms": round(p95, 2),
+        }
+
+
+class LaneScheduler:
+    """
+    Weighted-fair scheduler over priority lanes.
+
+    A slot is granted to the backlogged lane with the lowest virtual time;
+    each grant advances that lane's virtual time by 1/weight, so over a busy
+    period lanes are served in proportion to their weights. A lane that was
+    idle is caught up to the current virtual clock when it gets work, so it
+    cannot bank credit and starve the others afterwards. Slots are bounded
+    both per lane and in total.
+
+    Raises ValueError at construction for a lane weight that is not
+    positive, a cap below 1, or a default lane that is not configured.
+    """
+
+    def __init__(self, lanes: Dict[str, Tuple[float, int]], total_concurrency: int,
+                 default_lane: Optional[str] = None):
+        if not lanes:
+            raise ValueError("At least one lane is required")
+        for name, (weight, limit) in lanes.items():
+            if not weight > 0:
+                raise ValueError(f"Lane {name!r} needs a positive weight, got {weight}")
+            if limit < 1:
+                raise ValueError(f"Lane {name!r} needs a concurrency cap of at least 1, got {limit}")
+        if total_concurrency < 1:
+            raise ValueError(f"Total concurrency must be at least 1, got {total_concurrency}")
+        if default_lane is not None and default_lane not in lanes:
+            raise ValueError(f"Default lane {default_lane!r} is not one of the lanes {sorted(lanes)}")
+        self.lanes = {name: Lane(name, weight, limit) for name, (weight, limit) in lanes.items()}
+        self.total_concurrency = total_concurrency
+        self.active = 0
+        self._vclock = 0.0
+
+    def _dispatch(self):
+        while self.active < self.total_concurrency:
+            for lane in self.lanes.values():
+                while lane.waiters and lane.waiters[0].done():
+                    lane.waiters.popleft()  # cancelled while queued
+            ready = [l for l in self.lanes.values() if l.waiters and l.active < l.max_concurrency]
+            if not ready:
+                return
+            lane = min(ready, key=lambda l: l.virtual_time)
+            self._vclock = lane.virtual_time
+            lane.virtual_time += 1.0 / lane.weight
+            lane.active += 1
+            lane.served += 1
+            self.active += 1
+            lane.waiters.popleft().set_result(None)
+
+    async def acquire(self, lane_name: str) -> float:
+        """Wait for a slot in the lane; returns the queue wait in milliseconds"""
+        lane = self.lanes[lane_name]
+        if not lane.waiters and lane.active == 0:
+            lane.virtual_time = max(lane.virtual_time, self._vclock)
+
+        start = time.monotonic()
+        fut = asyncio.get_event_loop().create_future()
+        lane.waiters.append(fut)
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release(lane_name)  # granted and cancelled in the same tick
+            raise
+
+        waited_ms = (time.monotonic() - start) * 1000
+        lane.waits_ms.append(waited_ms)
+        return waited_ms
+
+    def release(self, lane_name: str):
+        self.lanes[lane_name].active -= 1
+        self.active -= 1
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "total_concurrency": self.total_concurrency,
+            "active": self.active,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+        }
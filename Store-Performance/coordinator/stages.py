@@ -0,0 +1,53 @@
+# coordinator/stages.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class StageGraph:
+    """
+    Small dependency graph of async orchestration stages.
+
+    Each stage receives a dict of its dependencies' results. Stages whose
+    dependencies are satisfied run concurrently, so independent work (e.g.
+    analysis and KPI refresh) overlaps instead of running back to back.
+    Dependencies must be added before the stages that use them, which keeps
+    the graph acyclic by construction.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, tuple] = {}
+
+    def add(self, name: str, fn: StageFn, deps: Optional[List[str]] = None):
+        deps = deps or []
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already defined")
+        missing = [d for d in deps if d not in self._stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on undefined stages: {missing}")
+        self._stages[name] = (fn, deps)
+
+    async def run(self, timeline=None) -> Dict[str, Any]:
+        """Run every stage; with a Timeline, each stage's own run time becomes a span"""
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str):
+            fn, deps = self._stages[name]
+            dep_results = {d: await tasks[d] for d in deps}
+            if timeline is None:
+                return await fn(dep_results)
+            with timeline.span(name, deps=deps):
+                return await fn(dep_results)
+
+        for name in self._stages:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,83 @@
+# coordinator/tracing.py
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+
+class StageStats:
+    """Rolling window of stage durations with nearest-rank percentiles"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._durations: Dict[str, deque] = {}
+
+    def observe(self, stage: str, duration_ms: float):
+        if stage not in self._durations:
+            self._durations[stage] = deque(maxlen=self.window)
+        self._durations[stage].append(duration_ms)
+
+    @staticmethod
+    def _percentile(sorted_values: List[float], pct: float) -> float:
+        idx = max(0, int(round(pct / 100.0 * len(sorted_values))) - 1)
+        return round(sorted_values[min(idx, len(sorted_values) - 1)], 1)
+
+    def summary(self) -> Dict[str, Any]:
+        out = {}
+        for stage, values in self._durations.items():
+            ordered = sorted(values)
+            out[stage] = {
+                "count": len(ordered),
+                "p50_ms": self._percentile(ordered, 50),
+                "p95_ms": self._percentile(ordered, 95),
+                "p99_ms": self._percentile(ordered, 99),
+                "max_ms": round(ordered[-1], 1),
+            }
+        return out
+
+
+class Timeline:
+    """
+    Start/end spans for one orchestration. Offsets are milliseconds since the
+    batch was received; the span list is the same object stored on the audit
+    record, so /audit/{batch_id}/timeline can read it while the batch runs.
+    """
+
+    def __init__(self, spans: List[dict], stats: Optional[StageStats] = None):
+        self.t0 = time.monotonic()
+        self.spans = spans
+        self.stats = stats
+
+    def _offset_ms(self, t: float) -> float:
+        return round((t - self.t0) * 1000, 2)
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        start = time.monotonic()
+        span = {"stage": stage, "start_ms": self._offset_ms(start), **attrs}
+        try:
+            yield span
+        except BaseException as ex:
+            span["error"] = type(ex).__name__
+            raise
+        finally:
+            end = time.monotonic()
+            span["end_ms"] = self._offset_ms(end)
+            span["duration_ms"] = round((end - start) * 1000, 2)
+            self.spans.append(span)
+            if self.stats is not None:
+                self.stats.observe(stage, span["duration_ms"])
+
+    def record(self, stage: str, duration_ms: float, start_ms: Optional[float] = None, **attrs) -> float:
+        """
+        Record a span measured elsewhere (e.g. timings reported by the
+        analyzer), placed at start_ms when given; returns where it ends.
+        """
+        span = {"stage": stage, "duration_ms": round(duration_ms, 2), **attrs}
+        if start_ms is not None:
+            span["start_ms"] = round(start_ms, 2)
+            span["end_ms"] = round(start_ms + duration_ms, 2)
+        self.spans.append(span)
+        if self.stats is not None:
+            self.stats.observe(stage, duration_ms)
+        return (start_ms or 0.0) + duration_ms
@@ -201,42 +201,51 @@ def extract_unique_products(df):
                 products.add(items)
     return sorted(list(products))
 
+# Most suggestions the analyzer's /suggest endpoint returns for one query
+SUGGEST_LIMIT = 50
+
+# Function to find the product names matching a search term
+def matching_products(search_term, products):
+    # The analyzer's /suggest index matches word prefixes ("milk" finds "Milk Chocolate", not "Buttermilk")
+    try:
+        response = requests.get(
+            f"{AGENT_ENDPOINTS['analyzer']}/suggest",
+            params={"q": search_term, "kind": "product", "limit": SUGGEST_LIMIT},
+            timeout=5
+        )
+        if response.status_code == 200:
+            names = {s["value"] for s in response.json()["suggestions"]}
+            # A full page may be cut short, and no word-prefix hit may still be a substring hit
+            if 0 < len(names) < SUGGEST_LIMIT:
+                return names
+    except:
+        pass
+    # Analyzer unavailable, no prefix match or too many: substring match over the distinct names only
+    search_term = search_term.lower()
+    return {p for p in pd.unique(products) if search_term in p.lower()}
+
 # Function to search for products in events
 def search_products(df, search_term):
-    search_term = search_term.lower()
-    results = []
-    
-    for idx, row in df.iterrows():
-        payload = row['payload']
-        if isinstance(payload, dict) and 'items' in payload:
-            items = payload['items']
-            if isinstance(items, list):
-                for item in items:
-                    if search_term in str(item).lower():
-                        results.append({
-                            'event_id': row['event_id'],
-                            'store_id': row['store_id'],
-                            'timestamp': row['ts'],
-                            'product': item,
-                            'amount': payload.get('amount', 0),
-                            'customer_category': payload.get('customer_category', 'Unknown'),
-                            'payment_method': payload.get('payment_method', 'Unknown'),
-                            'season': payload.get('season', 'Unknown')
-                        })
-            else:
-                if search_term in str(items).lower():
-                    results.append({
-                        'event_id': row['event_id'],
-                        'store_id': row['store_id'],
-                        'timestamp': row['ts'],
-                        'product': items,
-                        'amount': payload.get('amount', 0),
-                        'customer_category': payload.get('customer_category', 'Unknown'),
-                        'payment_method': payload.get('payment_method', 'Unknown'),
-                        'season': payload.get('season', 'Unknown')
-                    })
+    if df.empty or 'payload' not in df:
+        return pd.DataFrame()
+    rows = df[df['payload'].map(lambda p: isinstance(p, dict) and 'items' in p)]
+    items = rows['payload'].map(lambda p: p['items'] if isinstance(p['items'], list) else [p['items']])
+    # One row per (event, item), matched by name against the distinct products
+    exploded = rows.assign(product=items).explode('product').dropna(subset=['product'])
+    names = exploded['product'].astype(str)
+    hits = exploded[names.isin(matching_products(search_term, names))]
+    payloads = hits['payload']
     
-    return pd.DataFrame(results)
+    return pd.DataFrame({
+        'event_id': hits['event_id'],
+        'store_id': hits['store_id'],
+        'timestamp': hits['ts'],
+        'product': hits['product'],
+        'amount': payloads.map(lambda p: p.get('amount', 0)),
+        'customer_category': payloads.map(lambda p: p.get('customer_category', 'Unknown')),
+        'payment_method': payloads.map(lambda p: p.get('payment_method', 'Unknown')),
+        'season': payloads.map(lambda p: p.get('season', 'Unknown'))
+    }).reset_index(drop=True)
 
 # Function to get product analysis from analyzer
 def get_product_analysis(product_name, events):
@@ -272,9 +281,16 @@ def get_product_analysis(product_name, events):
         
         # Get cross-selling opportunities
         try:
-            response = requests.post(
-                f"{AGENT_ENDPOINTS['analyzer']}/advanced-analysis/cross-selling",
-                json=product_events,
+            # The analyzer keeps counts over every ingested event; ask for the pairs of the matched products
+            matched_products = set()
+            for event in product_events:
+                items = event.get("payload", {}).get("items", [])
+                for item in items if isinstance(items, list) else [items]:
+                    if product_name.lower() in str(item).lower():
+                        matched_products.add(str(item))
+            response = requests.get(
+                f"{AGENT_ENDPOINTS['analyzer']}/cross-selling",
+                params={"product": sorted(matched_products), "top_n": 10},
                 timeout=30
             )
             if response.status_code == 200:
@@ -394,7 +410,7 @@ def trigger_data_processing(process_type):
         # Send to coordinator for processing
         response = requests.post(
             f"{AGENT_ENDPOINTS['coordinator']}/orchestrate",
-            json={"events": events},
+            json={"events": events, "priority": "interactive"},
             headers={"X-API-KEY": "demo-key"},
             timeout=300
         )
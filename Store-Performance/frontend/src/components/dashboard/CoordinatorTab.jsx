@@ -47,7 +47,8 @@ const CoordinatorTab = () => {
           'Content-Type': 'application/json',
           'X-API-KEY': 'demo-key', 
         },
-        body: JSON.stringify({ events }),
+        // Interactive lane so clicks are not queued behind bulk loads
+        body: JSON.stringify({ events, priority: 'interactive' }),
       });
       
       if (response.ok) {
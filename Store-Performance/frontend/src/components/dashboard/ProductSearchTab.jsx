@@ -1,9 +1,10 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import {
   Box,
   Typography,
   Paper,
   TextField,
+  Autocomplete,
   Button,
   Alert,
   Grid,
@@ -17,11 +18,30 @@ import {
   LineChart, Line, BarChart, Bar, PieChart, Pie, XAxis, YAxis, CartesianGrid, 
   Tooltip, Legend, ResponsiveContainer, Cell
 } from 'recharts';
+import { suggest } from '../../services/api';
 
 const ProductSearchTab = ({ data }) => {
   const [searchQuery, setSearchQuery] = useState('');
   const [searching, setSearching] = useState(false);
   const [searchResults, setSearchResults] = useState(null);
+  const [suggestions, setSuggestions] = useState([]);
+
+  // Product names completing what has been typed so far, from the analyzer's index
+  useEffect(() => {
+    if (!searchQuery.trim()) {
+      setSuggestions([]);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      const found = await suggest(searchQuery, 'product', 8);
+      if (!cancelled) setSuggestions(found.map(s => s.value));
+    }, 150);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery]);
 
   const extractUniqueProducts = (events) => {
     const products = new Set();
@@ -177,14 +197,22 @@ const ProductSearchTab = ({ data }) => {
         <Grid item xs={12} md={8}>
           <Paper sx={{ p: 3 }}>
             <Box sx={{ display: 'flex', gap: 2, mb: 3 }}>
-              <TextField
+              <Autocomplete
+                freeSolo
                 fullWidth
-                label="🔍 Search for products"
-                placeholder="Enter product name (e.g., butter, apple, olive oil...)"
-                value={searchQuery}
-                onChange={(e) => setSearchQuery(e.target.value)}
-                onKeyPress={(e) => e.key === 'Enter' && handleSearch()}
+                options={suggestions}
+                filterOptions={(options) => options}
+                inputValue={searchQuery}
+                onInputChange={(e, value) => setSearchQuery(value)}
                 disabled={searching}
+                renderInput={(params) => (
+                  <TextField
+                    {...params}
+                    label="🔍 Search for products"
+                    placeholder="Enter product name (e.g., butter, apple, olive oil...)"
+                    onKeyPress={(e) => e.key === 'Enter' && handleSearch()}
+                  />
+                )}
               />
               <Button
                 variant="contained"
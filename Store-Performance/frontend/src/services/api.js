@@ -101,10 +101,10 @@ export const loadDataFromCollector = async () => {
 };
 
 // Semantic Search
-export const semanticSearch = async (query) => {
+export const semanticSearch = async (query, backend, filters = {}) => {
   try {
     const response = await api.post(`${AGENT_ENDPOINTS.analyzer}/semantic-search`, null, {
-      params: { query }
+      params: backend ? { query, backend, ...filters } : { query, ...filters }
     });
     return response.data;
   } catch (error) {
@@ -116,6 +116,18 @@ export const semanticSearch = async (query) => {
   }
 };
 
+// Typeahead completions (products, stores, categories), best selling first
+export const suggest = async (q, kind, limit = 10) => {
+  try {
+    const response = await api.get(`${AGENT_ENDPOINTS.analyzer}/suggest`, {
+      params: kind ? { q, kind, limit } : { q, limit }
+    });
+    return response.data.suggestions;
+  } catch (error) {
+    return [];
+  }
+};
+
 // Trigger coordinator processing
 export const triggerDataProcessing = async (processType) => {
   try {
@@ -130,7 +142,7 @@ export const triggerDataProcessing = async (processType) => {
 
     // Send to coordinator with proper authentication
     const response = await api.post(`${AGENT_ENDPOINTS.coordinator}/orchestrate`, 
-      { events },
+      { events, priority: 'interactive' },
       {
         headers: {
           'X-API-KEY': 'demo-key'
@@ -0,0 +1,55 @@
+# tests/test_analysis_pool.py
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+from analyzer.analysis_pool import AnalysisPool, analyze_frame
+from analyzer.seasonality import BasketFrame
+from benchmarks.synthetic_events import make_events
+
+
+class WorkerKiller:
+    """Kills the worker process that unpickles it"""
+
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+def test_pool_results_match_inline_analysis():
+    frame = BasketFrame.from_events(make_events(300))
+    pool = AnalysisPool(workers=1)
+    try:
+        result = asyncio.run(pool.run(frame, True))
+    finally:
+        pool.shutdown()
+    assert result == analyze_frame(frame, True)
+    assert pool.stats()["completed"] == 1
+
+
+def test_broken_pool_is_replaced_once():
+    pool = AnalysisPool(workers=1)
+
+    async def crash_then_recover():
+        crashed = await asyncio.gather(*(pool.run(WorkerKiller(), False) for _ in range(3)), return_exceptions=True)
+        return crashed, await pool.run(BasketFrame.from_events(make_events(50)), False)
+
+    try:
+        crashed, recovered = asyncio.run(crash_then_recover())
+    finally:
+        pool.shutdown()
+    assert all(isinstance(e, BrokenProcessPool) for e in crashed)
+    assert "seasonal_insights" in recovered
+    stats = pool.stats()
+    assert (stats["failures"], stats["pool_replacements"], stats["completed"]) == (3, 1, 1)
+
+
+def test_backlog_beyond_max_pending_is_rejected():
+    pool = AnalysisPool(workers=0, max_pending=1)
+    frame = BasketFrame.from_events(make_events(50))
+
+    async def two_at_once():
+        return await asyncio.gather(pool.run(frame, False), pool.run(frame, False))
+
+    first, second = asyncio.run(two_at_once())
+    assert first is not None and second is None
+    assert pool.stats()["rejected"] == 1
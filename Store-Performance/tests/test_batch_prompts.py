@@ -0,0 +1,45 @@
+# tests/test_batch_prompts.py
+import json
+
+from analyzer.batch_prompts import (BATCH_INSTRUCTIONS, RESPONSE_TOKENS_PER_EVENT, build_batch_prompt,
+                                    chunk_by_token_budget, compact_event, estimate_tokens, parse_batch_response)
+
+
+def features(n: int) -> dict:
+    return {"store_id": "Miami", "customer_category": "Student", "amount": 12.345, "payment_method": "Cash",
+            "items": [f"Item {i}" for i in range(n)], "season": "Winter"}
+
+
+def test_chunks_respect_the_token_budget_and_event_cap():
+    features_list = [features(3) for _ in range(10)]
+    cost = estimate_tokens(compact_event(0, features_list[0])) + RESPONSE_TOKENS_PER_EVENT
+    budget = estimate_tokens(BATCH_INSTRUCTIONS) + 3 * cost
+    assert chunk_by_token_budget(features_list, budget, max_events=10) == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    assert chunk_by_token_budget(features_list, budget * 10, max_events=4) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def test_oversized_event_gets_a_batch_of_its_own():
+    features_list = [features(1), features(500), features(1)]
+    assert chunk_by_token_budget(features_list, 400, max_events=10) == [[0], [1], [2]]
+
+
+def test_prompt_lists_every_event_by_index():
+    prompt = build_batch_prompt([features(1), features(2)])
+    lines = prompt[len(BATCH_INSTRUCTIONS):].splitlines()
+    assert [json.loads(line)["index"] for line in lines] == [0, 1]
+    assert json.loads(lines[1])["amount"] == 12.35
+
+
+def test_missing_and_malformed_results_come_back_as_none():
+    reply = json.dumps({"results": [
+        {"index": 2, "insight": "Bundles sell", "analysis": "", "tags": "bundle, winter"},
+        {"index": 0, "insight": " "},
+        {"index": 7, "insight": "out of range"},
+        {"index": "1", "insight": "not an int"},
+        "junk",
+    ]})
+    parsed = parse_batch_response(reply, 3)
+    assert parsed[:2] == [None, None]
+    assert parsed[2]["text"] == "Bundles sell" and parsed[2]["tags"] == ["bundle", "winter"]
+    assert parsed[2]["explanation"]
+    assert parse_batch_response("not json", 2) == [None, None]
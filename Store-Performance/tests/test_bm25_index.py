@@ -0,0 +1,72 @@
+# tests/test_bm25_index.py
+import numpy as np
+import pytest
+
+from analyzer.bm25_index import BM25Index
+from analyzer.retrieval_system import SemanticSearchEngine
+from benchmarks.synthetic_events import make_events
+
+QUERIES = ["product_milk season_winter", "store_miami customer_student payment_cash product_bread", "promotion_none"]
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    engine = SemanticSearchEngine()
+    engine.index_events(make_events(3000))
+    return engine._index.term_counts.tocsr(), engine._get_vectorizer()
+
+
+def exhaustive_top_k(index: BM25Index, term_ids: np.ndarray, k: int, allowed=None):
+    scores = np.zeros(index.n_docs, dtype=np.float64)
+    for term in np.unique(term_ids):
+        ids, impacts = index._postings(term, index._idf(np.array([term]))[0])
+        scores[ids] += impacts
+    if allowed is not None:
+        scores[~allowed] = 0
+    top = np.argsort(-scores, kind="stable")[:k]
+    return top[scores[top] > 0], scores[top][scores[top] > 0]
+
+
+def test_max_score_top_k_matches_exhaustive_scoring(corpus):
+    term_counts, vectorizer = corpus
+    index = BM25Index(term_counts)
+    allowed = np.random.default_rng(0).random(index.n_docs) < 0.3
+    for query in QUERIES:
+        term_ids = vectorizer.transform([query]).indices
+        for mask in (None, allowed):
+            ids, scores = index.top_k(term_ids, 10, allowed=mask)
+            expected_ids, expected_scores = exhaustive_top_k(index, term_ids, 10, mask)
+            np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+            assert set(ids.tolist()) == set(expected_ids.tolist())
+    assert index.stats()["avg_postings_scored"] <= index.stats()["avg_postings_in_query_terms"]
+
+
+def test_appended_segments_score_like_one_build(corpus):
+    term_counts, vectorizer = corpus
+    grown = BM25Index(term_counts[:500])
+    for start in range(500, term_counts.shape[0], 173):
+        grown = grown.appended(term_counts[start:start + 173])
+    whole = BM25Index(term_counts)
+    assert grown.n_docs == whole.n_docs and grown.stats()["postings"] == whole.stats()["postings"]
+    assert 1 < grown.stats()["segments"] <= int(np.log2(grown.n_docs)) + 1
+
+    for query in QUERIES:
+        term_ids = vectorizer.transform([query]).indices
+        for got, expected in zip(grown.top_k(term_ids, 10), whole.top_k(term_ids, 10)):
+            np.testing.assert_array_equal(got, expected)
+        np.testing.assert_array_equal(grown.matching_docs(term_ids), whole.matching_docs(term_ids))
+
+
+def test_engine_carries_posting_lists_across_appends():
+    engine = SemanticSearchEngine()
+    engine.index_events(make_events(600))
+    engine.build_bm25()
+    engine.append_events(make_events(200, seed=1))
+    assert engine._index.bm25 is not None and engine._index.bm25.n_docs == 800
+
+    rebuilt = SemanticSearchEngine()
+    rebuilt.index_events(make_events(600))
+    rebuilt.append_events(make_events(200, seed=1))
+    for query in QUERIES:
+        assert (engine.search(query, backend="bm25")["results"] ==
+                rebuilt.search(query, backend="bm25")["results"])
@@ -0,0 +1,54 @@
+# tests/test_facets.py
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from analyzer.facets import FacetIndex, facet_row
+from analyzer.time_buckets import parse_timestamps
+from benchmarks.synthetic_events import make_events
+
+
+def row(store, ts, amount=10.0, season="Summer"):
+    return {"store_id": store, "season": season, "amount": amount, "timestamp": ts}
+
+
+def test_filters_match_a_scan_over_the_rows():
+    rows = [facet_row(e) for e in make_events(500)]
+    facets = FacetIndex.build(rows[:300]).append(rows[300:])
+    stores = sorted({r["store_id"] for r in rows})[:2]
+    mask = facets.mask({"store_id": [s.upper() for s in stores], "amount_min": 20, "time_from": "2020-03-01"})
+    start = parse_timestamps(["2020-03-01"]).epoch[0]
+    expected = [r["store_id"] in stores and float(r["amount"]) >= 20 and parse_timestamps([r["timestamp"]]).epoch[0] >= start
+                for r in rows]
+    assert mask.tolist() == expected
+    assert facets.mask({}) is None
+
+
+def test_counts_add_up_over_disjoint_selections():
+    rows = [facet_row(e) for e in make_events(400)]
+    facets = FacetIndex.build(rows)
+    everything = facets.counts(np.arange(len(rows)), top=100)
+    assert everything["store_id"] == dict(Counter(r["store_id"] for r in rows))
+    first, second = facets.tallies(np.arange(0, 200)), facets.tallies(np.arange(200, 400))
+    summed = {f: first[f] + second[f] for f in first}
+    assert facets.top_counts(summed, top=100) == everything
+
+
+def test_timestamps_agree_with_the_analytics():
+    stamps = ["2024-06-01T23:30:00-05:00", "2024-06-02T04:30:00", "2024-06-02T04:30:00.500Z", "bad", None]
+    facets = FacetIndex.build([row("s1", ts) for ts in stamps])
+    np.testing.assert_array_equal(facets.timestamp, parse_timestamps(stamps).epoch)
+    # The offset is honoured: 23:30 at -05:00 is 04:30 UTC the next day
+    assert facets.timestamp[0] == facets.timestamp[1]
+    # A bare end date covers the whole day, fractions of a second included
+    assert facets.mask({"time_to": "2024-06-02"}).tolist() == [True, True, True, False, False]
+    assert facets.mask({"time_to": "2024-06-01"}).tolist() == [False] * 5
+
+
+def test_unknown_filters_and_bad_times_are_rejected():
+    facets = FacetIndex.build([row("s1", "2024-01-01")])
+    with pytest.raises(ValueError):
+        facets.mask({"colour": "red"})
+    with pytest.raises(ValueError):
+        facets.mask({"time_from": "yesterday"})
@@ -0,0 +1,37 @@
+# tests/test_index_snapshot.py
+from analyzer.retrieval_system import SemanticSearchEngine
+from benchmarks.synthetic_events import make_events
+
+
+def test_appends_after_a_load_leave_the_mapped_matrices_alone(tmp_path):
+    root = str(tmp_path)
+    built = SemanticSearchEngine(rebase_fraction=10.0)
+    built.index_events(make_events(400))
+    built.save_snapshot(root)
+
+    engine = SemanticSearchEngine(rebase_fraction=10.0)
+    engine.load_snapshot(root)
+    loaded = engine._index
+    engine.append_events(make_events(100, seed=1))
+    engine.append_events(make_events(100, seed=2))
+    built.append_events(make_events(100, seed=1))
+    built.append_events(make_events(100, seed=2))
+
+    index = engine._index
+    for matrix in (index.term_counts, index.doc_matrix):
+        # Same read-only mapped base; the new rows are a separate tail
+        assert matrix.base is (loaded.term_counts if matrix is index.term_counts else loaded.doc_matrix).base
+        for arr in (matrix.base.data, matrix.base.indices):
+            # Views of the read-only file mapping, not private copies
+            assert not arr.flags.writeable and not arr.flags.owndata
+        assert (matrix.base.shape[0], matrix.tail_rows) == (400, 200)
+
+    query = "product_milk season_winter customer_student"
+    assert engine.search(query, top_k=10)["results"] == built.search(query, top_k=10)["results"]
+    assert engine.search(query, top_k=10, backend="bm25")["results"] == built.search(query, top_k=10, backend="bm25")["results"]
+
+    # A snapshot of the chained index reloads to the same results
+    engine.save_snapshot(root)
+    reloaded = SemanticSearchEngine()
+    reloaded.load_snapshot(root)
+    assert reloaded.search(query, top_k=10)["results"] == engine.search(query, top_k=10)["results"]
@@ -0,0 +1,34 @@
+# tests/test_insight_cache.py
+from coordinator.insight_cache import InsightCache
+
+
+def event(event_id: str, amount: float) -> dict:
+    return {"event_id": event_id, "store_id": "Miami", "payload": {"items": ["Milk"], "amount": amount}}
+
+
+def test_partition_serves_cached_insights_by_position():
+    cache = InsightCache()
+    cache.put(event("e1", 10), {"text": "one"})
+    cache.put(event("e3", 30), {"text": "three"})
+    cached, misses = cache.partition([event("e1", 10), event("e2", 20), event("e3", 30)])
+    assert cached == {0: {"text": "one", "cached": True}, 2: {"text": "three", "cached": True}}
+    assert misses == [(1, event("e2", 20))]
+
+
+def test_resent_event_with_new_payload_is_a_miss():
+    cache = InsightCache()
+    cache.put(event("e1", 10), {"text": "one"})
+    assert cache.get(event("e1", 11)) is None
+    assert cache.get(event("e1", 10)) == {"text": "one"}
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = InsightCache(max_size=2)
+    cache.put(event("e1", 1), {"text": "one"})
+    cache.put(event("e2", 2), {"text": "two"})
+    cache.get(event("e1", 1))
+    cache.put(event("e3", 3), {"text": "three"})
+    assert cache.get(event("e2", 2)) is None
+    assert cache.get(event("e1", 1)) == {"text": "one"}
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
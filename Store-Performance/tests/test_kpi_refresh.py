@@ -0,0 +1,78 @@
+# tests/test_kpi_refresh.py
+import asyncio
+
+import httpx
+import pytest
+
+from coordinator import kpi_refresh
+from coordinator.kpi_refresh import KpiCoalescer
+from coordinator.stages import StageGraph
+
+
+@pytest.fixture
+def kpi_calls(monkeypatch):
+    """Every KPI request the coalescer sends; the fake service answers with the call number"""
+    calls = []
+
+    def handle(request):
+        calls.append(str(request.url))
+        return httpx.Response(200, json={"call": len(calls)})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(kpi_refresh.httpx, "AsyncClient",
+                        lambda **kwargs: real_client(transport=httpx.MockTransport(handle), **kwargs))
+    return calls
+
+
+def test_triggers_inside_one_window_share_a_refresh(kpi_calls):
+    coalescer = KpiCoalescer("http://kpi/calculate", window=0.05)
+
+    async def run():
+        first = await asyncio.gather(*[coalescer.refresh() for _ in range(5)])
+        # A trigger after the window closed gets a recompute of its own
+        second = await coalescer.refresh()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert [r["refresh_id"] for r in first] == [1] * 5
+    assert first[0] == {"status": "kpi_updated", "refresh_id": 1, "data": {"call": 1}}
+    assert second["refresh_id"] == 2 and second["data"] == {"call": 2}
+    assert kpi_calls == ["http://kpi/calculate"] * 2
+    assert coalescer.stats() == {"window_seconds": 0.05, "requests": 6, "refreshes": 2, "coalesced": 4}
+
+
+def test_cancelled_waiter_does_not_cancel_the_refresh(kpi_calls):
+    coalescer = KpiCoalescer("http://kpi/calculate", window=0.05)
+
+    async def run():
+        impatient = asyncio.ensure_future(coalescer.refresh())
+        patient = asyncio.ensure_future(coalescer.refresh())
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(run())["status"] == "kpi_updated"
+    assert len(kpi_calls) == 1
+
+
+def test_independent_stages_overlap():
+    graph = StageGraph()
+    running, overlapped = set(), []
+
+    def stage(name):
+        async def fn(deps):
+            running.add(name)
+            await asyncio.sleep(0.02)
+            overlapped.append(set(running))
+            running.discard(name)
+            return name, sorted(deps)
+        return fn
+
+    graph.add("analyze", stage("analyze"))
+    graph.add("kpi", stage("kpi"))
+    graph.add("audit", stage("audit"), deps=["analyze", "kpi"])
+    results = asyncio.run(graph.run())
+    assert results["audit"] == ("audit", ["analyze", "kpi"])
+    assert {"analyze", "kpi"} in overlapped
+    with pytest.raises(ValueError):
+        graph.add("report", stage("report"), deps=["missing"])
@@ -0,0 +1,44 @@
+# tests/test_llm_cache.py
+from analyzer.llm_cache import LLMInsightCache
+
+
+def insight(n: int) -> dict:
+    return {"text": f"insight {n}", "explanation": "", "tags": [], "tokens": n}
+
+
+def test_batched_lookups_span_both_tiers(tmp_path):
+    path = str(tmp_path / "insights.sqlite3")
+    cache = LLMInsightCache(path, memory_size=2)
+    cache.put_many([(f"sig{n}", insight(n)) for n in range(5)])
+    assert cache.stats()["disk_entries"] == 5
+
+    found = cache.get_many(["sig4", "sig0", "missing", "sig0"])
+    assert found == [insight(4), insight(0), None, insight(0)]
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 2, 1)
+
+    # The disk tier survives a restart, and its entry count is read back once
+    reopened = LLMInsightCache(path)
+    assert reopened.stats()["disk_entries"] == 5
+    assert reopened.get("sig3") == insight(3)
+
+
+def test_entry_count_follows_replacements_and_expiry(tmp_path):
+    cache = LLMInsightCache(str(tmp_path / "insights.sqlite3"), ttl_seconds=60, memory_size=0)
+    cache.put_many([("a", insight(1)), ("b", insight(2))])
+    cache.put("a", insight(3))
+    assert cache.stats()["disk_entries"] == 2
+    assert cache.get("a") == insight(3)
+
+    cache.ttl_seconds = -1
+    assert cache.get_many(["a", "b"]) == [None, None]
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_disk_tier_is_capped(tmp_path):
+    cache = LLMInsightCache(str(tmp_path / "insights.sqlite3"), disk_size=50)
+    cache.put_many([(f"sig{n}", insight(n)) for n in range(60)])
+    # Trimming is amortized over 100 writes
+    assert cache.stats()["disk_entries"] == 60
+    cache.put_many([(f"sig{n}", insight(n)) for n in range(60, 120)])
+    assert cache.stats()["disk_entries"] == 50
@@ -0,0 +1,90 @@
+# tests/test_llm_client.py
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from analyzer.llm_client import AdaptiveRateLimiter, AsyncLLMClient, TokenBucket
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)})
+
+
+class FakeCompletions:
+    """Answers like the Groq client, after first refusing `rate_limits` calls with a 429"""
+
+    def __init__(self, rate_limits=0, total_tokens=50):
+        self.rate_limits = rate_limits
+        self.total_tokens = total_tokens
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.rate_limits:
+            raise RateLimitError(retry_after=0.05)
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=self.total_tokens))
+
+
+def client_with(completions, **kwargs) -> AsyncLLMClient:
+    client = AsyncLLMClient("test-key", **kwargs)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client
+
+
+def test_bucket_waits_for_the_refill():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60) == 0.0
+    bucket.consume(60)
+    # One token a second, or half that at a halved rate
+    assert bucket.wait_time(2) == pytest.approx(2.0, abs=0.05)
+    assert bucket.wait_time(2, factor=0.5) == pytest.approx(4.0, abs=0.1)
+    # More than the capacity is capped rather than waiting forever
+    assert bucket.wait_time(1000) == pytest.approx(60.0, abs=0.1)
+
+
+def test_limiter_paces_requests_to_the_quota():
+    limiter = AdaptiveRateLimiter(requests_per_minute=1200, tokens_per_minute=1e6)
+    limiter.requests.tokens = 0.0
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire(10)
+        return time.monotonic() - start
+
+    # 20 requests a second: four of them take at least 0.2 s
+    assert asyncio.run(run()) >= 0.19
+    assert limiter.stats()["granted"] == 4
+
+
+def test_rate_limit_slows_down_and_retries():
+    completions = FakeCompletions(rate_limits=2)
+    client = client_with(completions, requests_per_minute=6000, tokens_per_minute=1e6)
+    start = time.monotonic()
+    asyncio.run(client.complete([{"role": "user", "content": "hi"}], max_tokens=10))
+    # Both 429s paused for their retry-after
+    assert time.monotonic() - start >= 0.1
+    assert completions.calls == 3
+    stats = client.stats()
+    assert stats["rate_limited"] == 2 and stats["in_flight"] == 0
+    assert stats["rate_factor"] == pytest.approx(0.3)
+
+
+def test_gives_up_after_max_retries():
+    client = client_with(FakeCompletions(rate_limits=10), max_retries=1, requests_per_minute=6000)
+    with pytest.raises(RateLimitError):
+        asyncio.run(client.complete([{"role": "user", "content": "hi"}], max_tokens=10))
+    assert client.limiter.rate_limited == 1
+
+
+def test_actual_usage_corrects_the_token_estimate():
+    client = client_with(FakeCompletions(total_tokens=500), tokens_per_minute=6000)
+    asyncio.run(client.complete([{"role": "user", "content": "hi"}], max_tokens=10))
+    # The full 500 tokens are charged, not the ~11 estimated
+    assert client.limiter.tokens.tokens == pytest.approx(5500, abs=5)
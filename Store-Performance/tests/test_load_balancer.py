@@ -0,0 +1,91 @@
+# tests/test_load_balancer.py
+import asyncio
+
+import httpx
+import pytest
+
+from coordinator.load_balancer import AnalyzerPool, NoAvailableReplicaError
+
+URLS = ["http://a/analyze", "http://b/analyze"]
+
+
+def client_for(handlers):
+    """AsyncClient answering each host with its handler: (delay seconds, status code)"""
+    async def handle(request):
+        delay, status = handlers[request.url.host]
+        await asyncio.sleep(delay)
+        return httpx.Response(status, json={"host": request.url.host})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handle))
+
+
+def test_circuit_opens_after_failures_and_recovers_through_one_probe():
+    pool = AnalyzerPool(URLS, failure_threshold=2, reset_timeout=30.0)
+    a, b = pool.replicas
+    a.record(False, 0.01, "HTTP 503")
+    assert a.breaker.state == "closed"
+    a.record(False, 0.01, "HTTP 503")
+    assert a.breaker.state == "open" and a.breaker.trips == 1
+    assert all(pool.pick() is b for _ in range(5))
+
+    b.record(False, 0.01)
+    b.record(False, 0.01)
+    with pytest.raises(NoAvailableReplicaError):
+        pool.pick()
+
+    # After the cool-down a single probe goes through, and its success closes the circuit
+    a.breaker.opened_at -= 30.0
+    assert a.breaker.state == "half_open"
+    assert pool.pick() is a
+    a.outstanding = 1
+    with pytest.raises(NoAvailableReplicaError):
+        pool.pick()
+    a.outstanding = 0
+    a.record(True, 0.01)
+    assert a.breaker.state == "closed" and a.stats()["error_rate"] == 0.0
+
+
+def test_failed_probe_reopens_the_circuit():
+    pool = AnalyzerPool(URLS[:1], failure_threshold=3, reset_timeout=30.0)
+    replica = pool.replicas[0]
+    for _ in range(3):
+        replica.record(False, 0.01)
+    replica.breaker.opened_at -= 30.0
+    replica.record(False, 0.01)
+    assert replica.breaker.state == "open" and replica.breaker.trips == 2
+
+
+def test_picks_the_least_loaded_replica():
+    pool = AnalyzerPool(URLS + ["http://c/analyze"])
+    pool.replicas[0].outstanding, pool.replicas[1].outstanding = 2, 1
+    assert pool.pick() is pool.replicas[2]
+    assert pool.pick(exclude=pool.replicas[2]) is pool.replicas[1]
+
+
+def test_straggler_is_hedged_and_the_faster_replica_wins():
+    pool = AnalyzerPool(URLS, hedge_after=0.05)
+    a, b = pool.replicas
+    # One request already on b, so the slow replica a gets the sub-batch first
+    b.outstanding = 1
+
+    async def run():
+        async with client_for({"a": (1.0, 200), "b": (0.0, 200)}) as client:
+            return await pool.post(client, [{"event_id": "e1"}])
+
+    response, replica = asyncio.run(run())
+    assert replica is b and response.json() == {"host": "b"}
+    assert (b.hedged_requests, a.hedges_lost) == (1, 1)
+    # Losing the race is neither a success nor a failure
+    assert a.outstanding == 0 and a.failures == a.successes == 0 and a.breaker.state == "closed"
+
+
+def test_hedge_falls_back_to_a_non_200_answer():
+    pool = AnalyzerPool(URLS, hedge_after=0.02)
+
+    async def run():
+        async with client_for({"a": (0.1, 503), "b": (0.1, 503)}) as client:
+            return await pool.post(client, [{"event_id": "e1"}])
+
+    response, _ = asyncio.run(run())
+    assert response.status_code == 503
+    assert sum(r.failures for r in pool.replicas) == 2
+    assert sum(r.hedged_requests for r in pool.replicas) == 1
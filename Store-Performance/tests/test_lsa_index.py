@@ -0,0 +1,60 @@
+# tests/test_lsa_index.py
+import numpy as np
+
+from analyzer.lsa_index import LSAIndex
+from analyzer.retrieval_system import SemanticSearchEngine
+from benchmarks.synthetic_events import make_events
+
+QUERY = "product_milk season_winter"
+
+
+def engine_with_lsa(events, rebase_fraction):
+    engine = SemanticSearchEngine(rebase_fraction=rebase_fraction)
+    engine.index_events(events)
+    engine.build_lsa(n_components=16)
+    return engine
+
+
+def record_updates(monkeypatch):
+    calls = []
+    updated = LSAIndex.updated
+
+    def spy(self, doc_matrix, version, weights_version, fold_in=True):
+        calls.append(fold_in)
+        return updated(self, doc_matrix, version, weights_version, fold_in)
+    monkeypatch.setattr(LSAIndex, "updated", spy)
+    return calls
+
+
+def test_appends_are_folded_in(monkeypatch):
+    events = make_events(600)
+    engine = engine_with_lsa(events[:500], rebase_fraction=10.0)
+    calls = record_updates(monkeypatch)
+    engine.append_events(events[500:])
+    assert engine.search(QUERY, top_k=5, backend="lsa")["results"]
+    assert calls == [True]
+    assert len(engine._lsa.vectors) == 600
+
+
+def test_rebase_is_reprojected_by_refresh_not_by_queries(monkeypatch):
+    events = make_events(800)
+    engine = engine_with_lsa(events[:500], rebase_fraction=0.2)
+    calls = record_updates(monkeypatch)
+    engine.append_events(events[500:])
+    index = engine._index
+    assert index.weights_version != engine._lsa.weights_version
+
+    # A query only folds in the new rows and leaves the rebase pending
+    engine.search(QUERY, top_k=5, backend="lsa")
+    assert calls == [True]
+    assert engine._lsa.weights_version != index.weights_version
+
+    assert engine.refresh_lsa()
+    assert calls == [True, False]
+    assert engine._lsa.weights_version == index.weights_version
+    expected = engine._lsa.project(index.doc_matrix)
+    np.testing.assert_allclose(engine._lsa.vectors, expected, atol=1e-5)
+    # Up to date now: neither a refresh nor a query projects anything again
+    assert not engine.refresh_lsa()
+    engine.search(QUERY, top_k=5, backend="lsa")
+    assert calls == [True, False]
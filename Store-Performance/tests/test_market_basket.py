@@ -0,0 +1,38 @@
+# tests/test_market_basket.py
+from analyzer.market_basket import MarketBasket, StreamingMarketBasket
+from benchmarks.synthetic_events import make_events
+
+
+def test_stream_matches_batch_until_pruned():
+    events = make_events(2000)
+    stream = StreamingMarketBasket()
+    for start in range(0, len(events), 500):
+        stream.add_events(events[start:start + 500])
+    assert stream.pairs(top_n=None) == MarketBasket.from_events(events).pairs()
+    assert not any(pair["estimated"] for pair in stream.pairs(top_n=None))
+
+
+def test_estimated_pairs_are_flagged_and_capped():
+    # A tiny sketch makes every readmitted pair collide
+    stream = StreamingMarketBasket(max_pairs=30, sketch_width=8, sketch_depth=1)
+    events = make_events(5000, n_products=200)
+    for start in range(0, len(events), 250):
+        stream.add_events(events[start:start + 250])
+    pairs = stream.pairs(top_n=None)
+    assert stream.stats()["prunes"] > 0
+    assert all(pair["confidence"] <= 1.0 and pair["reverse_confidence"] <= 1.0 for pair in pairs)
+    assert all(pair["estimated"] == (pair["count_error"] > 0) for pair in pairs)
+    assert any(pair["estimated"] for pair in pairs)
+
+
+def test_product_filter_sees_names_from_later_batches():
+    stream = StreamingMarketBasket()
+    first, second = make_events(300), make_events(300, seed=1, n_products=400)
+    stream.add_events(first)
+    before = stream._state
+    stream.add_events(second)
+    # The earlier state keeps the name map it was published with
+    assert len(before.ids) == len(before.products) < len(stream._state.products)
+    newest = stream._state.products[-1]
+    pairs = stream.pairs(top_n=None, products=[newest])
+    assert pairs and all(newest in (pair["product_a"], pair["product_b"]) for pair in pairs)
@@ -0,0 +1,55 @@
+# tests/test_result_cache.py
+from analyzer.result_cache import QueryResultCache
+from analyzer.retrieval_system import SemanticSearchEngine
+from benchmarks.synthetic_events import make_events
+
+
+def response(score: float) -> dict:
+    return {"results": [{"similarity_score": score}], "facet_counts": {}}
+
+
+def test_word_order_case_and_empty_filters_share_an_entry():
+    key = QueryResultCache.key_for
+    assert key("Milk Bread", "milk bread", "tfidf", 5, {"store_id": ["Miami", "dallas"], "season": ""}, True) == \
+        key("bread MILK", "bread milk", "tfidf", 5, {"store_id": ["Dallas", "miami"]}, True)
+    assert key("milk", "milk", "tfidf", 5, None, True) != key("milk", "milk", "bm25", 5, None, True)
+
+
+def test_entries_belong_to_one_index_version():
+    cache = QueryResultCache(max_size=10)
+    cache.put(1, "k", response(0.5), compute_ms=20.0)
+    hit = cache.get(1, "k")
+    assert hit == response(0.5)
+    # Callers get their own copy
+    hit["results"][0]["similarity_score"] = 0.0
+    assert cache.get(1, "k") == response(0.5)
+
+    assert cache.get(2, "k") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"], stats["index_version"]) == (2, 1, 1, 2)
+    assert stats["saved_ms"] == 40.0
+
+
+def test_lru_eviction_and_disabled_cache():
+    cache = QueryResultCache(max_size=2)
+    for key in ["a", "b"]:
+        cache.put(1, key, response(0.1), compute_ms=1.0)
+    cache.get(1, "a")
+    cache.put(1, "c", response(0.1), compute_ms=1.0)
+    assert cache.get(1, "b") is None and cache.get(1, "a") is not None
+    assert cache.stats()["evictions"] == 1
+
+    disabled = QueryResultCache(max_size=0)
+    disabled.put(1, "a", response(0.1), compute_ms=1.0)
+    assert disabled.get(1, "a") is None and disabled.stats()["enabled"] is False
+
+
+def test_append_invalidates_cached_searches():
+    events = make_events(400)
+    engine = SemanticSearchEngine()
+    engine.index_events(events[:300])
+    query = "product_milk season_winter"
+    first = engine.search(query, top_k=5)
+    assert not first["cached"] and engine.search(query, top_k=5)["cached"]
+    engine.append_events(events[300:])
+    assert not engine.search(query, top_k=5)["cached"]
@@ -0,0 +1,84 @@
+# tests/test_retrieval_system.py
+import threading
+
+from analyzer.retrieval_system import SemanticSearchEngine
+from benchmarks.synthetic_events import make_events
+
+
+def test_append_to_empty_engine_builds_the_index():
+    engine = SemanticSearchEngine()
+    added = []
+    # Run in a thread so a deadlock fails the test instead of hanging the run
+    worker = threading.Thread(target=lambda: added.append(engine.append_events(make_events(50))), daemon=True)
+    worker.start()
+    worker.join(timeout=30)
+    assert not worker.is_alive(), "append_events on an empty engine did not return"
+    assert added == [50]
+    assert engine.get_search_stats()["documents_indexed"] == 50
+
+    # The write lock is free again for a full rebuild and further appends
+    engine.index_events(make_events(20))
+    assert engine.append_events(make_events(5, seed=1)) == 5
+    assert engine.get_search_stats()["documents_indexed"] == 25
+
+
+def test_appends_leave_earlier_versions_intact():
+    events = make_events(900)
+    engine = SemanticSearchEngine(rebase_fraction=10.0)
+    engine.index_events(events[:300])
+    engine.append_events(events[300:600])
+    before = engine._index
+    query = "product_milk season_winter"
+    results = engine.search(query, top_k=5, filters={"store_id": "Miami"})
+    engine.append_events(events[600:])
+
+    # Readers holding the previous version see exactly what they saw before
+    assert before.doc_matrix.shape[0] == len(before.documents) == before.facets.n_docs == 600
+    assert list(before.documents) == engine.documents[:600]
+    assert engine._search_index(before, query, engine.expand_query(query), 5, "tfidf",
+                                {"store_id": "Miami"}, True) == {k: results[k] for k in results if k != "cached"}
+
+    # The tail rows are the rows a single matrix would hold
+    current = engine._index
+    stacked = current.doc_matrix.tocsr()
+    assert stacked.shape[0] == len(current.documents) == 900
+    assert (current.doc_matrix[[899, 3, 450]] != stacked[[899, 3, 450]]).nnz == 0
+    assert (current.doc_matrix[590:610] != stacked[590:610]).nnz == 0
+
+
+def test_scores_match_a_fitted_tfidf_vectorizer():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    engine = SemanticSearchEngine()
+    engine.index_events(make_events(300))
+    query = "product_milk season_winter"
+    matrix = engine._index.doc_matrix
+    results = engine.search(query, top_k=10)["results"]
+    # The weighted matrix is built with the index, not per query
+    assert engine._index.doc_matrix is matrix
+
+    vectorizer = TfidfVectorizer(stop_words='english')
+    docs = vectorizer.fit_transform(engine.documents)
+    expected = cosine_similarity(vectorizer.transform([engine.expand_query(query)]), docs)[0]
+    by_id = {m["event_id"]: i for i, m in enumerate(engine._index.metadata)}
+    for result in results:
+        assert abs(result["similarity_score"] - expected[by_id[result["metadata"]["event_id"]]]) < 1e-5
+    assert abs(results[0]["similarity_score"] - max(expected)) < 1e-5
+
+
+def test_batch_matches_one_search_per_query():
+    queries = ["product_milk season_winter", "store_miami payment_cash", "product_milk season_winter",
+               "zzzz nothing matches", "customer_student"]
+    filters = {"store_id": ["Miami", "Dallas"]}
+    batch_engine, single_engine = SemanticSearchEngine(), SemanticSearchEngine()
+    for engine in (batch_engine, single_engine):
+        engine.index_events(make_events(500))
+
+    batch = batch_engine.search_batch(queries, top_k=5, filters=filters)
+    single = [single_engine.search(q, top_k=5, filters=filters, facet_counts=False) for q in queries]
+    strip = lambda response: {k: v for k, v in response.items() if k != "cached"}
+    assert [strip(r) for r in batch] == [strip(r) for r in single]
+    # The repeated query was scored once and shares the cache with search()
+    assert batch_engine.result_cache.stats()["size"] == 4
+    assert batch_engine.search(queries[1], top_k=5, filters=filters, facet_counts=False)["cached"]
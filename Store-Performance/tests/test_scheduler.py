@@ -0,0 +1,58 @@
+# tests/test_scheduler.py
+import asyncio
+
+import pytest
+
+from coordinator.scheduler import LaneScheduler
+
+
+def test_backlogged_lanes_are_served_by_weight():
+    scheduler = LaneScheduler({"interactive": (4, 1), "bulk": (1, 1)}, total_concurrency=1)
+    order = []
+
+    async def job(lane):
+        await scheduler.acquire(lane)
+        order.append(lane)
+        await asyncio.sleep(0)
+        scheduler.release(lane)
+
+    async def run():
+        # Hold the only slot until both lanes have a backlog
+        await scheduler.acquire("bulk")
+        jobs = [asyncio.ensure_future(job(lane)) for lane in ["interactive", "bulk"] * 10]
+        await asyncio.sleep(0)
+        scheduler.release("bulk")
+        await asyncio.gather(*jobs)
+
+    asyncio.run(run())
+    # The held bulk slot already cost bulk one turn: four interactive grants per bulk one after that
+    assert order[:10] == ["interactive"] * 5 + ["bulk"] + ["interactive"] * 4
+    assert sorted(order) == sorted(["interactive", "bulk"] * 10)
+    assert scheduler.stats()["active"] == 0
+
+
+def test_lane_cap_leaves_room_for_other_lanes():
+    scheduler = LaneScheduler({"interactive": (4, 2), "bulk": (1, 1)}, total_concurrency=2)
+
+    async def run():
+        await scheduler.acquire("bulk")
+        queued = asyncio.ensure_future(scheduler.acquire("bulk"))
+        await asyncio.wait_for(scheduler.acquire("interactive"), timeout=1)
+        await asyncio.sleep(0)
+        assert not queued.done()
+        scheduler.release("bulk")
+        await asyncio.wait_for(queued, timeout=1)
+
+    asyncio.run(run())
+    assert scheduler.stats()["lanes"]["bulk"]["served"] == 2
+
+
+@pytest.mark.parametrize("lanes, default_lane", [
+    ({"interactive": (0, 4), "bulk": (1, 2)}, None),
+    ({"interactive": (4, 4), "bulk": (1, 0)}, None),
+    ({"interactive": (4, 4), "bulk": (1, 2)}, "batch"),
+    ({}, None),
+])
+def test_bad_lane_settings_fail_at_construction(lanes, default_lane):
+    with pytest.raises(ValueError):
+        LaneScheduler(lanes, total_concurrency=4, default_lane=default_lane)
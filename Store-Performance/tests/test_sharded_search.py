@@ -0,0 +1,46 @@
+# tests/test_sharded_search.py
+import pytest
+
+from analyzer.retrieval_system import SemanticSearchEngine
+from analyzer.sharded_search import ShardedSearch
+from benchmarks.synthetic_events import make_events
+
+QUERIES = ["product_milk season_winter customer_student", "store_dallas payment_cash", "nothing_matches_this"]
+FILTERS = [None, {"store_id": ["Miami", "Dallas"]}, {"season": "Winter", "amount_min": 30, "time_from": "2020-03-01"}]
+
+
+@pytest.fixture(scope="module")
+def engines(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("snapshots"))
+    plain = SemanticSearchEngine(result_cache_size=0, rebase_fraction=10.0)
+    plain.index_events(make_events(2000))
+    plain.save_snapshot(root)
+    sharded = SemanticSearchEngine(result_cache_size=0, rebase_fraction=10.0)
+    sharded.load_snapshot(root)
+    sharded.enable_sharding(2)
+    # Rows appended since the snapshot are scored in-process and merged in
+    for engine in (plain, sharded):
+        engine.append_events(make_events(300, seed=1))
+    yield plain, sharded
+    sharded.disable_sharding()
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_sharded_search_matches_in_process_search(engines, filters):
+    plain, sharded = engines
+    for query in QUERIES:
+        expected, got = plain.search(query, top_k=10, filters=filters), sharded.search(query, top_k=10, filters=filters)
+        assert got["results"] == expected["results"]
+        assert got["facet_counts"] == expected["facet_counts"]
+        assert got["documents_scored"] == expected["documents_scored"]
+    stats = sharded.sharding_stats()
+    assert stats["queries"] > 0 and stats["failures"] == 0
+
+
+def test_shard_ranges_cover_every_row():
+    shards = ShardedSearch(3)
+    try:
+        assert shards.ranges(10) == [(0, 3), (3, 6), (6, 10)]
+        assert shards.ranges(2) == [(0, 1), (1, 2)]
+    finally:
+        shards.shutdown()
@@ -0,0 +1,40 @@
+# tests/test_startup.py
+import os
+import subprocess
+import sys
+
+from analyzer.startup import StartupTracker
+
+
+def test_phase_follows_imports_and_index_warm():
+    tracker = StartupTracker()
+    assert tracker.phase() == "starting"
+    tracker.begin("imports")
+    tracker.finish("imports")
+    tracker.begin("index_warm")
+    assert tracker.phase() == "warming"
+    # The LLM probe never holds back readiness
+    tracker.begin("llm_probe")
+    tracker.finish("index_warm", "empty", documents=0)
+    assert tracker.phase() == "ready"
+
+    report = tracker.report()
+    assert report["phases"]["index_warm"]["documents"] == 0
+    assert report["phases"]["index_warm"]["duration_ms"] >= 0
+    assert report["phases"]["llm_probe"]["status"] == "running"
+
+
+def test_first_request_is_recorded_once():
+    tracker = StartupTracker()
+    tracker.mark_request()
+    first = tracker.first_request_ms
+    tracker.mark_request()
+    assert tracker.report()["time_to_first_request_ms"] == first is not None
+
+
+def test_analysis_modules_import_without_sklearn():
+    code = ("import sys, analyzer.retrieval_system, analyzer.advanced_analysis, analyzer.enhanced_llm_analysis; "
+            "print(sorted(m for m in ('sklearn', 'requests', 'groq') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    assert out.strip() == "[]"
@@ -0,0 +1,62 @@
+# tests/test_suggest_index.py
+import pytest
+
+from analyzer.suggest_index import SuggestIndex, _words
+from benchmarks.synthetic_events import make_events
+
+QUERIES = ["m", "mi", "milk", "c", "ch", "hot ch", "choc hot", "s", "student", "dal", "e", "zz", "", "  "]
+
+
+def brute_force(index, query, limit):
+    """Entries with a word starting with every query word, best selling first"""
+    state = index._state
+    prefixes = _words(query)
+    found = [e for e, value in enumerate(state.values)
+             if prefixes and all(any(w.startswith(p) for w in _words(value)) for p in prefixes)]
+    found.sort(key=lambda e: (-state.sales[e], e))
+    return [state.values[e] for e in found[:limit]]
+
+
+def values(suggestions):
+    return [s["value"] for s in suggestions]
+
+
+@pytest.mark.parametrize("merge_threshold", [1, 10**6])
+def test_suggestions_match_a_linear_scan(merge_threshold):
+    index = SuggestIndex(merge_threshold=merge_threshold)
+    events = make_events(1500, n_products=120)
+    for start in range(0, len(events), 300):
+        index.add_events(events[start:start + 300])
+    # With a huge threshold every word is still in the unsorted tail
+    assert (index.stats()["pending_words"] == 0) == (merge_threshold == 1)
+    for query in QUERIES:
+        for limit in (1, 5, 50):
+            assert values(index.suggest(query, limit)) == brute_force(index, query, limit), (query, limit)
+
+
+def test_kinds_filter_and_unknown_kinds():
+    index = SuggestIndex()
+    index.add_events(make_events(300))
+    stores = index.suggest("m", limit=10, kinds=["store"])
+    assert stores and all(s["kind"] == "store" and s["value"].lower().startswith("m") for s in stores)
+    with pytest.raises(ValueError):
+        index.suggest("m", kinds=["supplier"])
+
+
+def test_counts_follow_sales_and_survive_a_round_trip():
+    events = [{"event_type": "sale", "store_id": "Miami",
+               "payload": {"items": ["Milk", "milk", "Hot Chocolate"], "amount": 10}},
+              {"event_type": "sale", "store_id": "miami", "payload": {"items": ["Milk"], "amount": "2.5"}},
+              {"event_type": "restock", "store_id": "Miami", "payload": {"items": ["Milk"]}}]
+    index = SuggestIndex()
+    assert index.add_events(events) == 3
+    assert index.suggest("mi", limit=5) == [
+        {"value": "Milk", "kind": "product", "sales": 2, "revenue": 12.5},
+        {"value": "Miami", "kind": "store", "sales": 2, "revenue": 12.5},
+    ]
+    restored = SuggestIndex.from_dict(index.to_dict())
+    for query in ["mi", "hot", "choc"]:
+        assert restored.suggest(query) == index.suggest(query)
+    # Known values only bump counters
+    assert restored.add_events(events[:1]) == 0
+    assert restored.suggest("milk")[0]["sales"] == 3
@@ -0,0 +1,46 @@
+# tests/test_time_buckets.py
+import pytest
+
+from analyzer.analysis_pool import analyze_frame
+from analyzer.seasonality import BasketFrame
+from analyzer.time_buckets import TimestampParser
+
+
+@pytest.mark.parametrize("timestamp, month", [
+    ("2024-01-05T10:00:00", "January"),
+    ("2024-07-05 10:00:00", "July"),
+    ("20241105", "November"),
+    ("2024-1-5", "January"),
+    # The month as written, not as converted to UTC
+    ("2024-12-31T23:30:00-05:00", "December"),
+    # Shapes pandas parses without a month at a fixed place
+    ("2024", ""),
+    (" 2024-01-05T10:00:00", ""),
+    ("2024-02-30", ""),
+    ("", ""),
+    ("nonsense", ""),
+    (None, ""),
+    (20240105, ""),
+])
+def test_month_as_written(timestamp, month):
+    buckets = TimestampParser(cache_size=0).parse([timestamp])
+    assert buckets.month_names() == [month]
+    if not month:
+        assert buckets.seasons() == ["unknown"]
+
+
+def test_cached_results_match_fresh_ones():
+    values = ["2024-03-01T00:00:00", "2024", "2024-1-5", "2024-03-01T00:00:00"]
+    parser = TimestampParser()
+    first = parser.parse(values)
+    second = parser.parse(values)
+    assert first.month.tolist() == second.month.tolist() == [3, 0, 1, 3]
+    assert parser.stats()["hits"] == 3
+
+
+def test_analysis_survives_odd_timestamps():
+    events = [{"event_type": "sale", "ts": ts, "payload": {"items": ["Milk", "Bread"], "amount": 10, "season": ""}}
+              for ts in ["2024", " 2024-01-05T10:00:00", "2024-1-5", "2024-06-01T09:00:00"]]
+    result = analyze_frame(BasketFrame.from_events(events), True)
+    assert "insights" in result["seasonal_insights"]
+    assert "insights" in result["enhanced_insights"]
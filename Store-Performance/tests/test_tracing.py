@@ -0,0 +1,19 @@
+# tests/test_tracing.py
+from coordinator.tracing import StageStats, Timeline
+
+
+def test_reported_phases_sit_inside_their_request_span():
+    spans = []
+    timeline = Timeline(spans, StageStats())
+    with timeline.span("analyzer_http") as http:
+        pass
+    http["start_ms"], http["end_ms"] = 100.0, 400.0
+    start = http["start_ms"]
+    for phase, duration_ms in {"pattern_analysis": 120.0, "llm": 80.5}.items():
+        start = timeline.record(f"analyzer_{phase}", duration_ms, start_ms=start, parent="analyzer_http")
+
+    ordered = sorted(spans, key=lambda s: s.get("start_ms", s.get("end_ms", 0)))
+    assert [s["stage"] for s in ordered] == ["analyzer_http", "analyzer_pattern_analysis", "analyzer_llm"]
+    assert (ordered[1]["start_ms"], ordered[1]["end_ms"]) == (100.0, 220.0)
+    assert (ordered[2]["start_ms"], ordered[2]["end_ms"]) == (220.0, 300.5)
+    assert timeline.stats.summary()["analyzer_llm"]["count"] == 1